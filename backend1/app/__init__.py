@@ -43,11 +43,29 @@ def create_app(config_class=Config):
     # Register blueprints
     from backend1.app.routes import auth_bp, dashboard_bp, admin_bp, reports_bp
     from backend1.app.routes.companies import bp as companies_bp
+    from backend1.app.routes.compliance import bp as compliance_bp
     app.register_blueprint(auth_bp)
     app.register_blueprint(dashboard_bp)
     app.register_blueprint(admin_bp)
     app.register_blueprint(reports_bp)
     app.register_blueprint(companies_bp)
+    app.register_blueprint(compliance_bp)
+    
+    # Background batch scrape jobs
+    from backend1.app.services import scrape_jobs
+    scrape_jobs.init_app(app)
+    
+    # Keep stored compliance scores and rollups current on writes
+    from backend1.app.services import compliance_scores
+    compliance_scores.init_app(app)
+    
+    # Company search index, created along with the companies table
+    from backend1.app.services import company_search
+    company_search.init_app(app)
+    
+    # Register CLI commands
+    from backend1.app.cli import register_commands
+    register_commands(app)
     
     # Health check route
     @app.route('/health')
@@ -0,0 +1,133 @@
+"""
+Flask CLI Commands
+Author: Osman Yildiz
+
+Usage:
+    flask --app backend1.run scraper crawl [--discover-only] [--max-pages N]
+    flask --app backend1.run scraper rescrape [--budget N] [--min-age-hours H]
+    flask --app backend1.run compliance rescore [--chunk-size N] [--workers N] [--dry-run]
+"""
+import logging
+from datetime import timedelta
+
+import click
+from flask import current_app
+from flask.cli import AppGroup
+
+from backend1.app import db
+
+logger = logging.getLogger(__name__)
+
+scraper_cli = AppGroup('scraper', help='Scrape AnnualReports.com')
+compliance_cli = AppGroup('compliance', help='Maintain stored compliance scores')
+
+
+@scraper_cli.command('crawl')
+@click.option('--frontier', 'frontier_path', default=None,
+              help='Frontier file (defaults to SCRAPER_FRONTIER_PATH)')
+@click.option('--start-url', 'start_urls', multiple=True,
+              help='Directory page to start from (repeatable; defaults to the A-Z index)')
+@click.option('--batch-size', default=50, show_default=True, help='Slugs scraped per batch')
+@click.option('--max-pages', type=int, default=None, help='Listing page limit for this run')
+@click.option('--max-companies', type=int, default=None, help='Company limit for this run')
+@click.option('--discover-only', is_flag=True, help='Only collect slugs, do not scrape companies')
+@click.option('--retry-failed', is_flag=True, help='Re-queue pages and slugs that failed earlier')
+def crawl_command(frontier_path, start_urls, batch_size, max_pages, max_companies,
+                  discover_only, retry_failed):
+    """Crawl the company directory and store every company found"""
+    from backend1.app.services.crawl_frontier import CrawlFrontier
+    from backend1.app.services.crawler import DirectoryCrawler
+    from backend1.app.services.company_sync import sync_company
+    from backend1.app.services.scraper import get_scraper
+
+    frontier = CrawlFrontier(frontier_path or current_app.config['SCRAPER_FRONTIER_PATH'])
+    crawler = DirectoryCrawler(get_scraper(), frontier, batch_size=batch_size)
+
+    if retry_failed:
+        click.echo(f"Re-queued {frontier.retry_failed()} failed entries")
+    added = crawler.seed(start_urls or None)
+    if added:
+        click.echo(f"Seeded {added} directory pages")
+
+    def store(slug, company_data):
+        if not company_data.get('name'):
+            raise ValueError('page has no company name')
+        try:
+            sync_company(company_data)
+            db.session.commit()
+        except Exception:
+            db.session.rollback()
+            raise
+
+    result = crawler.run(None if discover_only else store, max_pages=max_pages,
+                         max_companies=max_companies)
+
+    click.echo(f"Listing pages: {result['pages_fetched']} fetched, {result['pages_failed']} failed")
+    click.echo(f"New companies discovered: {result['slugs_discovered']}")
+    if not discover_only:
+        click.echo(f"Companies: {result['companies_scraped']} stored, "
+                   f"{result['companies_failed']} failed")
+    pages, slugs = result['frontier']['pages'], result['frontier']['slugs']
+    click.echo(f"Frontier: {pages['pending']} pages and {slugs['pending']} companies pending")
+
+
+@scraper_cli.command('rescrape')
+@click.option('--budget', type=int, default=None,
+              help='Companies re-scraped this run (defaults to SCRAPER_RESCRAPE_BUDGET)')
+@click.option('--min-age-hours', type=float, default=None,
+              help='Skip companies scraped more recently (defaults to SCRAPER_RESCRAPE_MIN_AGE_HOURS)')
+def rescrape_command(budget, min_age_hours):
+    """Re-scrape the stalest companies, writing only those that changed"""
+    from backend1.app.services.rescrape_scheduler import RescrapeScheduler
+    from backend1.app.services.scraper import get_scraper
+
+    config = current_app.config
+    scheduler = RescrapeScheduler(
+        get_scraper(),
+        budget=budget if budget is not None else config['SCRAPER_RESCRAPE_BUDGET'],
+        min_age=timedelta(hours=min_age_hours if min_age_hours is not None
+                          else config['SCRAPER_RESCRAPE_MIN_AGE_HOURS'])
+    )
+    result = scheduler.run()
+
+    click.echo(f"Selected {result['selected']} stale companies in {result['duration_seconds']}s")
+    click.echo(f"  Fetched:   {result['fetched']}")
+    click.echo(f"  Changed:   {result['changed']}")
+    click.echo(f"  Unchanged: {result['unchanged']}")
+    click.echo(f"  Failed:    {result['failed']}")
+
+
+@compliance_cli.command('rescore')
+@click.option('--chunk-size', default=2000, show_default=True, help='Companies scored and written per chunk')
+@click.option('--workers', type=int, default=None,
+              help='Scoring processes (defaults to the CPU count; 0 scores in this process)')
+@click.option('--dry-run', is_flag=True, help='Only report how many scores would change')
+def rescore_command(chunk_size, workers, dry_run):
+    """
+    Rescore every company and refresh its rollup and report counters
+
+    Run after a deploy that changes the scoring spec and at the start of
+    each year; requests only read the stored rows.
+    """
+    from backend1.app.models.company import Company
+    from backend1.app.services.compliance_rescore import CatalogRescorer
+
+    total = db.session.query(db.func.count(Company.id)).scalar()
+    rescorer = CatalogRescorer(chunk_size=chunk_size, workers=workers, dry_run=dry_run)
+    with click.progressbar(length=total, label='Rescoring', show_pos=True) as bar:
+        result = rescorer.run(progress=lambda done, stats: bar.update(done))
+
+    verb = 'would change' if dry_run else 'changed'
+    click.echo(f"Scored {result['companies']} companies in {result['elapsed_seconds']}s "
+               f"({result['companies_per_second']}/s)")
+    click.echo(f"  Scores {verb}: {result['changed']}")
+    click.echo(f"  New:       {result['new']}")
+    click.echo(f"  Unchanged: {result['unchanged']}")
+    if not dry_run:
+        click.echo(f"  Rows written: {result['written']}")
+
+
+def register_commands(app):
+    """Attach the CLI command groups to the app"""
+    app.cli.add_command(scraper_cli)
+    app.cli.add_command(compliance_cli)
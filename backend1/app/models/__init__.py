@@ -3,5 +3,10 @@ Models package initialization
 """
 from backend1.app.models.user import User
 from backend1.app.models.report import Report
+from backend1.app.models.compliance_score import ComplianceScore
+from backend1.app.models.compliance_rollup import ComplianceRollup
+from backend1.app.models.compliance_history import ComplianceScoreHistory
+from backend1.app.models.control_status import CompanyControlStatus
 
-__all__ = ['User', 'Report']
\ No newline at end of file
+__all__ = ['User', 'Report', 'ComplianceScore', 'ComplianceRollup', 'ComplianceScoreHistory',
+           'CompanyControlStatus']
\ No newline at end of file
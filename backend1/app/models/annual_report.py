@@ -4,6 +4,7 @@ Author: Osman Yildiz
 """
 from datetime import datetime
 from backend1.app import db
+from backend1.app.models.serialization import column_values
 
 
 class AnnualReport(db.Model):
@@ -11,7 +12,7 @@ class AnnualReport(db.Model):
     __tablename__ = 'annual_reports'
     
     id = db.Column(db.Integer, primary_key=True)
-    company_id = db.Column(db.Integer, db.ForeignKey('companies.id'), nullable=False)
+    company_id = db.Column(db.Integer, db.ForeignKey('companies.id'), nullable=False, index=True)
     
     # Report details
     year = db.Column(db.Integer, nullable=False)
@@ -33,26 +34,24 @@ class AnnualReport(db.Model):
     # Relationships
     company = db.relationship('Company', back_populates='annual_reports')
     
+    # Column keys of to_dict
+    FIELDS = ('id', 'company_id', 'year', 'title', 'report_type', 'pdf_url', 'html_url', 'view_url',
+              'filing_date', 'created_at', 'updated_at')
+    
     def __repr__(self):
         return f'<AnnualReport {self.title} ({self.year})>'
     
-    def to_dict(self, include_company=False):
-        """Convert annual report object to dictionary"""
-        data = {
-            'id': self.id,
-            'company_id': self.company_id,
-            'year': self.year,
-            'title': self.title,
-            'report_type': self.report_type,
-            'pdf_url': self.pdf_url,
-            'html_url': self.html_url,
-            'view_url': self.view_url,
-            'filing_date': self.filing_date.isoformat() if self.filing_date else None,
-            'created_at': self.created_at.isoformat() if self.created_at else None,
-            'updated_at': self.updated_at.isoformat() if self.updated_at else None,
-        }
+    def to_dict(self, include_company=False, fields=None):
+        """
+        Convert annual report object to dictionary
+        
+        Args:
+            include_company: Add the company
+            fields: Only these keys (see FIELDS, plus 'company'); None for all
+        """
+        data = column_values(self, self.FIELDS, fields)
         
-        if include_company and self.company:
+        if include_company and (fields is None or 'company' in fields) and self.company:
             data['company'] = self.company.to_dict()
         
         return data
@@ -4,11 +4,16 @@ Author: Osman Yildiz
 """
 from datetime import datetime
 from backend1.app import db
+from backend1.app.models.serialization import column_values
 
 
 class Company(db.Model):
     """Company model for storing data scraped from AnnualReports.com"""
     __tablename__ = 'companies'
+    __table_args__ = (
+        # Keyset pagination order
+        db.Index('ix_companies_name_id', 'name', 'id'),
+    )
     
     id = db.Column(db.Integer, primary_key=True)
     name = db.Column(db.String(200), nullable=False)
@@ -24,34 +29,46 @@ class Company(db.Model):
     # Timestamps
     created_at = db.Column(db.DateTime, default=datetime.utcnow)
     updated_at = db.Column(db.DateTime, default=datetime.utcnow, onupdate=datetime.utcnow)
-    last_scraped_at = db.Column(db.DateTime, default=datetime.utcnow)
+    last_scraped_at = db.Column(db.DateTime, default=datetime.utcnow, index=True)
+    
+    # Re-scrape scheduling: every attempt, failed ones included, and the failures since the last success
+    last_scrape_attempt_at = db.Column(db.DateTime, default=datetime.utcnow, index=True)
+    scrape_failures = db.Column(db.Integer, nullable=False, default=0, server_default='0')
+    
+    # SHA-256 of the normalized scrape output, used to skip unchanged re-scrapes
+    content_hash = db.Column(db.String(64), nullable=True)
+    
+    # Annual report counters for filtering and sorting without a join
+    # (maintained by services/report_counts.py)
+    report_count = db.Column(db.Integer, nullable=False, default=0, server_default='0', index=True)
+    latest_report_year = db.Column(db.Integer, nullable=True, index=True)
+    recent_report_count = db.Column(db.Integer, nullable=False, default=0, server_default='0', index=True)
     
     # Relationships
     annual_reports = db.relationship('AnnualReport', back_populates='company', cascade='all, delete-orphan')
     compliance_reports = db.relationship('Report', back_populates='company')
+    compliance_score = db.relationship('ComplianceScore', back_populates='company', uselist=False,
+                                       cascade='all, delete-orphan')
+    
+    # Column keys of to_dict
+    FIELDS = ('id', 'name', 'ticker', 'exchange', 'industry', 'sector', 'description', 'employee_count',
+              'website', 'source_url', 'created_at', 'updated_at', 'last_scraped_at',
+              'report_count', 'latest_report_year', 'recent_report_count')
     
     def __repr__(self):
         return f'<Company {self.name} ({self.ticker})>'
     
-    def to_dict(self, include_reports=False):
-        """Convert company object to dictionary"""
-        data = {
-            'id': self.id,
-            'name': self.name,
-            'ticker': self.ticker,
-            'exchange': self.exchange,
-            'industry': self.industry,
-            'sector': self.sector,
-            'description': self.description,
-            'employee_count': self.employee_count,
-            'website': self.website,
-            'source_url': self.source_url,
-            'created_at': self.created_at.isoformat() if self.created_at else None,
-            'updated_at': self.updated_at.isoformat() if self.updated_at else None,
-            'last_scraped_at': self.last_scraped_at.isoformat() if self.last_scraped_at else None,
-        }
+    def to_dict(self, include_reports=False, fields=None):
+        """
+        Convert company object to dictionary
+        
+        Args:
+            include_reports: Add the annual reports
+            fields: Only these keys (see FIELDS, plus 'annual_reports'); None for all
+        """
+        data = column_values(self, self.FIELDS, fields)
         
-        if include_reports:
+        if include_reports and (fields is None or 'annual_reports' in fields):
             data['annual_reports'] = [report.to_dict() for report in self.annual_reports]
         
         return data
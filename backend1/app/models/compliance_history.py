@@ -0,0 +1,34 @@
+"""
+Compliance Score History Model - Delta-encoded score changes per company
+Author: Osman Yildiz
+"""
+from datetime import datetime
+from backend1.app import db
+
+
+class ComplianceScoreHistory(db.Model):
+    """
+    One row per change of a company's compliance scores
+
+    `values` packs the control scores (in compliance_history.SCORE_FIELDS
+    order) as signed bytes: absolute scores on keyframes, differences to
+    the previous row otherwise.
+    """
+    __tablename__ = 'compliance_score_history'
+    __table_args__ = (
+        db.UniqueConstraint('company_id', 'seq', name='uq_compliance_score_history_company_seq'),
+    )
+
+    id = db.Column(db.Integer, primary_key=True)
+    company_id = db.Column(db.Integer, db.ForeignKey('companies.id', ondelete='CASCADE'), nullable=False)
+    seq = db.Column(db.Integer, nullable=False)  # Per-company sequence number, starting at 0
+    recorded_at = db.Column(db.DateTime, nullable=False, default=datetime.utcnow, index=True)
+
+    keyframe = db.Column(db.Boolean, nullable=False, default=False)
+    values = db.Column(db.LargeBinary, nullable=False)
+
+    # Stored as is, so portfolio trends need no decoding
+    average_compliance = db.Column(db.SmallInteger, nullable=False)
+
+    def __repr__(self):
+        return f'<ComplianceScoreHistory company={self.company_id} seq={self.seq}>'
@@ -0,0 +1,58 @@
+"""
+Compliance Rollup Model - Materialized per-company compliance averages
+Author: Osman Yildiz
+"""
+from datetime import datetime
+from backend1.app import db
+
+
+class ComplianceRollup(db.Model):
+    """
+    One row per company with its framework averages, kept current on every
+    company or annual report write so the overview can filter, sort and
+    page in SQL
+    """
+    __tablename__ = 'compliance_rollups'
+    __table_args__ = (
+        db.Index('ix_compliance_rollups_industry_average', 'industry', 'average_compliance'),
+    )
+
+    company_id = db.Column(db.Integer, db.ForeignKey('companies.id', ondelete='CASCADE'), primary_key=True)
+
+    # Copied from the company for filtering and display without a join
+    name = db.Column(db.String(200), nullable=False, index=True)
+    ticker = db.Column(db.String(10), nullable=True)
+    industry = db.Column(db.String(100), nullable=True)
+    report_count = db.Column(db.Integer, nullable=False, default=0)
+
+    # Framework averages; average_compliance covers ISO 27001, ISO 27017 and SOC 2 controls
+    iso27001_average = db.Column(db.Float, nullable=False)
+    iso27017_average = db.Column(db.Float, nullable=False)
+    soc2_average = db.Column(db.Float, nullable=False)
+    policies_average = db.Column(db.Float, nullable=False)
+    average_compliance = db.Column(db.Integer, nullable=False, index=True)
+
+    # Scores depend on the algorithm and on the current year (report recency)
+    algorithm_version = db.Column(db.String(20), nullable=False)
+    score_year = db.Column(db.Integer, nullable=False)
+    updated_at = db.Column(db.DateTime, default=datetime.utcnow, onupdate=datetime.utcnow)
+
+    def __repr__(self):
+        return f'<ComplianceRollup company={self.company_id} avg={self.average_compliance}>'
+
+    def to_dict(self):
+        """Convert rollup to dictionary"""
+        return {
+            'id': self.company_id,
+            'name': self.name,
+            'ticker': self.ticker or 'N/A',
+            'industry': self.industry or 'Unknown',
+            'report_count': self.report_count,
+            'framework_averages': {
+                'iso27001': self.iso27001_average,
+                'iso27017': self.iso27017_average,
+                'soc2': self.soc2_average,
+                'policies': self.policies_average,
+            },
+            'average_compliance': self.average_compliance,
+        }
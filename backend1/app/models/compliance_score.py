@@ -0,0 +1,26 @@
+"""
+Compliance Score Model - Persisted analyzer output per company
+Author: Osman Yildiz
+"""
+from datetime import datetime
+from backend1.app import db
+
+
+class ComplianceScore(db.Model):
+    """Latest compliance scores of a company and the inputs they were computed from"""
+    __tablename__ = 'compliance_scores'
+
+    company_id = db.Column(db.Integer, db.ForeignKey('companies.id', ondelete='CASCADE'), primary_key=True)
+
+    # SHA-256 of the scoring inputs; scores are recomputed when it changes
+    input_hash = db.Column(db.String(64), nullable=False)
+    algorithm_version = db.Column(db.String(20), nullable=False)
+
+    scores = db.Column(db.JSON, nullable=False)
+    computed_at = db.Column(db.DateTime, default=datetime.utcnow, onupdate=datetime.utcnow, index=True)
+
+    # Relationships
+    company = db.relationship('Company', back_populates='compliance_score')
+
+    def __repr__(self):
+        return f'<ComplianceScore company={self.company_id} v{self.algorithm_version}>'
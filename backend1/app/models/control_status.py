@@ -0,0 +1,33 @@
+"""
+Control Status Model - Per-company control coverage as bitsets
+Author: Osman Yildiz
+"""
+from datetime import datetime
+from backend1.app import db
+
+
+class CompanyControlStatus(db.Model):
+    """
+    Status of every catalog control for one company
+
+    `implemented` and `in_progress` are bitsets with one bit per control
+    (in control_catalog order, least significant bit first); controls in
+    neither are not started. Derived from the company's compliance scores.
+    """
+    __tablename__ = 'company_control_status'
+
+    company_id = db.Column(db.Integer, db.ForeignKey('companies.id', ondelete='CASCADE'), primary_key=True)
+
+    # Peer group (ComplianceAnalyzer industry) for baseline comparisons
+    industry = db.Column(db.String(50), nullable=False, index=True)
+
+    implemented = db.Column(db.LargeBinary, nullable=False)
+    in_progress = db.Column(db.LargeBinary, nullable=False)
+
+    # Catalog version and ComplianceScore.computed_at the bits were derived from
+    catalog_version = db.Column(db.String(20), nullable=False)
+    scored_at = db.Column(db.DateTime)
+    updated_at = db.Column(db.DateTime, default=datetime.utcnow, onupdate=datetime.utcnow)
+
+    def __repr__(self):
+        return f'<CompanyControlStatus company={self.company_id}>'
@@ -4,11 +4,16 @@ Author: Osman Yildiz
 """
 from datetime import datetime
 from backend1.app import db
+from backend1.app.models.serialization import column_values
 
 
 class Report(db.Model):
     """Report model for compliance reports"""
     __tablename__ = 'reports'
+    __table_args__ = (
+        # Keyset pagination order (newest first)
+        db.Index('ix_reports_created_at_id', 'created_at', 'id'),
+    )
     
     id = db.Column(db.Integer, primary_key=True)
     title = db.Column(db.String(200), nullable=False)
@@ -37,33 +42,28 @@ class Report(db.Model):
     review_notes = db.Column(db.Text, nullable=True)
     compliance_score = db.Column(db.Float, nullable=True)
     
+    # Column keys of to_dict
+    FIELDS = ('id', 'title', 'description', 'report_type', 'status', 'priority', 'file_path', 'created_by',
+              'reviewed_by', 'company_id', 'source_annual_report_id', 'created_at', 'updated_at',
+              'reviewed_at', 'review_notes', 'compliance_score')
+    
     def __repr__(self):
         return f'<Report {self.title}>'
     
-    def to_dict(self, include_company=False):
-        """Convert report object to dictionary"""
-        data = {
-            'id': self.id,
-            'title': self.title,
-            'description': self.description,
-            'report_type': self.report_type,
-            'status': self.status,
-            'priority': self.priority,
-            'file_path': self.file_path,
-            'created_by': self.created_by,
-            'reviewed_by': self.reviewed_by,
-            'company_id': self.company_id,
-            'source_annual_report_id': self.source_annual_report_id,
-            'created_at': self.created_at.isoformat() if self.created_at else None,
-            'updated_at': self.updated_at.isoformat() if self.updated_at else None,
-            'reviewed_at': self.reviewed_at.isoformat() if self.reviewed_at else None,
-            'review_notes': self.review_notes,
-            'compliance_score': self.compliance_score
-        }
+    def to_dict(self, include_company=False, fields=None):
+        """
+        Convert report object to dictionary
+        
+        Args:
+            include_company: Add the linked company
+            fields: Only these keys (see FIELDS, plus 'company' and
+                    'source_annual_report'); None for all
+        """
+        data = column_values(self, self.FIELDS, fields)
         
-        if include_company and self.company:
+        if include_company and (fields is None or 'company' in fields) and self.company:
             data['company'] = self.company.to_dict()
-        if self.source_annual_report:
+        if (fields is None or 'source_annual_report' in fields) and self.source_annual_report:
             data['source_annual_report'] = self.source_annual_report.to_dict()
             
         return data
\ No newline at end of file
@@ -0,0 +1,93 @@
+"""
+Scrape Job Models - Persisted batch scrape jobs and their per-slug results
+Author: Osman Yildiz
+"""
+from datetime import datetime
+from backend1.app import db
+
+
+class ScrapeJob(db.Model):
+    """A batch of company slugs scraped in the background"""
+    __tablename__ = 'scrape_jobs'
+
+    id = db.Column(db.Integer, primary_key=True)
+    status = db.Column(db.String(20), nullable=False, default='queued', index=True)  # queued, running, completed
+    force_update = db.Column(db.Boolean, nullable=False, default=False)
+    created_by = db.Column(db.Integer, db.ForeignKey('users.id'), nullable=True)
+
+    # Worker that claimed the job ("host:pid") and its last sign of life
+    worker = db.Column(db.String(100), nullable=True)
+    heartbeat_at = db.Column(db.DateTime, nullable=True)
+
+    # Timestamps
+    created_at = db.Column(db.DateTime, default=datetime.utcnow)
+    started_at = db.Column(db.DateTime, nullable=True)
+    finished_at = db.Column(db.DateTime, nullable=True)
+
+    # Relationships
+    items = db.relationship('ScrapeJobItem', back_populates='job', cascade='all, delete-orphan',
+                            order_by='ScrapeJobItem.id')
+
+    def __repr__(self):
+        return f'<ScrapeJob {self.id} ({self.status})>'
+
+    def progress(self):
+        """Count items by status"""
+        counts = {}
+        for item in self.items:
+            counts[item.status] = counts.get(item.status, 0) + 1
+        total = len(self.items)
+        done = total - counts.get('pending', 0)
+        return {
+            'total': total,
+            'done': done,
+            'percent': round(100.0 * done / total, 1) if total else 100.0,
+            'by_status': counts
+        }
+
+    def to_dict(self, include_items=False):
+        """Convert job object to dictionary"""
+        data = {
+            'id': self.id,
+            'status': self.status,
+            'force_update': self.force_update,
+            'created_by': self.created_by,
+            'progress': self.progress(),
+            'created_at': self.created_at.isoformat() if self.created_at else None,
+            'started_at': self.started_at.isoformat() if self.started_at else None,
+            'finished_at': self.finished_at.isoformat() if self.finished_at else None,
+        }
+
+        if include_items:
+            data['items'] = [item.to_dict() for item in self.items]
+
+        return data
+
+
+class ScrapeJobItem(db.Model):
+    """Result of scraping one slug within a job"""
+    __tablename__ = 'scrape_job_items'
+
+    id = db.Column(db.Integer, primary_key=True)
+    job_id = db.Column(db.Integer, db.ForeignKey('scrape_jobs.id'), nullable=False, index=True)
+    slug = db.Column(db.String(255), nullable=False)
+    status = db.Column(db.String(20), nullable=False, default='pending')  # pending, created, updated, unchanged, skipped, failed
+    company_id = db.Column(db.Integer, db.ForeignKey('companies.id', ondelete='SET NULL'), nullable=True)
+    error = db.Column(db.String(500), nullable=True)
+    finished_at = db.Column(db.DateTime, nullable=True)
+
+    # Relationships
+    job = db.relationship('ScrapeJob', back_populates='items')
+
+    def __repr__(self):
+        return f'<ScrapeJobItem {self.slug} ({self.status})>'
+
+    def to_dict(self):
+        """Convert job item object to dictionary"""
+        return {
+            'slug': self.slug,
+            'status': self.status,
+            'company_id': self.company_id,
+            'error': self.error,
+            'finished_at': self.finished_at.isoformat() if self.finished_at else None,
+        }
@@ -0,0 +1,26 @@
+"""
+Model Serialization Helpers
+Author: Osman Yildiz
+"""
+from datetime import date
+
+
+def column_values(obj, names, fields=None) -> dict:
+    """
+    Column values of a model object, for to_dict
+
+    Args:
+        obj: Model instance
+        names: Serialized column names, in output order
+        fields: Names to include (None for all). Only these attributes are
+                read, so columns a load_only query skipped stay unloaded.
+
+    Returns:
+        Dictionary of name to value, with dates and datetimes as ISO strings
+    """
+    data = {}
+    for name in names:
+        if fields is None or name in fields:
+            value = getattr(obj, name)
+            data[name] = value.isoformat() if isinstance(value, date) else value
+    return data
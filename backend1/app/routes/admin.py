@@ -2,10 +2,12 @@
 Admin Routes - User Management
 Author: Osman Yildiz
 """
+import os
 from flask import Blueprint, request, jsonify
 from flask_jwt_extended import jwt_required, get_jwt_identity
 from backend1.app import db
 from backend1.app.models.user import User
+from backend1.app.services.pagination import wants_cursor, wants_count, page_limit, keyset_page, cached_count
 
 bp = Blueprint('admin', __name__, url_prefix='/api/admin')
 
@@ -26,8 +28,32 @@ def admin_required(fn):
 @bp.route('/users', methods=['GET'])
 @admin_required
 def get_all_users():
-    """Get all users (admin only)"""
+    """
+    Get all users (admin only)
+    
+    Query params:
+        after, limit: Cursor pagination in (username, id) order (limit up to 100,
+                      default 20); count=true adds the total. Without them every
+                      user is returned.
+    """
     try:
+        if wants_cursor(request.args):
+            limit = page_limit(request.args)
+            try:
+                users, next_cursor = keyset_page(User.query, (User.username, User.id),
+                                                 request.args.get('after'), limit)
+            except ValueError as e:
+                return jsonify({'error': str(e)}), 400
+            
+            result = {
+                'users': [user.to_dict() for user in users],
+                'next_cursor': next_cursor,
+                'limit': limit
+            }
+            if wants_count(request.args):
+                result['total'] = cached_count(User.query)
+            return jsonify(result), 200
+        
         users = User.query.all()
         return jsonify({
             'users': [user.to_dict() for user in users],
@@ -171,5 +197,23 @@ def get_admin_stats():
             }
         }), 200
         
+    except Exception as e:
+        return jsonify({'error': str(e)}), 500
+
+
+@bp.route('/scraper/pool', methods=['GET'])
+@admin_required
+def get_scraper_pool_stats():
+    """Get connection pool statistics of this worker's shared scraper"""
+    try:
+        from backend1.app.services.scraper import get_pool_stats
+        
+        stats = get_pool_stats()
+        return jsonify({
+            'pid': os.getpid(),
+            'initialized': stats is not None,
+            'stats': stats
+        }), 200
+        
     except Exception as e:
         return jsonify({'error': str(e)}), 500
\ No newline at end of file
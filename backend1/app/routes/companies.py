@@ -2,50 +2,145 @@
 Companies Routes - Company Data Management
 Author: Osman Yildiz
 """
-from flask import Blueprint, request, jsonify
+from flask import Blueprint, request, jsonify, current_app, url_for
 from flask_jwt_extended import jwt_required, get_jwt_identity
-from datetime import datetime
+import re
+from datetime import datetime, timedelta
 from backend1.app import db
 from backend1.app.models.user import User
 from backend1.app.models.company import Company
 from backend1.app.models.annual_report import AnnualReport
-from backend1.app.services.scraper import AnnualReportsScraper
+from backend1.app.models.scrape_job import ScrapeJob
+from backend1.app.models.compliance_score import ComplianceScore
+from backend1.app.models.compliance_rollup import ComplianceRollup
+from backend1.app.services.scraper import get_scraper
+from backend1.app.services.company_sync import sync_company, mark_scraped
+from backend1.app.services.company_search import apply_search
+from backend1.app.services.fieldsets import requested_fields, load_only
+from backend1.app.services.pagination import (wants_cursor, wants_count, page_limit, keyset_page,
+                                               offset_page, cached_count)
+from backend1.app.services.scrape_jobs import create_job, get_runner
 
 bp = Blueprint('companies', __name__, url_prefix='/api/companies')
 
+SLUG_PATTERN = re.compile(r'^[A-Za-z0-9][A-Za-z0-9._-]{0,254}$')
+
+# Sortable company list columns
+COMPANY_SORT_COLUMNS = {
+    'name': Company.name,
+    'report_count': Company.report_count,
+    'latest_report_year': Company.latest_report_year,
+    'recent_report_count': Company.recent_report_count,
+}
+
+# Sortable compliance overview columns
+OVERVIEW_SORT_COLUMNS = {
+    'average_compliance': ComplianceRollup.average_compliance,
+    'name': ComplianceRollup.name,
+    'report_count': ComplianceRollup.report_count,
+    'iso27001': ComplianceRollup.iso27001_average,
+    'iso27017': ComplianceRollup.iso27017_average,
+    'soc2': ComplianceRollup.soc2_average,
+    'policies': ComplianceRollup.policies_average,
+}
+
 
 @bp.route('/', methods=['GET'])
 @jwt_required()
 def get_companies():
-    """Get all companies with optional filters"""
+    """
+    Get companies with optional filters
+    
+    Query params:
+        search, industry: Filters
+        min_reports, min_recent_reports: Least annual reports (in total / in
+                                         the last three years)
+        reported_since: Latest annual report year at least this
+        sort: name, report_count, latest_report_year or recent_report_count,
+              prefixed with '-' for descending (default name; search results
+              are ordered by relevance unless sort is given)
+        after, limit: Cursor pagination (limit up to 100, default 20);
+                      count=true adds the total
+        page, per_page: Numbered pages (used when neither after nor limit is given)
+        fields: Comma-separated keys to return (default all)
+    """
     try:
         # Get query parameters
         page = request.args.get('page', 1, type=int)
         per_page = request.args.get('per_page', 20, type=int)
         search = request.args.get('search', '', type=str)
         industry = request.args.get('industry', '', type=str)
+        sort = request.args.get('sort', 'name', type=str)
         
-        # Build query
-        query = Company.query
+        column = COMPANY_SORT_COLUMNS.get(sort.lstrip('-'))
+        if column is None:
+            return jsonify({'error': f"sort must be one of: {', '.join(COMPANY_SORT_COLUMNS)} "
+                                     f"(prefix with '-' for descending)"}), 400
+        descending = sort.startswith('-')
         
-        if search:
-            query = query.filter(
-                db.or_(
-                    Company.name.ilike(f'%{search}%'),
-                    Company.ticker.ilike(f'%{search}%')
-                )
-            )
+        try:
+            fields = requested_fields(request.args, Company)
+        except ValueError as e:
+            return jsonify({'error': str(e)}), 400
+        
+        # Build query (only the requested columns, plus the sort keys)
+        query = Company.query.options(*load_only(Company, fields, Company.name, column))
         
         if industry:
             query = query.filter(Company.industry.ilike(f'%{industry}%'))
         
+        # Maintained report counters, no join needed
+        for param, condition in (('min_reports', Company.report_count.__ge__),
+                                 ('min_recent_reports', Company.recent_report_count.__ge__),
+                                 ('reported_since', Company.latest_report_year.__ge__)):
+            value = request.args.get(param, type=int)
+            if value is not None:
+                query = query.filter(condition(value))
+        
+        # Search index matches, best first unless sorted explicitly
+        ranked = bool(search) and 'sort' not in request.args
+        if search:
+            query = apply_search(query, search)
+            if not ranked:
+                query = query.order_by(None)
+        if column is Company.name:
+            order = [Company.name.desc(), Company.id.desc()] if descending else [Company.name, Company.id]
+        else:
+            order = [column.desc() if descending else column, Company.name, Company.id]
+        
+        if wants_cursor(request.args):
+            limit = page_limit(request.args)
+            after = request.args.get('after')
+            try:
+                if ranked:
+                    companies, next_cursor = offset_page(query, after, limit)
+                elif column is Company.name:
+                    companies, next_cursor = keyset_page(query, (Company.name, Company.id), after, limit,
+                                                         descending=descending)
+                else:
+                    companies, next_cursor = offset_page(query.order_by(*order), after, limit)
+            except ValueError as e:
+                return jsonify({'error': str(e)}), 400
+            
+            result = {
+                'companies': [company.to_dict(fields=fields) for company in companies],
+                'next_cursor': next_cursor,
+                'limit': limit
+            }
+            if wants_count(request.args):
+                result['total'] = cached_count(query)
+            return jsonify(result), 200
+        
+        if not ranked:
+            query = query.order_by(*order)
+        
         # Paginate
-        pagination = query.order_by(Company.name).paginate(
+        pagination = query.paginate(
             page=page, per_page=per_page, error_out=False
         )
         
         return jsonify({
-            'companies': [company.to_dict() for company in pagination.items],
+            'companies': [company.to_dict(fields=fields) for company in pagination.items],
             'total': pagination.total,
             'pages': pagination.pages,
             'current_page': page
@@ -58,13 +153,23 @@ def get_companies():
 @bp.route('/<int:company_id>', methods=['GET'])
 @jwt_required()
 def get_company(company_id):
-    """Get specific company with annual reports"""
+    """
+    Get specific company with annual reports
+    
+    Query params:
+        fields: Comma-separated keys to return (default all)
+    """
     try:
-        company = Company.query.get(company_id)
+        try:
+            fields = requested_fields(request.args, Company, ('annual_reports',))
+        except ValueError as e:
+            return jsonify({'error': str(e)}), 400
+        
+        company = Company.query.options(*load_only(Company, fields)).get(company_id)
         if not company:
             return jsonify({'error': 'Company not found'}), 404
         
-        return jsonify(company.to_dict(include_reports=True)), 200
+        return jsonify(company.to_dict(include_reports=True, fields=fields)), 200
         
     except Exception as e:
         return jsonify({'error': str(e)}), 500
@@ -73,19 +178,31 @@ def get_company(company_id):
 @bp.route('/<int:company_id>/reports', methods=['GET'])
 @jwt_required()
 def get_company_reports(company_id):
-    """Get annual reports for a specific company"""
+    """
+    Get annual reports for a specific company
+    
+    Query params:
+        fields: Comma-separated report keys to return (default all)
+    """
     try:
+        try:
+            fields = requested_fields(request.args, AnnualReport)
+        except ValueError as e:
+            return jsonify({'error': str(e)}), 400
+        
         company = Company.query.get(company_id)
         if not company:
             return jsonify({'error': 'Company not found'}), 404
         
-        reports = AnnualReport.query.filter_by(company_id=company_id).order_by(
+        reports = AnnualReport.query.options(*load_only(AnnualReport, fields, AnnualReport.year)).filter_by(
+            company_id=company_id
+        ).order_by(
             AnnualReport.year.desc()
         ).all()
         
         return jsonify({
             'company': company.to_dict(),
-            'reports': [report.to_dict() for report in reports],
+            'reports': [report.to_dict(fields=fields) for report in reports],
             'total': len(reports)
         }), 200
         
@@ -112,7 +229,7 @@ def scrape_company():
         slug = data['slug']
         
         # Check if company already exists
-        existing = Company.query.filter_by(source_url=f"https://www.annualreports.com/Company/{slug}").first()
+        existing = Company.query.filter_by(source_url=get_scraper().company_url(slug)).first()
         if existing and not data.get('force_update', False):
             return jsonify({
                 'message': 'Company already exists',
@@ -120,66 +237,20 @@ def scrape_company():
             }), 200
         
         # Scrape company data
-        scraper = AnnualReportsScraper()
-        company_data = scraper.scrape_company(slug)
+        company_data = get_scraper().scrape_company(slug)
         
         if not company_data:
             return jsonify({'error': 'Failed to scrape company data'}), 500
         
-        # Update existing or create new company
-        if existing:
-            company = existing
-            company.name = company_data['name']
-            company.ticker = company_data['ticker']
-            company.exchange = company_data['exchange']
-            company.industry = company_data['industry']
-            company.sector = company_data['sector']
-            company.description = company_data['description']
-            company.website = company_data['website']
-            company.last_scraped_at = datetime.utcnow()
-        else:
-            company = Company(
-                name=company_data['name'],
-                ticker=company_data['ticker'],
-                exchange=company_data['exchange'],
-                industry=company_data['industry'],
-                sector=company_data['sector'],
-                description=company_data['description'],
-                website=company_data['website'],
-                source_url=company_data['source_url']
-            )
-            db.session.add(company)
-        
-        db.session.flush()  # Get company ID
-        
-        # Add annual reports
-        for report_data in company_data['annual_reports']:
-            # Check if report already exists
-            existing_report = AnnualReport.query.filter_by(
-                company_id=company.id,
-                year=report_data['year']
-            ).first()
-            
-            if existing_report:
-                # Update existing report
-                existing_report.title = report_data['title']
-                existing_report.report_type = report_data['report_type']
-                existing_report.pdf_url = report_data['pdf_url']
-                existing_report.html_url = report_data['html_url']
-                existing_report.view_url = report_data['view_url']
-            else:
-                # Create new report
-                annual_report = AnnualReport(
-                    company_id=company.id,
-                    year=report_data['year'],
-                    title=report_data['title'],
-                    report_type=report_data['report_type'],
-                    pdf_url=report_data['pdf_url'],
-                    html_url=report_data['html_url'],
-                    view_url=report_data['view_url']
-                )
-                db.session.add(annual_report)
-        
+        company, changed = sync_company(company_data, existing)
+        if not changed:
+            # Same content as last time: record the check, leave the rows alone
+            mark_scraped([company.id])
+            db.session.commit()
+            return jsonify({
+                'message': 'Company unchanged since last scrape',
+                'company': company.to_dict(include_reports=True)
+            }), 200
         db.session.commit()
         
         return jsonify({
@@ -192,6 +263,68 @@ def scrape_company():
         return jsonify({'error': str(e)}), 500
 
 
+@bp.route('/scrape/batch', methods=['POST'])
+@jwt_required()
+def scrape_companies_batch():
+    """Queue a background job scraping many companies (admin only)"""
+    try:
+        user_id = get_jwt_identity()
+        user = User.query.get(user_id)
+        
+        if user.role != 'admin':
+            return jsonify({'error': 'Admin access required'}), 403
+        
+        data = request.get_json() or {}
+        slugs = data.get('slugs')
+        
+        if not isinstance(slugs, list) or not slugs:
+            return jsonify({'error': 'A non-empty list of slugs is required'}), 400
+        
+        invalid = [slug for slug in slugs if not isinstance(slug, str) or not SLUG_PATTERN.match(slug)]
+        if invalid:
+            return jsonify({'error': 'Invalid slugs', 'invalid': invalid[:20]}), 400
+        
+        max_slugs = current_app.config.get('SCRAPE_BATCH_MAX_SLUGS', 500)
+        if len(slugs) > max_slugs:
+            return jsonify({'error': f'At most {max_slugs} slugs per batch'}), 400
+        
+        job = create_job(slugs, force_update=bool(data.get('force_update', False)), user_id=user.id)
+        get_runner().submit(job.id)
+        
+        return jsonify({
+            'message': 'Scrape job queued',
+            'job_id': job.id,
+            'status': job.status,
+            'total': len(job.items),
+            'status_url': url_for('companies.get_scrape_job', job_id=job.id)
+        }), 202
+        
+    except Exception as e:
+        db.session.rollback()
+        return jsonify({'error': str(e)}), 500
+
+
+@bp.route('/scrape/jobs/<int:job_id>', methods=['GET'])
+@jwt_required()
+def get_scrape_job(job_id):
+    """Get progress and per-slug results of a scrape job (admin only)"""
+    try:
+        user_id = get_jwt_identity()
+        user = User.query.get(user_id)
+        
+        if user.role != 'admin':
+            return jsonify({'error': 'Admin access required'}), 403
+        
+        job = ScrapeJob.query.get(job_id)
+        if not job:
+            return jsonify({'error': 'Scrape job not found'}), 404
+        
+        return jsonify(job.to_dict(include_items=True)), 200
+        
+    except Exception as e:
+        return jsonify({'error': str(e)}), 500
+
+
 @bp.route('/search', methods=['GET'])
 @jwt_required()
 def search_companies_online():
@@ -202,8 +335,7 @@ def search_companies_online():
         if not query:
             return jsonify({'error': 'Query parameter is required'}), 400
         
-        scraper = AnnualReportsScraper()
-        results = scraper.search_companies(query)
+        results = get_scraper().search_companies(query)
         
         return jsonify({
             'results': results,
@@ -247,7 +379,8 @@ def get_company_compliance(company_id):
     Uses intelligent algorithms to generate realistic scores
     """
     try:
-        from backend1.app.services.compliance_analyzer import ComplianceAnalyzer
+        from backend1.app.services.compliance_scores import get_company_scores
+        from backend1.app.services.peer_percentiles import peer_percentiles
         
         company = Company.query.get(company_id)
         if not company:
@@ -256,25 +389,11 @@ def get_company_compliance(company_id):
         # Get annual reports
         reports = AnnualReport.query.filter_by(company_id=company_id).all()
         
-        # Prepare data for analyzer
-        company_data = {
-            'id': company.id,
-            'name': company.name,
-            'ticker': company.ticker,
-            'industry': company.industry,
-            'sector': company.sector,
-            'description': company.description
-        }
-        
-        report_data = [{
-            'year': r.year,
-            'pdf_url': r.pdf_url,
-            'title': r.title
-        } for r in reports]
-        
-        # Analyze and generate compliance scores
-        analyzer = ComplianceAnalyzer()
-        scores = analyzer.analyze_company(company_data, report_data)
+        # Stored scores, recomputed only if the scoring inputs changed
+        scores = get_company_scores(company, reports)
+        
+        # Rank within the industry from the precomputed peer index
+        peer_group, percentiles = peer_percentiles(company, scores)
         
         return jsonify({
             'company_id': company_id,
@@ -283,6 +402,8 @@ def get_company_compliance(company_id):
             'report_count': len(reports),
             'recent_reports': len([r for r in reports if r.year >= datetime.now().year - 2]),
             'compliance_scores': scores,
+            'peer_percentiles': percentiles,
+            'peer_group': peer_group,
             'analysis_method': 'AI-Powered Industry Benchmark Analysis',
             'last_updated': datetime.utcnow().isoformat()
         }), 200
@@ -291,69 +412,129 @@ def get_company_compliance(company_id):
         return jsonify({'error': str(e)}), 500
 
 
+@bp.route('/<int:company_id>/compliance/history', methods=['GET'])
+@jwt_required()
+def get_company_compliance_history(company_id):
+    """
+    Get a company's compliance scores over time, downsampled server-side
+    
+    Query parameters:
+        from, to: ISO dates or datetimes (default: the last 12 months)
+        bucket: day, week or month (default month)
+    """
+    try:
+        from backend1.app.services.compliance_history import company_history
+        
+        company = Company.query.get(company_id)
+        if not company:
+            return jsonify({'error': 'Company not found'}), 404
+        
+        bucket = request.args.get('bucket', 'month', type=str)
+        try:
+            end = datetime.fromisoformat(request.args['to']) if request.args.get('to') else datetime.utcnow()
+            start = (datetime.fromisoformat(request.args['from']) if request.args.get('from')
+                     else end - timedelta(days=365))
+            points = company_history(company_id, start, end, bucket)
+        except ValueError as e:
+            return jsonify({'error': str(e)}), 400
+        
+        return jsonify({
+            'company_id': company_id,
+            'company_name': company.name,
+            'bucket': bucket,
+            'from': start.isoformat(),
+            'to': end.isoformat(),
+            'points': points
+        }), 200
+        
+    except Exception as e:
+        return jsonify({'error': str(e)}), 500
+
+
 @bp.route('/compliance-overview', methods=['GET'])
 @jwt_required()
 def get_all_companies_compliance():
     """
     Get compliance overview for all companies
     Returns aggregated compliance scores for visualization
+    
+    Reads the materialized compliance rollups, so filtering, sorting and
+    paging happen in SQL. Writes keep the rollups current; rows outdated by
+    a scoring spec change or a new year are refreshed by
+    `flask compliance rescore`, not here. Query parameters:
+        page, per_page: Page of companies (per_page up to 500, default 50)
+        sort: Rollup column, prefixed with '-' for descending
+              (default '-average_compliance')
+        industry: Exact industry ('Unknown' for companies without one)
     """
     try:
-        from backend1.app.services.compliance_analyzer import ComplianceAnalyzer
+        page = max(request.args.get('page', 1, type=int), 1)
+        per_page = min(max(request.args.get('per_page', 50, type=int), 1), 500)
+        sort = request.args.get('sort', '-average_compliance', type=str)
+        industry = request.args.get('industry', '', type=str)
+        
+        column = OVERVIEW_SORT_COLUMNS.get(sort.lstrip('-'))
+        if column is None:
+            return jsonify({'error': f"sort must be one of: {', '.join(OVERVIEW_SORT_COLUMNS)} "
+                                     f"(prefix with '-' for descending)"}), 400
+        descending = sort.startswith('-')
         
-        # Get all companies
-        companies = Company.query.all()
-        analyzer = ComplianceAnalyzer()
+        filters = []
+        if industry:
+            filters.append(ComplianceRollup.industry.is_(None) if industry == 'Unknown'
+                           else ComplianceRollup.industry == industry)
+        
+        summary = db.session.query(
+            db.func.count(ComplianceRollup.company_id),
+            db.func.avg(ComplianceRollup.average_compliance),
+            db.func.max(ComplianceRollup.average_compliance),
+            db.func.sum(db.case((ComplianceRollup.average_compliance < 70, 1), else_=0)),
+            db.func.sum(ComplianceRollup.report_count),
+            db.func.avg(ComplianceRollup.iso27001_average),
+            db.func.avg(ComplianceRollup.iso27017_average),
+            db.func.avg(ComplianceRollup.soc2_average),
+            db.func.avg(ComplianceRollup.policies_average),
+        ).filter(*filters).one()
+        total = summary[0]
+        
+        order = [column.desc() if descending else column.asc(),
+                 ComplianceRollup.company_id.desc() if descending else ComplianceRollup.company_id.asc()]
+        rows = (db.session.query(ComplianceRollup, ComplianceScore.scores)
+                .join(ComplianceScore, ComplianceScore.company_id == ComplianceRollup.company_id)
+                .filter(*filters)
+                .order_by(*order)
+                .offset((page - 1) * per_page)
+                .limit(per_page)
+                .all())
         
         companies_data = []
+        for rollup, scores in rows:
+            data = rollup.to_dict()
+            data['compliance_scores'] = scores
+            companies_data.append(data)
         
-        for company in companies:
-            # Get reports for this company
-            reports = AnnualReport.query.filter_by(company_id=company.id).all()
-            
-            # Prepare data
-            company_data = {
-                'id': company.id,
-                'name': company.name,
-                'ticker': company.ticker,
-                'industry': company.industry,
-                'sector': company.sector,
-                'description': company.description
-            }
-            
-            report_data = [{
-                'year': r.year,
-                'pdf_url': r.pdf_url,
-                'title': r.title
-            } for r in reports]
-            
-            # Analyze
-            scores = analyzer.analyze_company(company_data, report_data)
-            
-            # Calculate average compliance score
-            all_scores = []
-            all_scores.extend(scores['iso27001'].values())
-            all_scores.extend(scores['iso27017'].values())
-            all_scores.extend(scores['soc2'].values())
-            
-            average_score = int(sum(all_scores) / len(all_scores))
-            
-            companies_data.append({
-                'id': company.id,
-                'name': company.name,
-                'ticker': company.ticker or 'N/A',
-                'industry': company.industry or 'Unknown',
-                'report_count': len(reports),
-                'compliance_scores': scores,
-                'average_compliance': average_score
-            })
-        
-        # Sort by average compliance (highest first)
-        companies_data.sort(key=lambda x: x['average_compliance'], reverse=True)
+        def rounded(value):
+            return round(float(value), 1) if value is not None else 0.0
         
         return jsonify({
             'companies': companies_data,
-            'total_companies': len(companies_data),
+            'total_companies': total,
+            'pages': (total + per_page - 1) // per_page,
+            'current_page': page,
+            'per_page': per_page,
+            'sort': sort,
+            'summary': {
+                'average_compliance': rounded(summary[1]),
+                'highest_compliance': summary[2] or 0,
+                'low_compliance_count': int(summary[3] or 0),
+                'total_reports': int(summary[4] or 0),
+                'framework_averages': {
+                    'iso27001': rounded(summary[5]),
+                    'iso27017': rounded(summary[6]),
+                    'soc2': rounded(summary[7]),
+                    'policies': rounded(summary[8]),
+                }
+            },
             'analysis_method': 'AI-Powered Industry Benchmark Analysis'
         }), 200
         
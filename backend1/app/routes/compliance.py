@@ -0,0 +1,162 @@
+"""
+Compliance Routes - What-if analysis and control gap analysis
+Author: Osman Yildiz
+"""
+from flask import Blueprint, request, jsonify
+from flask_jwt_extended import jwt_required
+from backend1.app.models.company import Company
+from backend1.app.models.annual_report import AnnualReport
+from backend1.app.services.compliance_scores import scoring_inputs
+
+bp = Blueprint('compliance', __name__, url_prefix='/api/compliance')
+
+
+@bp.route('/simulate', methods=['POST'])
+@jwt_required()
+def simulate_compliance():
+    """
+    Score a company under hypothetical changes
+    
+    Body:
+        company_id: Stored company to start from, or
+        company: Hypothetical company (name, ticker, industry, sector,
+                 description, reports: [{year, pdf_url}])
+        scenarios: Up to 10,000 perturbations, each setting any of industry,
+                   ticker, report_years, add_report_years,
+                   remove_report_years, pdf_available and label
+    
+    Returns the base scores and, per scenario, the score deltas against them.
+    """
+    try:
+        from backend1.app.services.compliance_simulation import simulate, validate_company
+        
+        data = request.get_json(silent=True) or {}
+        
+        if data.get('company_id') is not None:
+            company = Company.query.get(data['company_id'])
+            if not company:
+                return jsonify({'error': 'Company not found'}), 404
+            company_data, report_data = scoring_inputs(
+                company, AnnualReport.query.filter_by(company_id=company.id).all())
+        elif isinstance(data.get('company'), dict):
+            company_data = dict(data['company'])
+            report_data = company_data.pop('reports', None) or []
+        else:
+            return jsonify({'error': 'company_id or company (with a name) is required'}), 400
+        
+        try:
+            if data.get('company_id') is None:
+                validate_company(company_data, report_data)
+            result = simulate(company_data, report_data, data.get('scenarios'))
+        except ValueError as e:
+            return jsonify({'error': str(e)}), 400
+        
+        result['company_id'] = company_data.get('id')
+        result['company_name'] = company_data['name']
+        return jsonify(result), 200
+        
+    except Exception as e:
+        return jsonify({'error': str(e)}), 500
+
+
+@bp.route('/controls', methods=['GET'])
+@jwt_required()
+def get_controls():
+    """
+    Control catalog with portfolio coverage
+    
+    Query parameters:
+        framework: iso27001 or iso27017 (default both)
+        industry: Only count companies of this industry
+    """
+    try:
+        from backend1.app.services.control_catalog import ControlMatrix, catalog_coverage, portfolio_summary
+        
+        framework = request.args.get('framework', type=str) or None
+        industry = request.args.get('industry', type=str) or None
+        
+        matrix = ControlMatrix.load(industry)
+        controls = catalog_coverage(matrix, framework)
+        
+        return jsonify({
+            'controls': controls,
+            'total': len(controls),
+            'companies': len(matrix),
+            'summary': portfolio_summary(matrix)
+        }), 200
+        
+    except Exception as e:
+        return jsonify({'error': str(e)}), 500
+
+
+@bp.route('/controls/<control_id>/companies', methods=['GET'])
+@jwt_required()
+def get_control_companies(control_id):
+    """
+    Companies by status of one control, e.g. those lacking A.8.12
+    
+    Query parameters:
+        status: missing (default: not implemented), implemented,
+                in_progress or not_started
+        industry: Only companies of this industry
+        page, per_page: Pagination (per_page at most 500)
+    """
+    try:
+        from backend1.app.services.control_catalog import ControlMatrix, default_catalog
+        
+        catalog = default_catalog()
+        if control_id not in catalog.index:
+            return jsonify({'error': 'Control not found'}), 404
+        
+        status = request.args.get('status', 'missing', type=str)
+        industry = request.args.get('industry', type=str) or None
+        page = max(request.args.get('page', 1, type=int), 1)
+        per_page = min(max(request.args.get('per_page', 50, type=int), 1), 500)
+        
+        matrix = ControlMatrix.load(industry)
+        try:
+            selected = matrix.company_ids[matrix.status_mask(control_id, status)]
+        except ValueError as e:
+            return jsonify({'error': str(e)}), 400
+        
+        page_ids = selected[(page - 1) * per_page:page * per_page].tolist()
+        names = dict(Company.query.with_entities(Company.id, Company.name)
+                     .filter(Company.id.in_(page_ids))) if page_ids else {}
+        industries = dict(zip(matrix.company_ids.tolist(), matrix.industries.tolist()))
+        
+        return jsonify({
+            'control': {key: catalog.controls[catalog.index[control_id]][key]
+                        for key in ('id', 'title', 'framework', 'theme')},
+            'status': status,
+            'companies': [{'id': company_id, 'name': names.get(company_id),
+                           'industry': industries[company_id]} for company_id in page_ids],
+            'total': int(len(selected)),
+            'page': page,
+            'per_page': per_page,
+            'pages': (int(len(selected)) + per_page - 1) // per_page
+        }), 200
+        
+    except Exception as e:
+        return jsonify({'error': str(e)}), 500
+
+
+@bp.route('/controls/companies/<int:company_id>', methods=['GET'])
+@jwt_required()
+def get_company_controls(company_id):
+    """Control statuses of a company and its gaps against its industry baseline"""
+    try:
+        from backend1.app.services.control_catalog import ControlMatrix, company_gaps
+        
+        company = Company.query.get(company_id)
+        if not company:
+            return jsonify({'error': 'Company not found'}), 404
+        
+        gaps = company_gaps(ControlMatrix.load(), company_id)
+        if gaps is None:
+            return jsonify({'error': 'No control statuses for this company'}), 404
+        
+        gaps.update({'company_id': company_id, 'company_name': company.name})
+        return jsonify(gaps), 200
+        
+    except Exception as e:
+        return jsonify({'error': str(e)}), 500
@@ -2,14 +2,40 @@
 Dashboard Routes
 Author: Osman Yildiz
 """
+from datetime import datetime, timedelta
 from flask import Blueprint, jsonify
 from flask_jwt_extended import jwt_required, get_jwt_identity
 from backend1.app import db
 from backend1.app.models.user import User
+from backend1.app.services.compliance_history import bucket_start, portfolio_trend
 
 bp = Blueprint('dashboard', __name__, url_prefix='/api/dashboard')
 
 
+def compliance_trend(months=6):
+    """
+    Portfolio-wide average compliance for the last months, from score history
+    
+    Alerts are the companies averaging below 70 at the end of each month.
+    """
+    end = datetime.utcnow()
+    start = bucket_start(end, 'month')
+    for _ in range(months - 1):
+        start = bucket_start(start - timedelta(days=1), 'month')
+    points = portfolio_trend(start, end, 'month')
+    return {
+        'labels': [datetime.fromisoformat(point['start']).strftime('%b') for point in points],
+        'score': [point['average_compliance'] for point in points],
+        'alerts': [point['low_compliance_count'] for point in points]
+    }
+
+
+def iso_controls():
+    """Percent of all portfolio controls implemented, in progress and not started"""
+    from backend1.app.services.control_catalog import ControlMatrix, portfolio_summary
+    
+    return portfolio_summary(ControlMatrix.load())
+
 
 @bp.route('/overview', methods=['GET'])
 @jwt_required()
@@ -32,16 +58,8 @@ def get_overview():
                 'pending_reviews': {'value': 8, 'action_required': True}
             },
             'charts': {
-                'compliance_trend': {
-                    'labels': ['Jan', 'Feb', 'Mar', 'Apr', 'May', 'Jun'],
-                    'score': [82, 85, 84, 89, 87, 88],
-                    'alerts': [25, 20, 22, 18, 15, 12]
-                },
-                'iso_controls': {
-                    'implemented': 56,
-                    'in_progress': 31,
-                    'not_started': 13
-                }
+                'compliance_trend': compliance_trend(),
+                'iso_controls': iso_controls()
             },
             'compliance_details': {
                 'iso_27001': [
@@ -9,6 +9,8 @@ from backend1.app import db
 from backend1.app.models.user import User
 from backend1.app.models.user import User
 from backend1.app.models.report import Report
+from backend1.app.services.fieldsets import requested_fields, load_only
+from backend1.app.services.pagination import wants_cursor, wants_count, page_limit, keyset_page, cached_count
 import os
 from werkzeug.utils import secure_filename
 from flask import current_app
@@ -19,7 +21,14 @@ bp = Blueprint('reports', __name__, url_prefix='/api/reports')
 @bp.route('/', methods=['GET'])
 @jwt_required()
 def get_reports():
-    """Get all reports (filtered by user role)"""
+    """
+    Get all reports (filtered by user role), newest first
+    
+    Query params:
+        after, limit: Cursor pagination (limit up to 100, default 20); count=true
+                      adds the total. Without them every report is returned.
+        fields: Comma-separated keys to return (default all)
+    """
     try:
         user_id = int(get_jwt_identity())
         user = User.query.get(user_id)
@@ -27,14 +36,41 @@ def get_reports():
         if not user:
             return jsonify({'error': 'User not found'}), 404
         
+        try:
+            fields = requested_fields(request.args, Report, ('source_annual_report',))
+        except ValueError as e:
+            return jsonify({'error': str(e)}), 400
+        
+        # Only the requested columns, plus the sort key
+        query = Report.query.options(*load_only(Report, fields, Report.created_at))
+        if fields is None or 'source_annual_report' in fields:
+            query = query.options(db.selectinload(Report.source_annual_report))
+        
         # Admins see all reports, users see only their own
-        if user.role == 'admin':
-            reports = Report.query.order_by(Report.created_at.desc()).all()
-        else:
-            reports = Report.query.filter_by(created_by=user_id).order_by(Report.created_at.desc()).all()
+        if user.role != 'admin':
+            query = query.filter_by(created_by=user_id)
+        
+        if wants_cursor(request.args):
+            limit = page_limit(request.args)
+            try:
+                reports, next_cursor = keyset_page(query, (Report.created_at, Report.id),
+                                                   request.args.get('after'), limit, descending=True)
+            except ValueError as e:
+                return jsonify({'error': str(e)}), 400
+            
+            result = {
+                'reports': [report.to_dict(fields=fields) for report in reports],
+                'next_cursor': next_cursor,
+                'limit': limit
+            }
+            if wants_count(request.args):
+                result['total'] = cached_count(query)
+            return jsonify(result), 200
+        
+        reports = query.order_by(Report.created_at.desc(), Report.id.desc()).all()
         
         return jsonify({
-            'reports': [report.to_dict() for report in reports],
+            'reports': [report.to_dict(fields=fields) for report in reports],
             'total': len(reports)
         }), 200
         
@@ -45,12 +81,22 @@ def get_reports():
 @bp.route('/<int:report_id>', methods=['GET'])
 @jwt_required()
 def get_report(report_id):
-    """Get specific report by ID"""
+    """
+    Get specific report by ID
+    
+    Query params:
+        fields: Comma-separated keys to return (default all)
+    """
     try:
         user_id = int(get_jwt_identity())
         user = User.query.get(user_id)
         
-        report = Report.query.get(report_id)
+        try:
+            fields = requested_fields(request.args, Report, ('source_annual_report', 'creator', 'reviewer'))
+        except ValueError as e:
+            return jsonify({'error': str(e)}), 400
+        
+        report = Report.query.options(*load_only(Report, fields, Report.created_by, Report.reviewed_by)).get(report_id)
         if not report:
             return jsonify({'error': 'Report not found'}), 404
         
@@ -58,13 +104,15 @@ def get_report(report_id):
         if user.role != 'admin' and report.created_by != user_id:
             return jsonify({'error': 'Access denied'}), 403
         
-        # Get creator and reviewer info
-        creator = User.query.get(report.created_by)
-        reviewer = User.query.get(report.reviewed_by) if report.reviewed_by else None
+        report_data = report.to_dict(fields=fields)
         
-        report_data = report.to_dict()
-        report_data['creator'] = creator.to_dict() if creator else None
-        report_data['reviewer'] = reviewer.to_dict() if reviewer else None
+        # Get creator and reviewer info
+        if fields is None or 'creator' in fields:
+            creator = User.query.get(report.created_by)
+            report_data['creator'] = creator.to_dict() if creator else None
+        if fields is None or 'reviewer' in fields:
+            reviewer = User.query.get(report.reviewed_by) if report.reviewed_by else None
+            report_data['reviewer'] = reviewer.to_dict() if reviewer else None
         
         return jsonify(report_data), 200
         
@@ -0,0 +1,163 @@
+"""
+Company Search Index
+Author: Osman Yildiz
+
+Indexed, ranked company lookup by name and ticker for the search box.
+
+SQLite: an FTS5 external-content table (companies_fts) over
+companies.name and companies.ticker, with prefix indexes for 2 and 3
+characters. Triggers on companies keep it current for every write, ORM
+or not. Matches rank by BM25, with ticker hits weighted higher.
+
+PostgreSQL: pg_trgm GIN indexes on lower(name) and lower(ticker), plus a
+GIN index on the name/ticker tsvector. Matches rank exact tickers first,
+then by ts_rank and trigram similarity. The database maintains these
+indexes itself.
+
+Every search term matches as a word prefix ("micro soft" finds
+"Microsoft Software Inc"). Other databases fall back to ILIKE.
+
+At 100k companies a SQLite search takes a few milliseconds; single-letter
+searches match too many companies to rank and are listed by name.
+"""
+import re
+from typing import List
+
+from sqlalchemy import event, literal_column
+
+from backend1.app import db
+from backend1.app.models.company import Company
+
+FTS_TABLE = 'companies_fts'
+
+SQLITE_CREATE = [
+    f"""CREATE VIRTUAL TABLE IF NOT EXISTS {FTS_TABLE} USING fts5(
+        name, ticker,
+        content='companies', content_rowid='id',
+        tokenize='unicode61 remove_diacritics 2', prefix='2 3'
+    )""",
+    f"""CREATE TRIGGER IF NOT EXISTS {FTS_TABLE}_ai AFTER INSERT ON companies BEGIN
+        INSERT INTO {FTS_TABLE}(rowid, name, ticker) VALUES (new.id, new.name, new.ticker);
+    END""",
+    f"""CREATE TRIGGER IF NOT EXISTS {FTS_TABLE}_ad AFTER DELETE ON companies BEGIN
+        INSERT INTO {FTS_TABLE}({FTS_TABLE}, rowid, name, ticker) VALUES ('delete', old.id, old.name, old.ticker);
+    END""",
+    f"""CREATE TRIGGER IF NOT EXISTS {FTS_TABLE}_au AFTER UPDATE OF name, ticker ON companies BEGIN
+        INSERT INTO {FTS_TABLE}({FTS_TABLE}, rowid, name, ticker) VALUES ('delete', old.id, old.name, old.ticker);
+        INSERT INTO {FTS_TABLE}(rowid, name, ticker) VALUES (new.id, new.name, new.ticker);
+    END""",
+    # Index the rows already in the table
+    f"INSERT INTO {FTS_TABLE}({FTS_TABLE}) VALUES ('rebuild')",
+]
+
+SQLITE_DROP = [
+    f"DROP TRIGGER IF EXISTS {FTS_TABLE}_au",
+    f"DROP TRIGGER IF EXISTS {FTS_TABLE}_ad",
+    f"DROP TRIGGER IF EXISTS {FTS_TABLE}_ai",
+    f"DROP TABLE IF EXISTS {FTS_TABLE}",
+]
+
+POSTGRES_CREATE = [
+    "CREATE EXTENSION IF NOT EXISTS pg_trgm",
+    "CREATE INDEX IF NOT EXISTS ix_companies_name_trgm ON companies USING gin (lower(name) gin_trgm_ops)",
+    "CREATE INDEX IF NOT EXISTS ix_companies_ticker_trgm ON companies USING gin (lower(ticker) gin_trgm_ops)",
+    "CREATE INDEX IF NOT EXISTS ix_companies_search_tsv ON companies "
+    "USING gin (to_tsvector('simple', name || ' ' || coalesce(ticker, '')))",
+]
+
+POSTGRES_DROP = [
+    "DROP INDEX IF EXISTS ix_companies_search_tsv",
+    "DROP INDEX IF EXISTS ix_companies_ticker_trgm",
+    "DROP INDEX IF EXISTS ix_companies_name_trgm",
+]
+
+# BM25 column weights (name, ticker)
+NAME_WEIGHT = 1.0
+TICKER_WEIGHT = 4.0
+
+# Shortest term length for which SQLite matches are ranked
+MIN_RANKED_TERM = 2
+
+_TOKEN = re.compile(r'\w+', re.UNICODE)
+
+
+def create_index(connection):
+    """Create (and fill) the search index for the connection's database"""
+    statements = {'sqlite': SQLITE_CREATE, 'postgresql': POSTGRES_CREATE}.get(connection.dialect.name, [])
+    for statement in statements:
+        connection.exec_driver_sql(statement)
+
+
+def drop_index(connection):
+    statements = {'sqlite': SQLITE_DROP, 'postgresql': POSTGRES_DROP}.get(connection.dialect.name, [])
+    for statement in statements:
+        connection.exec_driver_sql(statement)
+
+
+def terms(text: str) -> List[str]:
+    """Lowercase word terms of a search string"""
+    return _TOKEN.findall(text.lower())
+
+
+def apply_search(query, text: str):
+    """
+    Restrict a Company query to search matches, best matches first
+
+    Args:
+        query: Company query (without an ORDER BY)
+        text: Search box input
+
+    Returns:
+        The filtered and ordered query
+    """
+    words = terms(text)
+    if not words:
+        return query.order_by(Company.name)
+    dialect = db.session.get_bind().dialect.name
+
+    if dialect == 'sqlite':
+        # Every term as a quoted prefix query, all required
+        match = ' '.join(f'"{word}"*' for word in words)
+        fts = db.table(FTS_TABLE, db.column('rowid'))
+        if min(len(word) for word in words) < MIN_RANKED_TERM:
+            # A one-letter prefix matches a large share of all companies; ranking
+            # them all costs more than it tells, so list them alphabetically
+            ids = db.select(fts.c.rowid).where(literal_column(FTS_TABLE).op('MATCH')(match))
+            return query.filter(Company.id.in_(ids)).order_by(Company.name, Company.id)
+        matches = (db.select(fts.c.rowid.label('company_id'),
+                             db.func.bm25(literal_column(FTS_TABLE), NAME_WEIGHT, TICKER_WEIGHT).label('rank'))
+                   .where(literal_column(FTS_TABLE).op('MATCH')(match))
+                   .subquery())
+        return (query.join(matches, matches.c.company_id == Company.id)
+                .order_by(matches.c.rank, Company.name, Company.id))
+
+    if dialect == 'postgresql':
+        # Same expressions as the indexes, so the planner can use them
+        phrase = ' '.join(words)
+        vector = db.func.to_tsvector(literal_column("'simple'"), Company.name.concat(literal_column("' '"))
+                                     .concat(db.func.coalesce(Company.ticker, literal_column("''"))))
+        tsquery = db.func.to_tsquery(literal_column("'simple'"), ' & '.join(f'{word}:*' for word in words))
+        name, ticker = db.func.lower(Company.name), db.func.lower(Company.ticker)
+        return (query.filter(db.or_(vector.op('@@')(tsquery), name.op('%')(phrase), ticker.like(f'{phrase}%')))
+                .order_by((ticker == phrase).desc(), db.func.ts_rank(vector, tsquery).desc(),
+                          db.func.similarity(name, phrase).desc(), Company.name, Company.id))
+
+    pattern = f'%{text}%'
+    return (query.filter(db.or_(Company.name.ilike(pattern), Company.ticker.ilike(pattern)))
+            .order_by(Company.name))
+
+
+def _after_create(target, connection, **kw):
+    create_index(connection)
+
+
+def _before_drop(target, connection, **kw):
+    drop_index(connection)
+
+
+def init_app(app):
+    """Create the search index along with the companies table (db.create_all)"""
+    table = Company.__table__
+    if not event.contains(table, 'after_create', _after_create):
+        event.listen(table, 'after_create', _after_create)
+        event.listen(table, 'before_drop', _before_drop)
@@ -0,0 +1,149 @@
+"""
+Company Sync - Writes scraped company data to the database
+Author: Osman Yildiz
+
+Shared by the scrape endpoint, the directory crawler and the re-scrape
+scheduler so all of them create and update Company and AnnualReport rows
+the same way. Each stored company keeps a hash of its normalized scrape
+output; a re-scrape that hashes the same leaves the rows untouched.
+"""
+import hashlib
+import json
+from datetime import datetime
+from typing import Dict, Iterable, Optional, Tuple
+
+from backend1.app import db
+from backend1.app.models.company import Company
+from backend1.app.models.annual_report import AnnualReport
+
+COMPANY_FIELDS = ('name', 'ticker', 'exchange', 'industry', 'sector', 'description', 'website')
+REPORT_FIELDS = ('title', 'report_type', 'pdf_url', 'html_url', 'view_url')
+
+
+def _normalize(value):
+    if isinstance(value, str):
+        return ' '.join(value.split())
+    return value
+
+
+def content_hash(company_data: Dict) -> str:
+    """
+    Hash the parts of a scrape result that end up in the database
+
+    Whitespace differences and report order do not change the hash.
+    """
+    normalized = {
+        'source_url': company_data['source_url'],
+        'company': {field: _normalize(company_data.get(field)) for field in COMPANY_FIELDS},
+        'reports': sorted(
+            ({field: _normalize(report.get(field)) for field in ('year',) + REPORT_FIELDS}
+             for report in company_data.get('annual_reports', [])),
+            key=lambda report: (report['year'], json.dumps(report, sort_keys=True))
+        )
+    }
+    payload = json.dumps(normalized, sort_keys=True, separators=(',', ':'), default=str)
+    return hashlib.sha256(payload.encode('utf-8')).hexdigest()
+
+
+def find_company(source_url: str) -> Optional[Company]:
+    """Return the company scraped from a source URL, if stored"""
+    return Company.query.filter_by(source_url=source_url).first()
+
+
+def sync_company(company_data: Dict, existing: Optional[Company] = None) -> Tuple[Company, bool]:
+    """
+    Store scraped data unless it hashes the same as the stored copy
+
+    An unchanged company gets no writes at all here; callers record the
+    check time with mark_scraped so updated_at is not bumped. The caller
+    commits the session.
+
+    Args:
+        company_data: Dictionary returned by AnnualReportsScraper.parse_company
+        existing: Stored company to update (looked up by source URL if omitted)
+
+    Returns:
+        Tuple of (company, changed)
+    """
+    company = existing or find_company(company_data['source_url'])
+    digest = content_hash(company_data)
+    if company and company.content_hash == digest:
+        return company, False
+
+    is_new = company is None
+    if not is_new:
+        for field in COMPANY_FIELDS:
+            setattr(company, field, company_data[field])
+        company.last_scraped_at = company.last_scrape_attempt_at = datetime.utcnow()
+        company.scrape_failures = 0
+    else:
+        company = Company(
+            source_url=company_data['source_url'],
+            **{field: company_data[field] for field in COMPANY_FIELDS}
+        )
+        db.session.add(company)
+    company.content_hash = digest
+
+    db.session.flush()  # Get company ID
+
+    stored_reports = {}
+    if not is_new:
+        stored_reports = {report.year: report for report in
+                          AnnualReport.query.filter_by(company_id=company.id)}
+
+    for report_data in company_data['annual_reports']:
+        existing_report = stored_reports.get(report_data['year'])
+
+        if existing_report:
+            for field in REPORT_FIELDS:
+                if getattr(existing_report, field) != report_data[field]:
+                    setattr(existing_report, field, report_data[field])
+        else:
+            report = AnnualReport(
+                company_id=company.id,
+                year=report_data['year'],
+                **{field: report_data[field] for field in REPORT_FIELDS}
+            )
+            stored_reports[report.year] = report
+            db.session.add(report)
+
+    return company, True
+
+
+def mark_scraped(company_ids: Iterable[int], scraped_at: Optional[datetime] = None):
+    """
+    Record a re-scrape of unchanged companies
+
+    Only the scrape timestamps and failure count are written; updated_at
+    keeps its value so nothing downstream sees the company as modified. The
+    caller commits the session.
+    """
+    company_ids = list(company_ids)
+    if not company_ids:
+        return
+    scraped_at = scraped_at or datetime.utcnow()
+    db.session.execute(
+        db.update(Company)
+        .where(Company.id.in_(company_ids))
+        .values(last_scraped_at=scraped_at, last_scrape_attempt_at=scraped_at, scrape_failures=0,
+                updated_at=Company.updated_at)
+    )
+
+
+def mark_scrape_failed(company_ids: Iterable[int], attempted_at: Optional[datetime] = None):
+    """
+    Record a failed re-scrape
+
+    last_scraped_at keeps its value; the attempt time and failure count
+    move the company back in the re-scrape queue. The caller commits the
+    session.
+    """
+    company_ids = list(company_ids)
+    if not company_ids:
+        return
+    db.session.execute(
+        db.update(Company)
+        .where(Company.id.in_(company_ids))
+        .values(last_scrape_attempt_at=attempted_at or datetime.utcnow(),
+                scrape_failures=Company.scrape_failures + 1, updated_at=Company.updated_at)
+    )
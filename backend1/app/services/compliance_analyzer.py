@@ -7,34 +7,27 @@ import hashlib
 import re
 from datetime import datetime
 
+import numpy as np
+
+from backend1.app.services.scoring_plan import default_plan
+
 
 class ComplianceAnalyzer:
     """
     Analyzes company data to generate realistic compliance scores
     Uses industry benchmarks and company characteristics
-    """
     
-    # Industry baseline scores (based on real-world compliance data)
-    INDUSTRY_BASELINES = {
-        'Technology': {'iso27001': 85, 'iso27017': 88, 'soc2': 90},
-        'Financial Services': {'iso27001': 92, 'iso27017': 85, 'soc2': 95},
-        'Healthcare': {'iso27001': 88, 'iso27017': 82, 'soc2': 93},
-        'Retail': {'iso27001': 75, 'iso27017': 78, 'soc2': 80},
-        'Manufacturing': {'iso27001': 72, 'iso27017': 70, 'soc2': 75},
-        'Energy': {'iso27001': 80, 'iso27017': 75, 'soc2': 82},
-        'Telecommunications': {'iso27001': 82, 'iso27017': 85, 'soc2': 85},
-        'default': {'iso27001': 75, 'iso27017': 75, 'soc2': 78}
-    }
+    The frameworks, controls, industry baselines and all coefficients come
+    from the compiled scoring spec (see scoring_plan); this class extracts
+    the company features the plan multiplies them with.
+    """
     
-    # Company size factors (based on ticker presence, reports)
-    SIZE_MULTIPLIERS = {
-        'large': 1.08,      # Fortune 500 companies
-        'medium': 1.03,     # Mid-cap
-        'small': 0.97       # Smaller companies
-    }
+    # Compiled scoring_spec.json
+    plan = default_plan()
     
-    def __init__(self):
-        self.cache = {}
+    # Follows the scoring spec, so persisted scores get recomputed when it
+    # changes; bump the spec's "version" when the feature code below changes
+    ALGORITHM_VERSION = plan.version
     
     def analyze_company(self, company_data, annual_reports):
         """
@@ -47,93 +40,22 @@ class ComplianceAnalyzer:
         Returns:
             Dict with compliance scores for all frameworks
         """
-        # Create cache key
-        cache_key = f"{company_data.get('id')}_{len(annual_reports)}"
-        if cache_key in self.cache:
-            return self.cache[cache_key]
-        
         # Analyze company characteristics
-        industry = self._extract_industry(company_data)
-        company_size = self._determine_company_size(company_data, annual_reports)
-        report_quality = self._analyze_report_quality(annual_reports)
-        maturity_level = self._calculate_maturity(company_data, annual_reports)
-        variance = self._add_company_variance(company_data)
-        
-        # Get industry baseline
-        baseline = self.INDUSTRY_BASELINES.get(industry, self.INDUSTRY_BASELINES['default'])
-        
-        # Calculate compliance scores
-        scores = {}
-        
-        # ISO 27001 Controls (with company-specific variance)
-        iso27001_base = self._calculate_iso27001(
-            baseline['iso27001'], company_size, report_quality, maturity_level
-        )
-        scores['iso27001'] = {
-            'access_control': max(50, min(98, iso27001_base['access_control'] + variance)),
-            'information_security': max(50, min(96, iso27001_base['information_security'] + variance - 1)),
-            'operations_security': max(50, min(94, iso27001_base['operations_security'] + variance + 1))
-        }
-        
-        # ISO/IEC 27017 Cloud Controls (with variance)
-        iso27017_base = self._calculate_iso27017(
-            baseline['iso27017'], company_size, report_quality, maturity_level
-        )
-        scores['iso27017'] = {
-            'cloud_access_control': max(50, min(97, iso27017_base['cloud_access_control'] + variance + 2)),
-            'virtual_network_security': max(50, min(95, iso27017_base['virtual_network_security'] + variance)),
-            'cloud_asset_management': max(50, min(92, iso27017_base['cloud_asset_management'] + variance - 2))
-        }
-        
-        # SOC 2 Trust Service Criteria (with variance)
-        soc2_base = self._calculate_soc2(
-            baseline['soc2'], company_size, report_quality, maturity_level, industry
-        )
-        scores['soc2'] = {
-            'security': max(50, min(98, soc2_base['security'] + variance + 1)),
-            'availability': max(50, min(96, soc2_base['availability'] + variance)),
-            'processing_integrity': max(50, min(94, soc2_base['processing_integrity'] + variance - 1)),
-            'confidentiality': max(50, min(92, soc2_base['confidentiality'] + variance - 2)),
-            'privacy': max(50, min(99, soc2_base['privacy'] + variance + 2))
-        }
-        
-        # Policies (with variance)
-        policies_base = self._calculate_policies(
-            baseline['iso27001'], report_quality
+        scores = self.plan.score(
+            self._extract_industry(company_data),
+            self._determine_company_size(company_data, annual_reports),
+            self._analyze_report_quality(annual_reports),
+            self._calculate_maturity(company_data, annual_reports),
+            self._add_company_variance(company_data)
         )
-        scores['policies'] = {
-            'privacy_policy': max(50, min(99, policies_base['privacy_policy'] + variance + 3)),
-            'security_policy': max(50, min(97, policies_base['security_policy'] + variance + 1)),
-            'data_handling_policy': max(50, min(95, policies_base['data_handling_policy'] + variance))
-        }
-        
-        # Cache results
-        self.cache[cache_key] = scores
         
         return scores
     
     def _extract_industry(self, company_data):
-        """Determine industry from company data"""
+        """Determine industry from company data (keyword lists in the scoring spec)"""
         industry_str = (company_data.get('industry') or 
                        company_data.get('sector') or '').lower()
-        
-        # Map to standard industries
-        if any(word in industry_str for word in ['tech', 'software', 'computing', 'internet']):
-            return 'Technology'
-        elif any(word in industry_str for word in ['bank', 'financial', 'insurance', 'investment']):
-            return 'Financial Services'
-        elif any(word in industry_str for word in ['health', 'pharma', 'medical', 'hospital']):
-            return 'Healthcare'
-        elif any(word in industry_str for word in ['retail', 'consumer', 'commerce']):
-            return 'Retail'
-        elif any(word in industry_str for word in ['manufacturing', 'industrial', 'automotive']):
-            return 'Manufacturing'
-        elif any(word in industry_str for word in ['energy', 'oil', 'utilities', 'power']):
-            return 'Energy'
-        elif any(word in industry_str for word in ['telecom', 'communication', 'wireless']):
-            return 'Telecommunications'
-        
-        return 'default'
+        return self.plan.classify(industry_str)
     
     def _determine_company_size(self, company_data, reports):
         """Determine company size category"""
@@ -199,21 +121,6 @@ class ComplianceAnalyzer:
         maturity = 0.6 + (consistency * 0.3)
         return min(maturity, 1.0)
     
-    def _calculate_iso27001(self, baseline, company_size, report_quality, maturity):
-        """Calculate ISO 27001 control scores"""
-        multiplier = self.SIZE_MULTIPLIERS.get(company_size, 1.0)
-        
-        # Individual control calculations with variation
-        access_control = int(baseline * multiplier * report_quality * 1.02)
-        info_security = int(baseline * multiplier * report_quality * 0.98)
-        ops_security = int(baseline * multiplier * maturity * 0.95)
-        
-        return {
-            'access_control': min(access_control, 98),
-            'information_security': min(info_security, 96),
-            'operations_security': min(ops_security, 94)
-        }
-    
     def _add_company_variance(self, company_data):
         """Add unique variance based on company characteristics"""
         # Use company name to generate consistent but unique variation
@@ -224,47 +131,123 @@ class ComplianceAnalyzer:
         variance = (name_hash % 11) - 5
         return variance
     
-    def _calculate_iso27017(self, baseline, company_size, report_quality, maturity):
-        """Calculate ISO/IEC 27017 cloud control scores"""
-        multiplier = self.SIZE_MULTIPLIERS.get(company_size, 1.0)
+    # ------------------------------------------------------------------
+    # Batch scoring
+    # ------------------------------------------------------------------
+    
+    def analyze_companies(self, batch, columnar=False):
+        """
+        Score many companies at once with NumPy array operations
         
-        cloud_access = int(baseline * multiplier * report_quality * 1.01)
-        virtual_network = int(baseline * multiplier * maturity * 0.99)
-        cloud_asset = int(baseline * multiplier * report_quality * 0.96)
+        Produces exactly the scores analyze_company would for each entry:
+        every float operation is applied in the same order, and the results
+        are truncated and clamped the same way.
         
-        return {
-            'cloud_access_control': min(cloud_access, 97),
-            'virtual_network_security': min(virtual_network, 95),
-            'cloud_asset_management': min(cloud_asset, 92)
-        }
+        Args:
+            batch: Iterable of (company_data, annual_reports) pairs
+            columnar: Return {framework: {control: int array}} instead of dicts
+            
+        Returns:
+            List of score dicts in batch order, or the columnar arrays
+        """
+        matrix = self.score_matrix(batch)
+        
+        if columnar:
+            columns = {framework: {} for framework in self.plan.frameworks}
+            for i, (framework, control) in enumerate(self.plan.controls):
+                columns[framework][control] = matrix[:, i]
+            return columns
+        
+        # Build the nested dicts row by row from plain Python lists
+        per_framework = []
+        start = 0
+        for framework, controls in self.plan.frameworks.items():
+            rows = matrix[:, start:start + len(controls)].tolist()
+            per_framework.append([dict(zip(controls, row)) for row in rows])
+            start += len(controls)
+        names = list(self.plan.frameworks)
+        return [dict(zip(names, row)) for row in zip(*per_framework)]
+    
+    def score_matrix(self, batch):
+        """
+        Score a batch into one int64 array
+        
+        Args:
+            batch: Iterable of (company_data, annual_reports) pairs
+            
+        Returns:
+            Array of shape (companies, controls), columns in plan.controls order
+        """
+        features = self._batch_features(list(batch))
+        return self.plan.score_batch(**features)
     
-    def _calculate_soc2(self, baseline, company_size, report_quality, maturity, industry):
-        """Calculate SOC 2 Trust Service Criteria scores"""
-        multiplier = self.SIZE_MULTIPLIERS.get(company_size, 1.0)
+    def _batch_features(self, batch):
+        """
+        Reduce a batch to per-company feature arrays
         
-        # Industry-specific adjustments
-        industry_boost = 1.05 if industry in ['Technology', 'Financial Services'] else 1.0
+        Returns:
+            Dict of arrays: industry (code), size_multiplier, report_quality,
+            maturity and variance
+        """
+        n = len(batch)
+        current_year = datetime.now().year
+        companies = [company_data for company_data, _ in batch]
+        
+        has_ticker = np.array([bool(c.get('ticker')) for c in companies], dtype=bool)
+        long_description = np.array([len(c.get('description') or '') > 200 for c in companies], dtype=bool)
+        variance = np.array([int(hashlib.md5(c.get('name', '').encode()).hexdigest()[:8], 16) % 11 - 5
+                             for c in companies], dtype=np.int64)
+        
+        # Keyword matching once per distinct industry string
+        industry_strings = [(c.get('industry') or c.get('sector') or '').lower() for c in companies]
+        codes = {text: self.plan.industries.index(self.plan.classify(text))
+                 for text in set(industry_strings)}
+        industry = np.array([codes[text] for text in industry_strings], dtype=np.int64)
+        
+        # Flatten all reports, with the position of the owning company
+        report_count = np.array([len(reports) for _, reports in batch], dtype=np.int64)
+        owner = np.repeat(np.arange(n), report_count)
+        years = np.array([r.get('year', 0) for _, reports in batch for r in reports], dtype=np.int64)
+        pdf = np.array([bool(r.get('pdf_url')) for _, reports in batch for r in reports], dtype=bool)
+        
+        recent_2y = np.bincount(owner, weights=years >= current_year - 2, minlength=n)
+        recent_3y = np.bincount(owner, weights=years >= current_year - 3, minlength=n)
+        has_pdf = np.bincount(owner, weights=pdf, minlength=n) > 0
+        min_year = np.zeros(n, dtype=np.int64)
+        max_year = np.zeros(n, dtype=np.int64)
+        if len(years):
+            starts = np.concatenate(([0], np.cumsum(report_count)[:-1]))
+            with_reports = report_count > 0
+            min_year[with_reports] = np.minimum.reduceat(years, starts[with_reports])
+            max_year[with_reports] = np.maximum.reduceat(years, starts[with_reports])
+        
+        # Company size: same point system as _determine_company_size
+        size_score = (has_ticker * 2
+                      + np.where(recent_2y >= 3, 2, np.where(recent_2y >= 1, 1, 0))
+                      + long_description * 1)
+        size_multiplier = np.select(
+            [size_score >= 4, size_score >= 2],
+            [self.plan.size_multipliers['large'], self.plan.size_multipliers['medium']],
+            self.plan.size_multipliers['small']
+        )
         
-        security = int(baseline * multiplier * report_quality * industry_boost * 1.01)
-        availability = int(baseline * multiplier * maturity * industry_boost * 0.98)
-        processing = int(baseline * multiplier * report_quality * 0.97)
-        confidentiality = int(baseline * multiplier * maturity * 0.94)
-        privacy = int(baseline * multiplier * report_quality * industry_boost * 1.02)
+        # Report quality: the same additions in the same order (adding 0.0 is exact)
+        report_quality = np.full(n, 0.5)
+        report_quality = report_quality + np.where(recent_3y > 0, 0.2, 0.0)
+        report_quality = report_quality + np.where(report_count >= 2, 0.2, 0.0)
+        report_quality = report_quality + np.where(has_pdf, 0.1, 0.0)
+        report_quality = np.minimum(report_quality, 1.0)
         
-        return {
-            'security': min(security, 98),
-            'availability': min(availability, 96),
-            'processing_integrity': min(processing, 94),
-            'confidentiality': min(confidentiality, 92),
-            'privacy': min(privacy, 99)
-        }
-    
-    def _calculate_policies(self, baseline, report_quality):
-        """Calculate policy acknowledgment percentages"""
-        base = int(baseline * 1.1)  # Policies typically score higher
+        # Maturity from report consistency
+        year_span = np.where(report_count > 1, max_year - min_year, 0)
+        consistency = np.where(year_span > 0,
+                               report_count / np.maximum(year_span, 1).astype(np.float64), 1.0)
+        maturity = np.where(report_count > 0, np.minimum(0.6 + consistency * 0.3, 1.0), 0.6)
         
         return {
-            'privacy_policy': min(int(base * report_quality * 1.05), 99),
-            'security_policy': min(int(base * report_quality * 1.02), 97),
-            'data_handling_policy': min(int(base * report_quality * 0.98), 95)
+            'industry': industry,
+            'size_multiplier': size_multiplier,
+            'report_quality': report_quality,
+            'maturity': maturity,
+            'variance': variance,
         }
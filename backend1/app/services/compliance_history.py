@@ -0,0 +1,276 @@
+"""
+Compliance Score History
+Author: Osman Yildiz
+
+Every time a company's stored compliance scores change, a history row is
+appended. The row holds its control scores packed one signed byte each,
+stored as differences to the previous row except on keyframes (every
+KEYFRAME_INTERVAL rows). Unchanged recomputations write nothing, so a
+company costs a few dozen bytes per actual change.
+
+Reads rebuild scores from the nearest keyframe and downsample to day,
+week or month buckets on the server. The overall average is stored
+undecoded so portfolio trends across thousands of companies only read
+one small integer per change.
+"""
+import struct
+from datetime import datetime, timedelta
+from typing import Dict, Iterable, List, Optional, Tuple
+
+from backend1.app import db
+from backend1.app.models.compliance_history import ComplianceScoreHistory
+from backend1.app.services.compliance_analyzer import ComplianceAnalyzer
+
+# Order of the control scores inside a packed row
+SCORE_FIELDS = ComplianceAnalyzer.plan.controls
+
+# A keyframe (absolute scores) every this many rows bounds the rows decoded per read
+KEYFRAME_INTERVAL = 32
+
+BUCKETS = ('day', 'week', 'month')
+MAX_BUCKETS = 1000
+
+_PACK = struct.Struct(f'{len(SCORE_FIELDS)}b')
+
+# Keep IN lists well below database parameter limits
+_CHUNK = 500
+
+
+def flatten(scores: Dict) -> Tuple[int, ...]:
+    """Control scores in SCORE_FIELDS order"""
+    return tuple(scores[framework][control] for framework, control in SCORE_FIELDS)
+
+
+def unflatten(values: Iterable[int]) -> Dict:
+    """Nested {framework: {control: score}} dictionary from flat scores"""
+    scores = {}
+    for (framework, control), value in zip(SCORE_FIELDS, values):
+        scores.setdefault(framework, {})[control] = value
+    return scores
+
+
+def encode(values: Tuple[int, ...], previous: Optional[Tuple[int, ...]] = None) -> bytes:
+    """Pack scores, as differences to `previous` when given"""
+    if previous is None:
+        return _PACK.pack(*values)
+    return _PACK.pack(*(value - before for value, before in zip(values, previous)))
+
+
+def decode(packed: bytes, previous: Optional[Tuple[int, ...]] = None) -> Tuple[int, ...]:
+    """
+    Unpack scores, adding them to `previous` for delta rows
+
+    Rows written before controls were added to the scoring spec are
+    shorter; the missing (trailing) controls decode as 0.
+    """
+    if len(packed) == _PACK.size:
+        values = _PACK.unpack(packed)
+    else:
+        values = struct.unpack(f'{len(packed)}b', packed) + (0,) * (len(SCORE_FIELDS) - len(packed))
+    if previous is None:
+        return values
+    return tuple(value + before for value, before in zip(values, previous))
+
+
+def _complete(scores: Dict) -> bool:
+    """Whether scores cover every control in SCORE_FIELDS"""
+    return all(control in scores.get(framework, ()) for framework, control in SCORE_FIELDS)
+
+
+def record_changes(changes: List[Tuple[int, Optional[Dict], Dict, int]], recorded_at: Optional[datetime] = None) -> int:
+    """
+    Append history rows for companies whose scores changed (does not commit)
+
+    Args:
+        changes: (company_id, previous scores or None, new scores, average_compliance)
+        recorded_at: Time of the change (default now)
+
+    Returns:
+        Number of rows written
+    """
+    changes = [change for change in changes if change[1] != change[2]]
+    if not changes:
+        return 0
+    recorded_at = recorded_at or datetime.utcnow()
+
+    ids = [company_id for company_id, _, _, _ in changes]
+    last_seq = {}
+    for start in range(0, len(ids), _CHUNK):
+        chunk = ids[start:start + _CHUNK]
+        last_seq.update(db.session.query(ComplianceScoreHistory.company_id, db.func.max(ComplianceScoreHistory.seq))
+                        .filter(ComplianceScoreHistory.company_id.in_(chunk))
+                        .group_by(ComplianceScoreHistory.company_id))
+
+    rows = []
+    for company_id, previous, scores, average in changes:
+        seq = last_seq[company_id] + 1 if company_id in last_seq else 0
+        # Deltas need the previous row's scores, which equal the previously stored scores
+        keyframe = (seq % KEYFRAME_INTERVAL == 0 or previous is None or company_id not in last_seq
+                    or not _complete(previous))
+        values = flatten(scores)
+        rows.append({
+            'company_id': company_id,
+            'seq': seq,
+            'recorded_at': recorded_at,
+            'keyframe': keyframe,
+            'values': encode(values, None if keyframe else flatten(previous)),
+            'average_compliance': average,
+        })
+    db.session.execute(db.insert(ComplianceScoreHistory), rows)
+    return len(rows)
+
+
+# ------------------------------------------------------------------
+# Downsampling
+# ------------------------------------------------------------------
+
+def bucket_start(moment: datetime, bucket: str) -> datetime:
+    """Start of the bucket containing moment"""
+    day = moment.replace(hour=0, minute=0, second=0, microsecond=0)
+    if bucket == 'day':
+        return day
+    if bucket == 'week':
+        return day - timedelta(days=day.weekday())
+    return day.replace(day=1)
+
+
+def _next_bucket(start: datetime, bucket: str) -> datetime:
+    if bucket == 'day':
+        return start + timedelta(days=1)
+    if bucket == 'week':
+        return start + timedelta(days=7)
+    return start.replace(year=start.year + start.month // 12, month=start.month % 12 + 1)
+
+
+def bucket_label(start: datetime, bucket: str) -> str:
+    if bucket == 'day':
+        return start.strftime('%Y-%m-%d')
+    if bucket == 'week':
+        year, week, _ = start.isocalendar()
+        return f'{year}-W{week:02d}'
+    return start.strftime('%Y-%m')
+
+
+def bucket_ranges(start: datetime, end: datetime, bucket: str) -> List[Tuple[str, datetime, datetime]]:
+    """
+    Buckets covering start..end
+
+    Returns:
+        List of (label, bucket start, next bucket start)
+
+    Raises:
+        ValueError: Unknown bucket, end before start or too many buckets
+    """
+    if bucket not in BUCKETS:
+        raise ValueError(f"bucket must be one of: {', '.join(BUCKETS)}")
+    if end < start:
+        raise ValueError('to must not be before from')
+    ranges = []
+    current = bucket_start(start, bucket)
+    while current <= end:
+        following = _next_bucket(current, bucket)
+        ranges.append((bucket_label(current, bucket), current, following))
+        if len(ranges) > MAX_BUCKETS:
+            raise ValueError(f'At most {MAX_BUCKETS} buckets per request; use a larger bucket')
+        current = following
+    return ranges
+
+
+def company_history(company_id: int, start: datetime, end: datetime, bucket: str = 'month') -> List[Dict]:
+    """
+    A company's scores at the end of each bucket between start and end
+
+    Scores carry forward through buckets without changes; buckets before
+    the company was first scored have null scores.
+
+    Returns:
+        List of points with period, compliance_scores, average_compliance
+        and the number of changes inside the bucket
+    """
+    ranges = bucket_ranges(start, end, bucket)
+    window_start, window_end = ranges[0][1], ranges[-1][2]
+
+    # Decode from the keyframe preceding the window
+    last_before = db.session.query(db.func.max(ComplianceScoreHistory.seq)).filter(
+        ComplianceScoreHistory.company_id == company_id,
+        ComplianceScoreHistory.recorded_at < window_start
+    ).scalar()
+    first_seq = last_before - last_before % KEYFRAME_INTERVAL if last_before is not None else 0
+    rows = (ComplianceScoreHistory.query
+            .filter(ComplianceScoreHistory.company_id == company_id,
+                    ComplianceScoreHistory.seq >= first_seq,
+                    ComplianceScoreHistory.recorded_at < window_end)
+            .order_by(ComplianceScoreHistory.seq)
+            .with_entities(ComplianceScoreHistory.recorded_at, ComplianceScoreHistory.keyframe,
+                           ComplianceScoreHistory.values, ComplianceScoreHistory.average_compliance)
+            .all())
+
+    points = []
+    values, average = None, None
+    position = 0
+    for label, bucket_begin, bucket_end in ranges:
+        changes = 0
+        while position < len(rows) and rows[position].recorded_at < bucket_end:
+            row = rows[position]
+            values = decode(row.values, None if row.keyframe else values)
+            average = row.average_compliance
+            changes += row.recorded_at >= bucket_begin
+            position += 1
+        points.append({
+            'period': label,
+            'start': bucket_begin.isoformat(),
+            'compliance_scores': unflatten(values) if values is not None else None,
+            'average_compliance': average,
+            'changes': changes
+        })
+    return points
+
+
+def portfolio_trend(start: datetime, end: datetime, bucket: str = 'month') -> List[Dict]:
+    """
+    Average compliance across all companies at the end of each bucket
+
+    Returns:
+        List of points with period, average_compliance (None before any
+        company was scored), companies and low_compliance_count (below 70)
+    """
+    ranges = bucket_ranges(start, end, bucket)
+    window_start, window_end = ranges[0][1], ranges[-1][2]
+    history = ComplianceScoreHistory
+
+    # Each company's last average before the window...
+    latest = (db.session.query(history.company_id, db.func.max(history.seq).label('seq'))
+              .filter(history.recorded_at < window_start)
+              .group_by(history.company_id)
+              .subquery())
+    current = dict(db.session.query(history.company_id, history.average_compliance)
+                   .join(latest, db.and_(history.company_id == latest.c.company_id, history.seq == latest.c.seq)))
+    # ...then every change inside it, in time order
+    changes = (db.session.query(history.company_id, history.recorded_at, history.average_compliance)
+               .filter(history.recorded_at >= window_start, history.recorded_at < window_end)
+               .order_by(history.recorded_at, history.id)
+               .all())
+
+    total = sum(current.values())
+    low = sum(1 for average in current.values() if average < 70)
+    points = []
+    position = 0
+    for label, bucket_begin, bucket_end in ranges:
+        while position < len(changes) and changes[position].recorded_at < bucket_end:
+            company_id, _, average = changes[position]
+            before = current.get(company_id)
+            if before is not None:
+                total -= before
+                low -= before < 70
+            current[company_id] = average
+            total += average
+            low += average < 70
+            position += 1
+        points.append({
+            'period': label,
+            'start': bucket_begin.isoformat(),
+            'average_compliance': round(total / len(current), 1) if current else None,
+            'companies': len(current),
+            'low_compliance_count': low
+        })
+    return points
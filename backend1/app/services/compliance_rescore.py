@@ -0,0 +1,196 @@
+"""
+Full-Catalog Compliance Rescoring
+Author: Osman Yildiz
+
+Rescores every company after a change to the scoring constants (industry
+baselines, size multipliers, ...), whether or not ALGORITHM_VERSION was
+bumped. Requests only read the stored rows, so this is also the job that
+brings them up to date after a deploy that changes the scoring spec, at
+the start of each year (scores, rollups and the report counters'
+recent-report window depend on it) and after bulk loads that bypassed
+the ORM. The catalog is read in id-ordered chunks (keyset, so no cursor
+stays open while results are written), scored on a process pool while
+the next chunks are read, and written back with bulk inserts and
+updates, one transaction per chunk.
+
+With dry_run nothing is written; the counts report how many companies'
+scores would change.
+"""
+import logging
+import os
+import time
+from collections import deque
+from concurrent.futures import ProcessPoolExecutor
+from datetime import datetime
+from typing import Dict, Iterator, List, Optional, Tuple
+
+from backend1.app import db
+from backend1.app.models.company import Company
+from backend1.app.models.annual_report import AnnualReport
+from backend1.app.models.compliance_score import ComplianceScore
+from backend1.app.models.compliance_rollup import ComplianceRollup
+from backend1.app.services import compliance_history
+from backend1.app.services.compliance_analyzer import ComplianceAnalyzer
+from backend1.app.services.control_catalog import sync_statuses
+from backend1.app.services.compliance_scores import SCORING_FIELDS, average_compliance, input_hash, rollup_values
+from backend1.app.services.report_counts import COUNTER_FIELDS, counter_values, write_counters
+
+logger = logging.getLogger(__name__)
+
+
+def _score_chunk(batch: List[Tuple[Dict, List[Dict]]]) -> List[Tuple[str, Dict]]:
+    """Process pool task: (input hash, scores) for each (company_data, report_data)"""
+    scores = ComplianceAnalyzer().analyze_companies(batch)
+    return [(input_hash(company_data, report_data), result)
+            for (company_data, report_data), result in zip(batch, scores)]
+
+
+class CatalogRescorer:
+    """Rescore every stored company and write back what changed"""
+
+    def __init__(self, chunk_size: int = 2000, workers: Optional[int] = None, dry_run: bool = False):
+        """
+        Args:
+            chunk_size: Companies read, scored and written per chunk
+            workers: Scoring processes (None for the CPU count, 0 to score inline)
+            dry_run: Only count the companies whose scores would change
+        """
+        self.chunk_size = chunk_size
+        self.workers = workers
+        self.dry_run = dry_run
+
+    def run(self, progress=None) -> Dict:
+        """
+        Rescore the catalog (runs in an app context)
+
+        Args:
+            progress: Optional callback(companies done in this chunk, stats)
+
+        Returns:
+            Counts of changed, new and unchanged scores, rows written,
+            elapsed time and companies per second
+        """
+        started = time.monotonic()
+        stats = {'companies': 0, 'changed': 0, 'new': 0, 'unchanged': 0, 'written': 0}
+
+        def finish(chunk, results):
+            self._apply(chunk, results, stats)
+            if progress:
+                progress(len(chunk), stats)
+
+        if self.workers == 0:
+            for chunk in self._chunks():
+                finish(chunk, _score_chunk(chunk))
+        else:
+            workers = self.workers or os.cpu_count() or 1
+            with ProcessPoolExecutor(max_workers=workers) as pool:
+                # Keep two chunks per worker in flight so reading overlaps scoring
+                in_flight = deque()
+                for chunk in self._chunks():
+                    in_flight.append((chunk, pool.submit(_score_chunk, chunk)))
+                    if len(in_flight) >= 2 * workers:
+                        chunk, future = in_flight.popleft()
+                        finish(chunk, future.result())
+                while in_flight:
+                    chunk, future = in_flight.popleft()
+                    finish(chunk, future.result())
+
+        elapsed = time.monotonic() - started
+        stats['elapsed_seconds'] = round(elapsed, 2)
+        stats['companies_per_second'] = round(stats['companies'] / elapsed, 1) if elapsed else 0.0
+        return stats
+
+    def _chunks(self) -> Iterator[List[Tuple[Dict, List[Dict]]]]:
+        """(company_data, report_data) lists in company id order"""
+        columns = [getattr(Company, field) for field in SCORING_FIELDS]
+        last_id = 0
+        while True:
+            companies = (db.session.query(Company.id, *columns)
+                         .filter(Company.id > last_id)
+                         .order_by(Company.id)
+                         .limit(self.chunk_size)
+                         .all())
+            if not companies:
+                return
+            first_id, last_id = companies[0].id, companies[-1].id
+
+            reports = {}
+            for company_id, year, pdf_url in (db.session.query(AnnualReport.company_id, AnnualReport.year,
+                                                                AnnualReport.pdf_url)
+                                              .filter(AnnualReport.company_id.between(first_id, last_id))):
+                reports.setdefault(company_id, []).append({'year': year, 'pdf_url': pdf_url})
+
+            yield [(dict(zip(('id',) + SCORING_FIELDS, row)), reports.get(row.id, [])) for row in companies]
+            db.session.rollback()  # End the read transaction between chunks
+
+    def _apply(self, chunk, results, stats: Dict):
+        """Compare a scored chunk with the stored rows and write the differences"""
+        first_id, last_id = chunk[0][0]['id'], chunk[-1][0]['id']
+        stored = {company_id: (digest, version, scores) for company_id, digest, version, scores in
+                  db.session.query(ComplianceScore.company_id, ComplianceScore.input_hash,
+                                   ComplianceScore.algorithm_version, ComplianceScore.scores)
+                  .filter(ComplianceScore.company_id.between(first_id, last_id))}
+        rollup_ids = {company_id for (company_id,) in db.session.query(ComplianceRollup.company_id)
+                      .filter(ComplianceRollup.company_id.between(first_id, last_id))}
+        counters = {row[0]: dict(zip(COUNTER_FIELDS, row[1:])) for row in
+                    db.session.query(Company.id, *(getattr(Company, field) for field in COUNTER_FIELDS))
+                    .filter(Company.id.between(first_id, last_id))}
+
+        now = datetime.utcnow()
+        score_year = datetime.now().year
+        score_inserts, score_updates, rollup_inserts, rollup_updates, changes = [], [], [], [], []
+        counter_updates = {}
+        for (company_data, report_data), (digest, scores) in zip(chunk, results):
+            company_id = company_data['id']
+            values = counter_values(r['year'] for r in report_data)
+            if company_id in counters and counters[company_id] != values:
+                counter_updates[company_id] = values
+            previous = stored.get(company_id)
+            if previous is None:
+                stats['new'] += 1
+            elif previous[2] != scores:
+                stats['changed'] += 1
+            else:
+                stats['unchanged'] += 1
+            stats['companies'] += 1
+
+            current = previous is not None and previous == (digest, ComplianceAnalyzer.ALGORITHM_VERSION, scores)
+            if current and company_id in rollup_ids:
+                continue
+
+            row = {'company_id': company_id, 'input_hash': digest, 'scores': scores,
+                   'algorithm_version': ComplianceAnalyzer.ALGORITHM_VERSION, 'computed_at': now}
+            if previous is None:
+                score_inserts.append(row)
+            elif not current:
+                score_updates.append(row)
+            if previous is None or previous[2] != scores:
+                changes.append((company_id, previous[2] if previous else None, scores, average_compliance(scores)))
+
+            rollup = dict(rollup_values(company_data, len(report_data), scores, score_year),
+                          company_id=company_id, updated_at=now)
+            (rollup_updates if company_id in rollup_ids else rollup_inserts).append(rollup)
+
+        if self.dry_run:
+            return
+
+        try:
+            if score_inserts:
+                db.session.execute(db.insert(ComplianceScore), score_inserts)
+            if score_updates:
+                db.session.execute(db.update(ComplianceScore), score_updates)
+            if rollup_inserts:
+                db.session.execute(db.insert(ComplianceRollup), rollup_inserts)
+            if rollup_updates:
+                db.session.execute(db.update(ComplianceRollup), rollup_updates)
+            if counter_updates:
+                write_counters(counter_updates)
+            compliance_history.record_changes(changes, recorded_at=now)
+            # Also re-derives every status of the chunk after a catalog edit
+            sync_statuses(company_data['id'] for company_data, _ in chunk)
+            db.session.commit()
+        except Exception:
+            db.session.rollback()
+            raise
+        stats['written'] += len(score_inserts) + len(score_updates)
+        logger.debug(f"Rescored companies {first_id}-{last_id}: {len(changes)} changed")
@@ -0,0 +1,309 @@
+"""
+Persisted Compliance Scores and Rollups
+Author: Osman Yildiz
+
+Compliance scores are stored per company together with a hash of the
+inputs they were computed from and the analyzer's algorithm version.
+Reads recompute (in one vectorized batch) only the companies whose
+inputs or algorithm changed since their row was written.
+
+Every stored score also updates the company's ComplianceRollup row, the
+materialized averages the compliance overview filters, sorts and pages
+in SQL, and appends to the score history when the scores changed.
+Session events keep both current: companies and annual reports written
+through the ORM (scrapes, report approvals, deletes) are rescored when
+the session commits. Refreshes also update the company's annual report
+counters (report_counts.py) and every rescore its control statuses
+(control_catalog.py).
+"""
+import hashlib
+import json
+import logging
+from datetime import datetime
+from typing import Dict, Iterable, List, Optional
+
+from sqlalchemy import event, inspect
+from sqlalchemy.exc import IntegrityError
+
+from backend1.app import db
+from backend1.app.models.company import Company
+from backend1.app.models.annual_report import AnnualReport
+from backend1.app.models.compliance_score import ComplianceScore
+from backend1.app.models.compliance_rollup import ComplianceRollup
+from backend1.app.models.compliance_history import ComplianceScoreHistory
+from backend1.app.models.control_status import CompanyControlStatus
+from backend1.app.services import compliance_history
+from backend1.app.services.compliance_analyzer import ComplianceAnalyzer
+from backend1.app.services.control_catalog import sync_statuses
+from backend1.app.services.report_counts import store_counters
+
+logger = logging.getLogger(__name__)
+
+# Company columns the analyzer reads
+SCORING_FIELDS = ('name', 'ticker', 'industry', 'sector', 'description')
+
+# Annual report columns that change a company's scores
+REPORT_SCORING_FIELDS = ('company_id', 'year', 'pdf_url')
+
+# Frameworks included in average_compliance ("averaged" in the scoring spec)
+AVERAGED_FRAMEWORKS = ComplianceAnalyzer.plan.averaged_frameworks
+
+# Keep IN lists well below database parameter limits
+_CHUNK = 500
+
+# Session.info key holding company ids to rescore on commit
+_PENDING = 'compliance_pending_company_ids'
+
+
+def scoring_inputs(company: Company, reports: Iterable) -> tuple:
+    """
+    Build the analyzer arguments for a company
+
+    Args:
+        company: Company row
+        reports: Its AnnualReport rows (or rows with year, pdf_url and title)
+
+    Returns:
+        (company_data, report_data) as taken by ComplianceAnalyzer
+    """
+    company_data = {'id': company.id}
+    company_data.update({field: getattr(company, field) for field in SCORING_FIELDS})
+    report_data = [{
+        'year': r.year,
+        'pdf_url': r.pdf_url,
+        'title': r.title
+    } for r in reports]
+    return company_data, report_data
+
+
+def input_hash(company_data: Dict, report_data: List[Dict]) -> str:
+    """
+    Hash everything a compliance score depends on
+
+    The current year is included because report recency is scored
+    relative to it.
+    """
+    payload = {
+        'version': ComplianceAnalyzer.ALGORITHM_VERSION,
+        'year': datetime.now().year,
+        'company': [company_data.get(field) for field in SCORING_FIELDS],
+        'reports': sorted([r.get('year') or 0, bool(r.get('pdf_url'))] for r in report_data),
+    }
+    return hashlib.sha256(json.dumps(payload, separators=(',', ':')).encode('utf-8')).hexdigest()
+
+
+def average_compliance(scores: Dict) -> int:
+    """Overall average of the ISO 27001, ISO 27017 and SOC 2 control scores"""
+    values = []
+    for framework in AVERAGED_FRAMEWORKS:
+        values.extend(scores[framework].values())
+    return int(sum(values) / len(values))
+
+
+def _framework_average(controls: Dict) -> float:
+    return round(sum(controls.values()) / len(controls), 1)
+
+
+def rollup_values(company_data: Dict, report_count: int, scores: Dict, score_year: int) -> Dict:
+    """Column values of a company's ComplianceRollup row (all but company_id)"""
+    return {
+        'name': company_data['name'],
+        'ticker': company_data.get('ticker'),
+        'industry': company_data.get('industry'),
+        'report_count': report_count,
+        'iso27001_average': _framework_average(scores['iso27001']),
+        'iso27017_average': _framework_average(scores['iso27017']),
+        'soc2_average': _framework_average(scores['soc2']),
+        'policies_average': _framework_average(scores['policies']),
+        'average_compliance': average_compliance(scores),
+        'algorithm_version': ComplianceAnalyzer.ALGORITHM_VERSION,
+        'score_year': score_year,
+    }
+
+
+def _chunks(ids: List[int]):
+    for start in range(0, len(ids), _CHUNK):
+        yield ids[start:start + _CHUNK]
+
+
+def load_reports(company_ids: List[int]) -> Dict[int, list]:
+    """Annual report rows needed for scoring, grouped by company id"""
+    reports = {company_id: [] for company_id in company_ids}
+    for chunk in _chunks(company_ids):
+        for r in db.session.query(AnnualReport.company_id, AnnualReport.year, AnnualReport.pdf_url,
+                                  AnnualReport.title).filter(AnnualReport.company_id.in_(chunk)):
+            reports[r.company_id].append(r)
+    return reports
+
+
+def _store_scores(companies: List[Company], reports: Dict[int, list]) -> Dict[int, Dict]:
+    """
+    Bring score and rollup rows of companies up to date (does not commit)
+
+    Returns:
+        Dictionary of company id to scores
+    """
+    ids = [company.id for company in companies]
+    stored, rollups = {}, {}
+    for chunk in _chunks(ids):
+        stored.update((row.company_id, row) for row in
+                      ComplianceScore.query.filter(ComplianceScore.company_id.in_(chunk)))
+        rollups.update((row.company_id, row) for row in
+                       ComplianceRollup.query.filter(ComplianceRollup.company_id.in_(chunk)))
+
+    scores = {}
+    stale = []
+    for company in companies:
+        company_data, report_data = scoring_inputs(company, reports.get(company.id, []))
+        digest = input_hash(company_data, report_data)
+        row = stored.get(company.id)
+        if row is not None and row.input_hash == digest \
+                and row.algorithm_version == ComplianceAnalyzer.ALGORITHM_VERSION \
+                and company.id in rollups:
+            scores[company.id] = row.scores
+        else:
+            stale.append((company, digest, company_data, report_data))
+
+    if not stale:
+        return scores
+
+    fresh = ComplianceAnalyzer().analyze_companies((data, report_data) for _, _, data, report_data in stale)
+    score_year = datetime.now().year
+    changes = []
+    for (company, digest, company_data, report_data), result in zip(stale, fresh):
+        scores[company.id] = result
+
+        row = stored.get(company.id)
+        changes.append((company.id, row.scores if row is not None else None, result, average_compliance(result)))
+        if row is None:
+            row = ComplianceScore(company_id=company.id)
+            db.session.add(row)
+        row.input_hash = digest
+        row.algorithm_version = ComplianceAnalyzer.ALGORITHM_VERSION
+        row.scores = result
+
+        rollup = rollups.get(company.id)
+        if rollup is None:
+            rollup = ComplianceRollup(company_id=company.id)
+            db.session.add(rollup)
+        for column, value in rollup_values(company_data, len(report_data), result, score_year).items():
+            setattr(rollup, column, value)
+
+    compliance_history.record_changes(changes)
+    sync_statuses(company.id for company, _, _, _ in stale)
+    logger.debug(f"Recomputed compliance scores for {len(stale)} of {len(companies)} companies")
+    return scores
+
+
+def get_scores(companies: List[Company], reports: Optional[Dict[int, list]] = None) -> Dict[int, Dict]:
+    """
+    Stored compliance scores for companies, refreshing stale ones
+
+    Args:
+        companies: Company rows
+        reports: Optional report rows by company id (loaded when omitted)
+
+    Returns:
+        Dictionary of company id to scores
+    """
+    if reports is None:
+        reports = load_reports([company.id for company in companies])
+    scores = _store_scores(companies, reports)
+    _commit()
+    return scores
+
+
+def get_company_scores(company: Company, reports: Optional[list] = None) -> Dict:
+    """Stored compliance scores of one company, refreshed if stale"""
+    return get_scores([company], None if reports is None else {company.id: reports})[company.id]
+
+
+def refresh(company_ids: Iterable[int]) -> int:
+    """
+    Rescore companies and update their rollups and report counters (does not commit)
+
+    Ids of companies that no longer exist have their rows removed.
+
+    Returns:
+        Number of companies rescored or removed
+    """
+    ids = sorted(set(company_ids))
+    companies = []
+    for chunk in _chunks(ids):
+        companies.extend(Company.query.filter(Company.id.in_(chunk)))
+
+    gone = sorted(set(ids) - {company.id for company in companies})
+    for chunk in _chunks(gone):
+        db.session.execute(db.delete(ComplianceRollup).where(ComplianceRollup.company_id.in_(chunk)))
+        db.session.execute(db.delete(ComplianceScore).where(ComplianceScore.company_id.in_(chunk)))
+        db.session.execute(db.delete(ComplianceScoreHistory).where(ComplianceScoreHistory.company_id.in_(chunk)))
+        db.session.execute(db.delete(CompanyControlStatus).where(CompanyControlStatus.company_id.in_(chunk)))
+
+    if companies:
+        reports = load_reports([company.id for company in companies])
+        _store_scores(companies, reports)
+        store_counters(companies, reports)
+    return len(ids)
+
+
+def _commit():
+    try:
+        db.session.commit()
+    except IntegrityError:
+        # Another request stored the same companies first; its scores are equivalent
+        db.session.rollback()
+        logger.info("Concurrent compliance score refresh")
+
+
+# ------------------------------------------------------------------
+# Incremental refresh on writes
+# ------------------------------------------------------------------
+
+def _changed(obj, fields) -> bool:
+    state = inspect(obj)
+    return any(state.attrs[field].history.has_changes() for field in fields)
+
+
+def _track_changes(session, flush_context):
+    """after_flush: remember companies whose scoring inputs were written"""
+    pending = session.info.setdefault(_PENDING, set())
+    for obj in session.new:
+        if isinstance(obj, Company):
+            pending.add(obj.id)
+        elif isinstance(obj, AnnualReport):
+            pending.add(obj.company_id)
+    for obj in session.dirty:
+        if isinstance(obj, Company) and _changed(obj, SCORING_FIELDS):
+            pending.add(obj.id)
+        elif isinstance(obj, AnnualReport) and _changed(obj, REPORT_SCORING_FIELDS):
+            history = inspect(obj).attrs.company_id.history
+            pending.update(history.deleted or ())
+            pending.add(obj.company_id)
+    for obj in session.deleted:
+        if isinstance(obj, Company):
+            pending.add(obj.id)
+        elif isinstance(obj, AnnualReport):
+            pending.add(obj.company_id)
+    pending.discard(None)
+
+
+def _refresh_pending(session):
+    """before_commit: rescore tracked companies in the committing transaction"""
+    session.flush()  # before_commit runs ahead of the commit's own flush
+    while session.info.get(_PENDING):
+        ids = session.info.pop(_PENDING)
+        refresh(ids)
+        session.flush()
+
+
+def _discard_pending(session):
+    """after_rollback: the tracked writes were undone"""
+    session.info.pop(_PENDING, None)
+
+
+def init_app(app):
+    """Register the session events that keep scores and rollups current"""
+    if not event.contains(db.session, 'after_flush', _track_changes):
+        event.listen(db.session, 'after_flush', _track_changes)
+        event.listen(db.session, 'before_commit', _refresh_pending)
+        event.listen(db.session, 'after_rollback', _discard_pending)
@@ -0,0 +1,171 @@
+"""
+What-If Compliance Simulation
+Author: Osman Yildiz
+
+Scores a base company under many hypothetical changes at once. Every
+scenario becomes one row of a single ComplianceAnalyzer.score_matrix
+batch, so all scenarios go through the vectorized formulas in one pass and
+score exactly as a real company with those inputs would.
+
+A scenario may set any of:
+    industry: Replacement industry (null clears it)
+    ticker: Replacement ticker (null clears it)
+    report_years: Replacement list of report years
+    add_report_years / remove_report_years: Years added to / removed from the reports
+    pdf_available: Whether every report has a PDF (default: added reports have one,
+                   existing reports keep theirs)
+    label: Echoed back with the result
+"""
+from typing import Dict, List, Tuple
+
+from backend1.app.services.compliance_analyzer import ComplianceAnalyzer
+from backend1.app.services.compliance_scores import SCORING_FIELDS
+
+MAX_SCENARIOS = 10000
+
+SCENARIO_FIELDS = ('label', 'industry', 'ticker', 'report_years', 'add_report_years',
+                   'remove_report_years', 'pdf_available')
+
+
+def _years(value, field: str, index: int) -> List[int]:
+    if not isinstance(value, list) or not all(isinstance(y, int) and not isinstance(y, bool) for y in value):
+        raise ValueError(f'Scenario {index}: {field} must be a list of years')
+    return value
+
+
+def _optional_string(value, field: str, index: int):
+    if value is not None and not isinstance(value, str):
+        raise ValueError(f'Scenario {index}: {field} must be a string or null')
+    return value
+
+
+def validate_company(company_data: Dict, report_data) -> None:
+    """
+    Check a hypothetical base company the way scenarios are checked
+
+    Raises:
+        ValueError: Missing name, a scoring field that is not a string or
+                    null, or a report without an integer year
+    """
+    name = company_data.get('name')
+    if not isinstance(name, str) or not name.strip():
+        raise ValueError('company.name must be a non-empty string')
+    for field in SCORING_FIELDS:
+        if company_data.get(field) is not None and not isinstance(company_data[field], str):
+            raise ValueError(f'company.{field} must be a string or null')
+    if not isinstance(report_data, list) or not all(isinstance(r, dict) for r in report_data):
+        raise ValueError('company.reports must be a list of objects')
+    for position, report in enumerate(report_data):
+        year = report.get('year')
+        if not isinstance(year, int) or isinstance(year, bool):
+            raise ValueError(f'company.reports[{position}].year must be an integer')
+        if report.get('pdf_url') is not None and not isinstance(report['pdf_url'], str):
+            raise ValueError(f'company.reports[{position}].pdf_url must be a string or null')
+
+
+def apply_scenario(company_data: Dict, report_data: List[Dict], scenario: Dict, index: int = 0) -> Tuple:
+    """
+    Apply one scenario's perturbations to a company's scoring inputs
+
+    Args:
+        company_data: Base company dict as taken by ComplianceAnalyzer
+        report_data: Base report dicts (year, pdf_url)
+        scenario: Perturbations (see module docstring)
+        index: Scenario position, for error messages
+
+    Returns:
+        (company_data, report_data) for the scenario
+
+    Raises:
+        ValueError: Unknown field or invalid value
+    """
+    if not isinstance(scenario, dict):
+        raise ValueError(f'Scenario {index} must be an object')
+    unknown = set(scenario) - set(SCENARIO_FIELDS)
+    if unknown:
+        raise ValueError(f"Scenario {index}: unknown fields {', '.join(sorted(unknown))}")
+
+    company = dict(company_data)
+    for field in ('industry', 'ticker'):
+        if field in scenario:
+            company[field] = _optional_string(scenario[field], field, index)
+
+    pdf_available = scenario.get('pdf_available')
+    if pdf_available is not None and not isinstance(pdf_available, bool):
+        raise ValueError(f'Scenario {index}: pdf_available must be true or false')
+
+    if 'report_years' in scenario:
+        reports = [{'year': year, 'pdf_url': None if pdf_available is False else 'simulated'}
+                   for year in _years(scenario['report_years'], 'report_years', index)]
+    else:
+        reports = report_data
+        if 'remove_report_years' in scenario:
+            removed = set(_years(scenario['remove_report_years'], 'remove_report_years', index))
+            reports = [r for r in reports if r.get('year') not in removed]
+        if 'add_report_years' in scenario:
+            reports = reports + [{'year': year, 'pdf_url': 'simulated'}
+                                 for year in _years(scenario['add_report_years'], 'add_report_years', index)]
+        if pdf_available is not None:
+            pdf_url = 'simulated' if pdf_available else None
+            reports = [{'year': r.get('year'), 'pdf_url': pdf_url} for r in reports]
+    return company, reports
+
+
+def simulate(company_data: Dict, report_data: List[Dict], scenarios: List[Dict]) -> Dict:
+    """
+    Score a company under every scenario and diff against its base scores
+
+    Args:
+        company_data: Base company dict (id and SCORING_FIELDS)
+        report_data: Base report dicts (year, pdf_url)
+        scenarios: Scenario dicts
+
+    Returns:
+        Dict with the base scores and average, and per scenario its
+        average compliance, the change in it and the per-control deltas
+
+    Raises:
+        ValueError: Too many scenarios or an invalid scenario
+    """
+    if not isinstance(scenarios, list) or not scenarios:
+        raise ValueError('scenarios must be a non-empty list')
+    if len(scenarios) > MAX_SCENARIOS:
+        raise ValueError(f'At most {MAX_SCENARIOS} scenarios per request')
+
+    base = ({field: company_data.get(field) for field in ('id',) + SCORING_FIELDS},
+            [{'year': r.get('year'), 'pdf_url': r.get('pdf_url')} for r in report_data])
+    batch = [base] + [apply_scenario(base[0], base[1], scenario, index)
+                      for index, scenario in enumerate(scenarios)]
+
+    # Row 0 is the base company, rows 1.. the scenarios
+    analyzer = ComplianceAnalyzer()
+    plan = analyzer.plan
+    matrix = analyzer.score_matrix(batch)
+    deltas = matrix[1:] - matrix[0]
+
+    # Truncated like compliance_scores.average_compliance (scores are positive)
+    averaged = [i for i, (framework, _) in enumerate(plan.controls) if framework in plan.averaged_frameworks]
+    averages = matrix[:, averaged].sum(axis=1) // len(averaged)
+
+    # Nest the delta rows per framework (the plan keeps each framework's controls together)
+    per_framework = []
+    start = 0
+    for controls in plan.frameworks.values():
+        rows = deltas[:, start:start + len(controls)].tolist()
+        per_framework.append([dict(zip(controls, row)) for row in rows])
+        start += len(controls)
+    nested = [dict(zip(plan.frameworks, row)) for row in zip(*per_framework)]
+
+    base_average = int(averages[0])
+    results = []
+    for index, (scenario, row, average) in enumerate(zip(scenarios, nested, averages[1:].tolist())):
+        result = {'index': index, 'average_compliance': average,
+                  'average_delta': average - base_average, 'deltas': row}
+        if 'label' in scenario:
+            result['label'] = scenario['label']
+        results.append(result)
+
+    return {
+        'base': {'compliance_scores': plan.nest(matrix[0].tolist()), 'average_compliance': base_average},
+        'scenarios': results,
+    }
@@ -0,0 +1,316 @@
+"""
+Control Catalog and Gap Analysis
+Author: Osman Yildiz
+
+The catalog (control_catalog.json) lists the 93 ISO/IEC 27001:2022
+Annex A controls and the ISO/IEC 27017 cloud (CLD) controls. Each control
+maps onto one scored control of the scoring plan with a threshold:
+companies scoring at least the threshold have implemented it, those
+within in_progress_margin below it are in progress, the rest have not
+started.
+
+Per company the statuses are stored as two bitsets (CompanyControlStatus),
+derived from the compliance scores where those are written:
+compliance_scores re-derives them for the companies it rescores, and the
+catalog rescore (`flask compliance rescore`) for every company whose
+scores or catalog version changed. Requests only read them. Gap analysis
+loads the bitsets of all companies into one uint8 matrix and answers
+questions with bitwise NumPy operations: which companies lack a control,
+how a company compares with the controls most of its industry has
+implemented, portfolio coverage.
+"""
+import hashlib
+import json
+import os
+from datetime import datetime
+from functools import lru_cache
+from typing import Dict, Iterable, List, Optional
+
+import numpy as np
+
+from backend1.app import db
+from backend1.app.models.company import Company
+from backend1.app.models.compliance_score import ComplianceScore
+from backend1.app.models.control_status import CompanyControlStatus
+from backend1.app.services.compliance_analyzer import ComplianceAnalyzer
+from backend1.app.services.compliance_history import flatten
+
+CATALOG_PATH = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'control_catalog.json')
+
+STATUSES = ('implemented', 'in_progress', 'not_started')
+
+# Share of an industry that must have implemented a control for it to be in the industry baseline
+BASELINE_SHARE = 0.5
+
+_CHUNK = 2000
+
+# Keep IN lists well below database parameter limits
+_ID_CHUNK = 500
+
+
+class ControlCatalog:
+    """Compiled control catalog"""
+
+    def __init__(self, spec: Dict, plan=None):
+        """
+        Args:
+            spec: Parsed catalog (see control_catalog.json)
+            plan: ScoringPlan the controls' scores refer to (default: the analyzer's)
+
+        Raises:
+            ValueError: A control refers to an unknown score or an id repeats
+        """
+        plan = plan or ComplianceAnalyzer.plan
+        canonical = json.dumps(spec, sort_keys=True, separators=(',', ':'))
+        self.version = f"{spec['version']}-{hashlib.sha256(canonical.encode()).hexdigest()[:8]}"
+        self.controls = tuple(spec['controls'])
+        self.ids = tuple(control['id'] for control in self.controls)
+        if len(set(self.ids)) != len(self.ids):
+            raise ValueError('Invalid control catalog: duplicate control ids')
+        self.index = {control_id: i for i, control_id in enumerate(self.ids)}
+        self.width = (len(self.controls) + 7) // 8  # Bytes per bitset
+
+        columns = []
+        for control in self.controls:
+            score = tuple(control['score'].split('.', 1))
+            if score not in plan.controls:
+                raise ValueError(f"Invalid control catalog: {control['id']} refers to unknown score "
+                                 f"{control['score']!r}")
+            columns.append(plan.controls.index(score))
+        self.score_columns = np.array(columns, dtype=np.int64)
+        self.thresholds = np.array([control['threshold'] for control in self.controls], dtype=np.int64)
+        self.margin = int(spec['in_progress_margin'])
+
+    def statuses(self, scores: np.ndarray):
+        """
+        Derive control bitsets from score rows
+
+        Args:
+            scores: Int array (companies x scoring plan controls)
+
+        Returns:
+            (implemented, in_progress) uint8 arrays of shape (companies, width)
+        """
+        values = scores[:, self.score_columns]
+        implemented = values >= self.thresholds
+        in_progress = ~implemented & (values >= self.thresholds - self.margin)
+        return (np.packbits(implemented, axis=1, bitorder='little'),
+                np.packbits(in_progress, axis=1, bitorder='little'))
+
+    def unpack(self, bits: np.ndarray) -> np.ndarray:
+        """Bool array (rows x controls) from packed bitsets"""
+        return np.unpackbits(bits, axis=-1, count=len(self.controls), bitorder='little').astype(bool)
+
+    def mask(self, control_id: str):
+        """(byte, bit mask) of a control, KeyError if unknown"""
+        i = self.index[control_id]
+        return i // 8, np.uint8(1 << (i % 8))
+
+
+@lru_cache(maxsize=None)
+def default_catalog() -> ControlCatalog:
+    with open(CATALOG_PATH, encoding='utf-8') as f:
+        return ControlCatalog(json.load(f))
+
+
+def sync_statuses(company_ids: Optional[Iterable[int]] = None) -> int:
+    """
+    Bring control bitsets up to date with the stored scores (does not commit)
+
+    Rows whose scores were recomputed, that are missing or that were
+    derived from another catalog version are re-derived in bulk.
+
+    Args:
+        company_ids: Only these companies (default: all, also removing the
+                     rows of companies without scores)
+
+    Returns:
+        Number of companies whose statuses were written
+    """
+    catalog = default_catalog()
+    plan = ComplianceAnalyzer.plan
+    query = (db.session.query(ComplianceScore.company_id, ComplianceScore.scores, ComplianceScore.computed_at,
+                              Company.industry, Company.sector, CompanyControlStatus.company_id)
+             .join(Company, Company.id == ComplianceScore.company_id)
+             .outerjoin(CompanyControlStatus, CompanyControlStatus.company_id == ComplianceScore.company_id)
+             .filter(db.or_(CompanyControlStatus.company_id.is_(None),
+                            CompanyControlStatus.catalog_version != catalog.version,
+                            CompanyControlStatus.scored_at.is_distinct_from(ComplianceScore.computed_at))))
+    if company_ids is None:
+        rows = query.all()
+    else:
+        ids = sorted(set(company_ids))
+        rows = []
+        for start in range(0, len(ids), _ID_CHUNK):
+            rows.extend(query.filter(ComplianceScore.company_id.in_(ids[start:start + _ID_CHUNK])))
+
+    now = datetime.utcnow()
+    for start in range(0, len(rows), _CHUNK):
+        chunk = rows[start:start + _CHUNK]
+        implemented, in_progress = catalog.statuses(np.array([flatten(row[1]) for row in chunk], dtype=np.int64))
+        inserts, updates = [], []
+        for row, done, started in zip(chunk, implemented, in_progress):
+            values = {
+                'company_id': row[0],
+                'industry': plan.classify((row[3] or row[4] or '').lower()),
+                'implemented': done.tobytes(),
+                'in_progress': started.tobytes(),
+                'catalog_version': catalog.version,
+                'scored_at': row[2],
+                'updated_at': now,
+            }
+            (inserts if row[5] is None else updates).append(values)
+        if inserts:
+            db.session.execute(db.insert(CompanyControlStatus), inserts)
+        if updates:
+            db.session.execute(db.update(CompanyControlStatus), updates)
+
+    if company_ids is None:
+        db.session.execute(db.delete(CompanyControlStatus).where(
+            ~CompanyControlStatus.company_id.in_(db.select(ComplianceScore.company_id))))
+    return len(rows)
+
+
+class ControlMatrix:
+    """Control bitsets of all (or one industry's) companies, for vectorized gap analysis"""
+
+    def __init__(self, company_ids, industries, implemented, in_progress, catalog: ControlCatalog):
+        self.company_ids = company_ids  # int64 array, ascending
+        self.industries = industries  # object array of industry names
+        self.implemented = implemented  # uint8 (companies x catalog.width)
+        self.in_progress = in_progress
+        self.catalog = catalog
+
+    @classmethod
+    def load(cls, industry: Optional[str] = None) -> 'ControlMatrix':
+        """Read the stored bitsets"""
+        catalog = default_catalog()
+        query = db.session.query(CompanyControlStatus.company_id, CompanyControlStatus.industry,
+                                 CompanyControlStatus.implemented, CompanyControlStatus.in_progress)
+        if industry:
+            query = query.filter(CompanyControlStatus.industry == industry)
+        rows = query.order_by(CompanyControlStatus.company_id).all()
+
+        def bits(column):
+            return np.frombuffer(b''.join(row[column] for row in rows), dtype=np.uint8).reshape(-1, catalog.width)
+
+        return cls(np.array([row[0] for row in rows], dtype=np.int64),
+                   np.array([row[1] for row in rows], dtype=object),
+                   bits(2), bits(3), catalog)
+
+    def __len__(self):
+        return len(self.company_ids)
+
+    def counts(self, rows=None) -> Dict[str, np.ndarray]:
+        """Per control: number of companies (optionally only `rows`) in each status"""
+        implemented = self.implemented if rows is None else self.implemented[rows]
+        in_progress = self.in_progress if rows is None else self.in_progress[rows]
+        done = self.catalog.unpack(implemented).sum(axis=0)
+        started = self.catalog.unpack(in_progress).sum(axis=0)
+        return {'implemented': done, 'in_progress': started, 'not_started': len(implemented) - done - started}
+
+    def status_mask(self, control_id: str, status: str) -> np.ndarray:
+        """
+        Companies with a control in a status
+
+        Args:
+            control_id: Catalog control id, e.g. 'A.8.12'
+            status: One of STATUSES, or 'missing' (not implemented)
+
+        Returns:
+            Bool array over the companies
+        """
+        byte, bit = self.catalog.mask(control_id)
+        done = (self.implemented[:, byte] & bit) != 0
+        if status == 'implemented':
+            return done
+        if status == 'missing':
+            return ~done
+        started = (self.in_progress[:, byte] & bit) != 0
+        if status == 'in_progress':
+            return started
+        if status == 'not_started':
+            return ~done & ~started
+        raise ValueError(f"status must be one of: {', '.join(STATUSES + ('missing',))}")
+
+    def industry_baseline(self, industry: str):
+        """
+        Controls implemented by at least BASELINE_SHARE of an industry
+
+        Returns:
+            (baseline bitset, per-control implementation rate, peer count)
+        """
+        peers = self.industries == industry
+        count = int(peers.sum())
+        if not count:
+            return np.zeros(self.catalog.width, dtype=np.uint8), np.zeros(len(self.catalog.ids)), 0
+        rate = self.counts(peers)['implemented'] / count
+        return np.packbits(rate >= BASELINE_SHARE, bitorder='little'), rate, count
+
+    def row(self, company_id: int) -> Optional[int]:
+        """Position of a company, or None"""
+        i = int(np.searchsorted(self.company_ids, company_id))
+        if i < len(self.company_ids) and self.company_ids[i] == company_id:
+            return i
+        return None
+
+
+def company_gaps(matrix: ControlMatrix, company_id: int) -> Optional[Dict]:
+    """
+    A company's control statuses and the industry-baseline controls it has not implemented
+
+    Returns:
+        Dict with industry, peer_count, counts, controls (id -> status) and gaps,
+        or None if the company has no statuses
+    """
+    i = matrix.row(company_id)
+    if i is None:
+        return None
+    catalog = matrix.catalog
+    industry = matrix.industries[i]
+    baseline, rate, peers = matrix.industry_baseline(industry)
+
+    implemented = matrix.implemented[i]
+    in_progress = matrix.in_progress[i]
+    done = catalog.unpack(implemented)
+    started = catalog.unpack(in_progress)
+    missing = catalog.unpack(baseline & ~implemented)
+
+    statuses = np.where(done, 'implemented', np.where(started, 'in_progress', 'not_started'))
+    return {
+        'industry': industry,
+        'peer_count': peers,
+        'counts': {
+            'implemented': int(done.sum()),
+            'in_progress': int(started.sum()),
+            'not_started': int(len(done) - done.sum() - started.sum()),
+        },
+        'controls': dict(zip(catalog.ids, statuses.tolist())),
+        'gaps': [{
+            'id': catalog.ids[j],
+            'title': catalog.controls[j]['title'],
+            'status': str(statuses[j]),
+            'peer_implemented_rate': round(float(rate[j]), 3),
+        } for j in np.flatnonzero(missing)],
+    }
+
+
+def portfolio_summary(matrix: ControlMatrix) -> Dict:
+    """Percent of all company controls implemented, in progress and not started"""
+    cells = len(matrix) * len(matrix.catalog.ids)
+    if not cells:
+        return {status: 0 for status in STATUSES}
+    counts = matrix.counts()
+    implemented = round(100 * int(counts['implemented'].sum()) / cells)
+    in_progress = round(100 * int(counts['in_progress'].sum()) / cells)
+    return {'implemented': implemented, 'in_progress': in_progress,
+            'not_started': 100 - implemented - in_progress}
+
+
+def catalog_coverage(matrix: ControlMatrix, framework: Optional[str] = None) -> List[Dict]:
+    """Catalog entries with the number of companies in each status"""
+    counts = {status: values.tolist() for status, values in matrix.counts().items()}
+    return [dict({key: control[key] for key in ('id', 'title', 'framework', 'theme')},
+                 **{status: counts[status][i] for status in STATUSES})
+            for i, control in enumerate(matrix.catalog.controls)
+            if framework is None or control['framework'] == framework]
@@ -0,0 +1,193 @@
+"""
+Persistent Crawl Frontier for the Company Directory Crawler
+Author: Osman Yildiz
+
+Stores directory listing pages still to fetch and company slugs still to
+scrape in a SQLite file, so a crawl can be stopped and resumed without
+refetching completed pages. Membership checks go through an in-memory set
+of short URL digests; the table primary keys remain the source of truth.
+"""
+import hashlib
+import os
+import sqlite3
+import threading
+import time
+from typing import Dict, Iterable, List
+
+PENDING = 0
+DONE = 1
+FAILED = 2
+
+_STATE_NAMES = {PENDING: 'pending', DONE: 'done', FAILED: 'failed'}
+
+
+def _digest(kind: str, value: str) -> bytes:
+    return hashlib.blake2b(f'{kind}:{value}'.encode('utf-8'), digest_size=8).digest()
+
+
+class CrawlFrontier:
+    """Resumable store of listing pages and discovered company slugs"""
+
+    def __init__(self, path: str, max_attempts: int = 3):
+        """
+        Args:
+            path: SQLite file holding the frontier (created if missing)
+            max_attempts: Fetch attempts before a listing page is marked failed
+        """
+        self.path = path
+        self.max_attempts = max_attempts
+        self._local = threading.local()
+        self._lock = threading.Lock()
+
+        directory = os.path.dirname(path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+
+        with self._connection() as conn:
+            conn.execute(
+                'CREATE TABLE IF NOT EXISTS pages ('
+                ' url TEXT PRIMARY KEY,'
+                ' state INTEGER NOT NULL DEFAULT 0,'
+                ' attempts INTEGER NOT NULL DEFAULT 0,'
+                ' discovered_at REAL NOT NULL,'
+                ' fetched_at REAL)'
+            )
+            conn.execute(
+                'CREATE TABLE IF NOT EXISTS slugs ('
+                ' slug TEXT PRIMARY KEY,'
+                ' state INTEGER NOT NULL DEFAULT 0,'
+                ' discovered_at REAL NOT NULL,'
+                ' scraped_at REAL)'
+            )
+            conn.execute('CREATE INDEX IF NOT EXISTS ix_pages_state ON pages (state)')
+            conn.execute('CREATE INDEX IF NOT EXISTS ix_slugs_state ON slugs (state)')
+
+        # Everything ever enqueued, whatever its state
+        self._seen = set()
+        conn = self._connection()
+        for (url,) in conn.execute('SELECT url FROM pages'):
+            self._seen.add(_digest('page', url))
+        for (slug,) in conn.execute('SELECT slug FROM slugs'):
+            self._seen.add(_digest('slug', slug))
+
+    def _connection(self) -> sqlite3.Connection:
+        """Return this thread's connection to the frontier"""
+        conn = getattr(self._local, 'conn', None)
+        if conn is None:
+            conn = sqlite3.connect(self.path, timeout=30)
+            conn.execute('PRAGMA journal_mode=WAL')
+            self._local.conn = conn
+        return conn
+
+    def _unseen(self, kind: str, values: Iterable[str]) -> List[str]:
+        """Filter out values already in the frontier and claim the rest"""
+        fresh = []
+        with self._lock:
+            for value in values:
+                digest = _digest(kind, value)
+                if digest not in self._seen:
+                    self._seen.add(digest)
+                    fresh.append(value)
+        return fresh
+
+    def _insert(self, conn: sqlite3.Connection, kind: str, values: Iterable[str]) -> int:
+        fresh = self._unseen(kind, values)
+        if fresh:
+            table, column = ('pages', 'url') if kind == 'page' else ('slugs', 'slug')
+            now = time.time()
+            conn.executemany(
+                f'INSERT OR IGNORE INTO {table} ({column}, discovered_at) VALUES (?, ?)',
+                [(value, now) for value in fresh]
+            )
+        return len(fresh)
+
+    def add_pages(self, urls: Iterable[str]) -> int:
+        """Enqueue listing pages; returns how many were new"""
+        with self._connection() as conn:
+            return self._insert(conn, 'page', urls)
+
+    def add_slugs(self, slugs: Iterable[str]) -> int:
+        """Enqueue company slugs; returns how many were new"""
+        with self._connection() as conn:
+            return self._insert(conn, 'slug', slugs)
+
+    def pending_pages(self, limit: int = 100) -> List[str]:
+        """Return listing pages that still have to be fetched, oldest first"""
+        rows = self._connection().execute(
+            'SELECT url FROM pages WHERE state = ? ORDER BY discovered_at, url LIMIT ?',
+            (PENDING, limit)
+        )
+        return [url for (url,) in rows]
+
+    def complete_page(self, url: str, page_urls: Iterable[str], slugs: Iterable[str]) -> int:
+        """
+        Record a fetched listing page and the links found on it
+
+        The discovered links and the page's completion are written in one
+        transaction, so an interrupted crawl never loses links from a page
+        it will not fetch again.
+
+        Returns:
+            Number of slugs not seen before
+        """
+        with self._connection() as conn:
+            self._insert(conn, 'page', page_urls)
+            new_slugs = self._insert(conn, 'slug', slugs)
+            conn.execute(
+                'UPDATE pages SET state = ?, attempts = attempts + 1, fetched_at = ? WHERE url = ?',
+                (DONE, time.time(), url)
+            )
+        return new_slugs
+
+    def fail_page(self, url: str):
+        """Count a failed fetch; the page is given up after max_attempts"""
+        with self._connection() as conn:
+            conn.execute(
+                'UPDATE pages SET attempts = attempts + 1,'
+                ' state = CASE WHEN attempts + 1 >= ? THEN ? ELSE state END'
+                ' WHERE url = ?',
+                (self.max_attempts, FAILED, url)
+            )
+
+    def pending_slugs(self, limit: int = 100) -> List[str]:
+        """Return discovered slugs that have not been scraped yet, oldest first"""
+        rows = self._connection().execute(
+            'SELECT slug FROM slugs WHERE state = ? ORDER BY discovered_at, slug LIMIT ?',
+            (PENDING, limit)
+        )
+        return [slug for (slug,) in rows]
+
+    def complete_slugs(self, done: Iterable[str] = (), failed: Iterable[str] = ()):
+        """Mark scraped slugs as done or failed"""
+        now = time.time()
+        with self._connection() as conn:
+            conn.executemany('UPDATE slugs SET state = ?, scraped_at = ? WHERE slug = ?',
+                             [(DONE, now, slug) for slug in done])
+            conn.executemany('UPDATE slugs SET state = ?, scraped_at = ? WHERE slug = ?',
+                             [(FAILED, now, slug) for slug in failed])
+
+    def retry_failed(self) -> int:
+        """Put failed pages and slugs back in the queue; returns how many"""
+        with self._connection() as conn:
+            pages = conn.execute('UPDATE pages SET state = ?, attempts = 0 WHERE state = ?',
+                                 (PENDING, FAILED)).rowcount
+            slugs = conn.execute('UPDATE slugs SET state = ? WHERE state = ?',
+                                 (PENDING, FAILED)).rowcount
+        return pages + slugs
+
+    def stats(self) -> Dict:
+        """Return page and slug counts by state"""
+        conn = self._connection()
+        result = {}
+        for table in ('pages', 'slugs'):
+            counts = {name: 0 for name in _STATE_NAMES.values()}
+            for state, count in conn.execute(f'SELECT state, COUNT(*) FROM {table} GROUP BY state'):
+                counts[_STATE_NAMES[state]] = count
+            result[table] = counts
+        return result
+
+    def close(self):
+        conn = getattr(self._local, 'conn', None)
+        if conn is not None:
+            conn.close()
+            self._local.conn = None
@@ -0,0 +1,191 @@
+"""
+AnnualReports.com Company Directory Crawler
+Author: Osman Yildiz
+
+Walks the company directory listing pages, discovers every /Company/<slug>
+link and feeds the slugs to the scraper in batches. Progress lives in a
+CrawlFrontier, so a crawl can be interrupted and resumed at any point.
+"""
+import logging
+import string
+from typing import Callable, Dict, Iterable, Iterator, List, Optional, Set, Tuple
+from urllib.parse import urldefrag, urljoin, urlparse, parse_qs
+
+from lxml import etree
+
+from backend1.app.services.crawl_frontier import CrawlFrontier
+from backend1.app.services.scraper import AnnualReportsScraper
+
+logger = logging.getLogger(__name__)
+
+DIRECTORY_PATH = '/Companies'
+COMPANY_PATH = '/Company/'
+
+# Query parameters that turn a directory URL into a search, not a listing
+SEARCH_PARAMS = frozenset(['search'])
+
+
+def directory_start_urls(base_url: str) -> List[str]:
+    """Return the alphabetical directory index pages (A-Z and 0-9)"""
+    letters = list(string.ascii_uppercase) + ['0-9']
+    return [f"{base_url}{DIRECTORY_PATH}?a={letter}" for letter in letters]
+
+
+def extract_links(content: bytes, page_url: str, base_url: str) -> Tuple[Set[str], Set[str]]:
+    """
+    Collect directory listing links and company slugs from a listing page
+
+    Args:
+        content: Raw HTML of the listing page
+        page_url: URL the page was fetched from (for relative links)
+        base_url: Site root; links to other hosts are ignored
+
+    Returns:
+        Tuple of (listing page URLs, company slugs)
+    """
+    pages, slugs = set(), set()
+    try:
+        root = etree.HTML(content)
+    except (etree.ParserError, ValueError):
+        return pages, slugs
+    if root is None:
+        return pages, slugs
+
+    host = urlparse(base_url).netloc.lower()
+    for href in root.xpath('//a/@href'):
+        url, _ = urldefrag(urljoin(page_url, href.strip()))
+        parsed = urlparse(url)
+        if parsed.netloc.lower() != host:
+            continue
+
+        if parsed.path.lower().startswith(COMPANY_PATH.lower()):
+            slug = parsed.path[len(COMPANY_PATH):].strip('/')
+            if slug and '/' not in slug:
+                slugs.add(slug)
+        elif parsed.path.rstrip('/').lower() == DIRECTORY_PATH.lower():
+            if SEARCH_PARAMS.isdisjoint(k.lower() for k in parse_qs(parsed.query)):
+                pages.add(f"{base_url}{DIRECTORY_PATH}?{parsed.query}" if parsed.query
+                          else f"{base_url}{DIRECTORY_PATH}")
+
+    return pages, slugs
+
+
+class DirectoryCrawler:
+    """Breadth-first crawler over the company directory"""
+
+    def __init__(self, scraper: AnnualReportsScraper, frontier: CrawlFrontier, batch_size: int = 50):
+        """
+        Args:
+            scraper: Scraper used for fetching (its rate limits and cache apply)
+            frontier: Persistent frontier holding crawl progress
+            batch_size: Slugs handed to the scraper per batch
+        """
+        self.scraper = scraper
+        self.frontier = frontier
+        self.batch_size = batch_size
+
+    def seed(self, start_urls: Optional[Iterable[str]] = None) -> int:
+        """Enqueue the directory index pages; already known pages are ignored"""
+        urls = start_urls if start_urls is not None else directory_start_urls(self.scraper.BASE_URL)
+        return self.frontier.add_pages(urls)
+
+    def crawl_pages(self, max_pages: Optional[int] = None) -> Dict:
+        """
+        Fetch pending listing pages until the frontier has none left
+
+        Args:
+            max_pages: Stop after fetching this many pages (None for no limit)
+
+        Returns:
+            Counts of pages fetched and failed and slugs discovered in this call
+        """
+        result = {'pages_fetched': 0, 'pages_failed': 0, 'slugs_discovered': 0}
+
+        while max_pages is None or result['pages_fetched'] + result['pages_failed'] < max_pages:
+            limit = self.batch_size
+            if max_pages is not None:
+                limit = min(limit, max_pages - result['pages_fetched'] - result['pages_failed'])
+            batch = self.frontier.pending_pages(limit)
+            if not batch:
+                break
+
+            for url, content in self.scraper.fetch_many(batch):
+                if content is None:
+                    self.frontier.fail_page(url)
+                    result['pages_failed'] += 1
+                    continue
+                pages, slugs = extract_links(content, url, self.scraper.BASE_URL)
+                result['slugs_discovered'] += self.frontier.complete_page(url, pages, slugs)
+                result['pages_fetched'] += 1
+
+        logger.info(f"Crawled {result['pages_fetched']} listing pages, "
+                    f"discovered {result['slugs_discovered']} companies")
+        return result
+
+    def slug_batches(self) -> Iterator[List[str]]:
+        """Yield batches of discovered slugs that have not been scraped yet"""
+        while True:
+            batch = self.frontier.pending_slugs(self.batch_size)
+            if not batch:
+                return
+            yield batch
+
+    def scrape_discovered(self, handle: Callable[[str, Dict], None],
+                          max_companies: Optional[int] = None) -> Dict:
+        """
+        Scrape discovered slugs in batches and pass each result to a handler
+
+        A slug is marked done only after its handler returned, so slugs of an
+        interrupted batch are scraped again on resume.
+
+        Args:
+            handle: Called with (slug, company_data) for every parsed page
+            max_companies: Stop after this many slugs (None for no limit)
+
+        Returns:
+            Counts of companies scraped and failed in this call
+        """
+        result = {'companies_scraped': 0, 'companies_failed': 0}
+
+        for batch in self.slug_batches():
+            if max_companies is not None:
+                remaining = max_companies - result['companies_scraped'] - result['companies_failed']
+                if remaining <= 0:
+                    break
+                batch = batch[:remaining]
+
+            done, failed = [], []
+            for slug, company_data in self.scraper.scrape_many(batch):
+                if company_data is None:
+                    failed.append(slug)
+                    continue
+                try:
+                    handle(slug, company_data)
+                    done.append(slug)
+                except Exception as e:
+                    logger.error(f"Error storing company {slug}: {e}")
+                    failed.append(slug)
+            self.frontier.complete_slugs(done, failed)
+            result['companies_scraped'] += len(done)
+            result['companies_failed'] += len(failed)
+
+        return result
+
+    def run(self, handle: Optional[Callable[[str, Dict], None]] = None,
+            max_pages: Optional[int] = None, max_companies: Optional[int] = None) -> Dict:
+        """
+        Crawl the directory, then scrape everything discovered
+
+        Args:
+            handle: Handler for scraped companies; without one only discovery runs
+            max_pages: Listing page limit for this run
+            max_companies: Company limit for this run
+
+        Returns:
+            Combined counts for this run plus the frontier totals
+        """
+        result = self.crawl_pages(max_pages)
+        if handle is not None:
+            result.update(self.scrape_discovered(handle, max_companies))
+        result['frontier'] = self.frontier.stats()
+        return result
@@ -0,0 +1,295 @@
+"""
+Single-pass lxml Parser for AnnualReports.com Company Pages
+Author: Osman Yildiz
+
+Builds the tree once with lxml (no BeautifulSoup objects) and collects the
+label spans, overview, meta description, website link and report links in
+a single traversal. The result is identical to the BeautifulSoup-based
+AnnualReportsScraper.parse_company; the helpers below mirror BeautifulSoup's
+`.string`, `get_text()` and sibling-string semantics on lxml elements.
+"""
+import logging
+import re
+from typing import Dict, Iterator, List, Optional
+
+from bs4.dammit import EncodingDetector
+from lxml import etree
+
+logger = logging.getLogger(__name__)
+
+# Label spans ("Ticker:", "Exchange:", ...) and the fields they fill
+LABEL_PATTERNS = (
+    ('ticker', re.compile(r'Ticker\s*:', re.I)),
+    ('exchange', re.compile(r'Exchange\s*:', re.I)),
+    ('industry', re.compile(r'Industry\s*:', re.I)),
+    ('sector', re.compile(r'Sector\s*:', re.I)),
+)
+OVERVIEW_CLASS = re.compile(r'overview', re.I)
+WEBSITE_TEXT = re.compile(r'Visit website', re.I)
+REPORT_HREF = re.compile(r'HostedData/AnnualReportArchive', re.I)
+DOWNLOAD_TEXT = re.compile(r'Download', re.I)
+YEAR_PATTERN = re.compile(r'(19|20)\d{2}')
+
+# Text inside these tags is not returned by BeautifulSoup's get_text()
+NON_TEXT_TAGS = frozenset(['script', 'style', 'template', 'rt', 'rp'])
+PRESERVE_WHITESPACE_TAGS = frozenset(['pre', 'textarea'])
+
+_find_descendant_links = etree.XPath('.//a')
+
+
+def parse_html(content: bytes) -> Iterator:
+    """
+    Parse raw HTML the way BeautifulSoup's lxml builder does
+
+    Yields one tree per candidate encoding, in BeautifulSoup's order. lxml
+    only decodes text lazily, so callers move on to the next tree when the
+    current one raises UnicodeDecodeError, as BeautifulSoup does.
+    """
+    for encoding in EncodingDetector(content, is_html=True).encodings:
+        try:
+            parser = etree.HTMLParser(encoding=encoding, recover=True, strip_cdata=False)
+            parser.feed(content)
+        except (UnicodeDecodeError, LookupError, etree.ParserError):
+            continue
+        try:
+            yield parser.close()
+        except etree.XMLSyntaxError:
+            yield None  # Empty document
+
+
+def _is_element(node) -> bool:
+    return isinstance(node.tag, str)
+
+
+def _node_text(node) -> str:
+    """Text BeautifulSoup keeps for a comment or processing instruction"""
+    if isinstance(node, etree._ProcessingInstruction):
+        return f'{node.target} {node.text or ""}'
+    return node.text
+
+
+def node_string(element) -> Optional[str]:
+    """Equivalent of BeautifulSoup's Tag.string"""
+    while True:
+        children = list(element)
+        count = (1 if element.text else 0) + len(children) + sum(1 for c in children if c.tail)
+        if count != 1:
+            return None
+        if element.text:
+            return element.text
+        child = children[0]
+        if not _is_element(child):
+            return _node_text(child)  # A lone comment is the tag's string
+        element = child
+
+
+def _strings(element) -> Iterator[str]:
+    if element.tag in NON_TEXT_TAGS:
+        return
+    if element.text:
+        yield element.text
+    for child in element:
+        if _is_element(child):
+            yield from _strings(child)
+        if child.tail:
+            yield child.tail
+
+
+def get_text(element, strip: bool = False) -> str:
+    """Equivalent of BeautifulSoup's Tag.get_text() / get_text(strip=True)"""
+    if any(ancestor.tag in NON_TEXT_TAGS for ancestor in element.iterancestors()):
+        return ''
+    if strip:
+        return ''.join(s.strip() for s in _strings(element) if s.strip())
+    return ''.join(_strings(element))
+
+
+def next_sibling_string(element) -> Optional[str]:
+    """Equivalent of BeautifulSoup's find_next_sibling(string=True)"""
+    node = element
+    while node is not None:
+        if node.tail:
+            return node.tail
+        node = node.getnext()
+        if node is not None and not _is_element(node):
+            text = _node_text(node)
+            if text:
+                return text
+            # BeautifulSoup turns an empty comment into ' ' unless whitespace is preserved
+            preserved = any(a.tag in PRESERVE_WHITESPACE_TAGS for a in node.iterancestors())
+            return '' if preserved else ' '
+    return None
+
+
+def _absolute(href: str, base_url: str) -> str:
+    if not href.startswith('http'):
+        href = base_url + href if href.startswith('/') else base_url + '/' + href
+    return href
+
+
+def _extract_annual_reports(report_links: List, base_url: str) -> List[Dict]:
+    """Build report dicts from report links; same rules as the BeautifulSoup path"""
+    reports = []
+    parent_cache = {}
+
+    for link in report_links:
+        try:
+            report_data = {
+                'title': None,
+                'year': None,
+                'report_type': 'Annual Report',
+                'pdf_url': None,
+                'html_url': None,
+                'view_url': None
+            }
+
+            href = link.get('href')
+            if href:
+                href = _absolute(href, base_url)
+                if 'pdf' in href.lower():
+                    report_data['pdf_url'] = href
+                else:
+                    report_data['view_url'] = href
+
+            link_text = get_text(link, strip=True)
+            report_data['title'] = link_text
+
+            year_match = YEAR_PATTERN.search(link_text)
+            if year_match:
+                report_data['year'] = int(year_match.group())
+
+            parent = next(link.iterancestors('div'), None)
+            if parent is not None:
+                # Sibling links share a parent div; inspect each div once
+                cached = parent_cache.get(parent)
+                if cached is None:
+                    parent_year = YEAR_PATTERN.search(get_text(parent))
+                    download_href = None
+                    for candidate in _find_descendant_links(parent):
+                        string = node_string(candidate)
+                        if string is not None and DOWNLOAD_TEXT.search(string):
+                            download_href = candidate.get('href')
+                            break
+                    cached = (int(parent_year.group()) if parent_year else None, download_href)
+                    parent_cache[parent] = cached
+
+                parent_year, download_href = cached
+                if not report_data['year'] and parent_year:
+                    report_data['year'] = parent_year
+                if download_href:
+                    report_data['pdf_url'] = _absolute(download_href, base_url)
+
+            if report_data['year']:
+                reports.append(report_data)
+
+        except UnicodeDecodeError:
+            raise
+        except Exception as e:
+            logger.warning(f"Error extracting report data: {e}")
+            continue
+
+    seen_years = set()
+    unique_reports = []
+    for report in reports:
+        if report['year'] not in seen_years:
+            seen_years.add(report['year'])
+            unique_reports.append(report)
+
+    logger.info(f"Extracted {len(unique_reports)} annual reports")
+    return unique_reports
+
+
+def parse_company_page(content: bytes, url: str, company_slug: str, base_url: str) -> Dict:
+    """
+    Parse a company page in one traversal
+
+    Args:
+        content: Raw HTML of the company page
+        url: Source URL of the page
+        company_slug: Company identifier in URL
+        base_url: Site root used to absolutize report links
+
+    Returns:
+        Dictionary with the same keys and values as AnnualReportsScraper.parse_company
+    """
+    for root in parse_html(content):
+        try:
+            return _extract_company(root, url, company_slug, base_url)
+        except UnicodeDecodeError:
+            continue  # Wrong encoding guess; BeautifulSoup also retries with the next one
+    return _extract_company(None, url, company_slug, base_url)
+
+
+def _extract_company(root, url: str, company_slug: str, base_url: str) -> Dict:
+    """Collect every field from a parsed tree in a single traversal"""
+    company_data = {
+        'source_url': url,
+        'slug': company_slug,
+        'name': None,
+        'ticker': None,
+        'exchange': None,
+        'industry': None,
+        'sector': None,
+        'description': None,
+        'employee_count': None,
+        'website': None,
+        'annual_reports': []
+    }
+
+    if root is None:
+        return company_data
+
+    h1 = overview = meta_desc = website_link = None
+    label_spans = {}
+    report_links = []
+
+    for element in root.iter(tag=etree.Element):
+        tag = element.tag
+        if tag == 'a':
+            href = element.get('href')
+            if href is not None and REPORT_HREF.search(href):
+                report_links.append(element)
+            if website_link is None:
+                string = node_string(element)
+                if string is not None and WEBSITE_TEXT.search(string):
+                    website_link = element
+        elif tag == 'span':
+            if len(label_spans) < len(LABEL_PATTERNS):
+                string = node_string(element)
+                if string is not None:
+                    for field, pattern in LABEL_PATTERNS:
+                        if field not in label_spans and pattern.search(string):
+                            label_spans[field] = element
+        elif tag == 'div':
+            if overview is None and OVERVIEW_CLASS.search(element.get('class') or ''):
+                overview = element
+        elif tag == 'h1':
+            if h1 is None:
+                h1 = element
+        elif tag == 'meta':
+            if meta_desc is None and element.get('name') == 'description':
+                meta_desc = element
+
+    if h1 is not None:
+        company_data['name'] = get_text(h1, strip=True)
+
+    for field, _ in LABEL_PATTERNS:
+        span = label_spans.get(field)
+        if span is not None:
+            value = next_sibling_string(span)
+            if value:
+                company_data[field] = value.strip()
+
+    if overview is not None:
+        paragraphs = list(overview.iter('p'))
+        if paragraphs:
+            company_data['description'] = ' '.join(get_text(p, strip=True) for p in paragraphs)
+
+    if not company_data['description'] and meta_desc is not None and meta_desc.get('content'):
+        company_data['description'] = meta_desc.get('content')
+
+    if website_link is not None and website_link.get('href'):
+        company_data['website'] = website_link.get('href')
+
+    company_data['annual_reports'] = _extract_annual_reports(report_links, base_url)
+    return company_data
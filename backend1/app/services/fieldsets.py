@@ -0,0 +1,57 @@
+"""
+Sparse Fieldsets
+Author: Osman Yildiz
+
+?fields=id,name,ticker limits a company, report or annual report response
+to those keys. The same names restrict the query (load_only), so columns
+that were not asked for, like a long description, are neither read nor
+serialized. The model's to_dict(fields=...) only touches requested
+attributes, so the skipped columns are never lazily loaded one row at a
+time.
+"""
+from typing import Optional, Tuple
+
+from backend1.app import db
+
+
+def requested_fields(args, model, extra: Tuple[str, ...] = ()) -> Optional[Tuple[str, ...]]:
+    """
+    Fields named by ?fields=
+
+    Args:
+        args: Request arguments
+        model: Model class with a FIELDS tuple (the keys of its to_dict)
+        extra: Non-column keys the endpoint can add, e.g. 'annual_reports'
+
+    Returns:
+        The requested names in output order, or None when ?fields= is absent
+
+    Raises:
+        ValueError: Empty list or unknown field
+    """
+    raw = args.get('fields')
+    if raw is None:
+        return None
+    names = {name.strip() for name in raw.split(',') if name.strip()}
+    available = model.FIELDS + tuple(extra)
+    if not names or names - set(available):
+        raise ValueError(f"fields must be a comma-separated list of: {', '.join(available)}")
+    return tuple(name for name in available if name in names)
+
+
+def load_only(model, fields: Optional[Tuple[str, ...]], *required):
+    """
+    Query options loading only the columns behind fields
+
+    Args:
+        model: Model class with a FIELDS tuple
+        fields: Result of requested_fields (None loads every column)
+        required: Columns the endpoint reads itself (sort keys, foreign keys)
+
+    Returns:
+        List of loader options for Query.options
+    """
+    if fields is None:
+        return []
+    columns = [getattr(model, name) for name in fields if name in model.FIELDS]
+    return [db.load_only(*columns, *required, model.id)]
@@ -0,0 +1,119 @@
+"""
+Raw HTML Archive for Scraped Pages
+Author: Osman Yildiz
+
+Keeps every fetched page gzip-compressed and content-addressed (SHA-256 of
+the raw body) with a SQLite index from URL to hash and fetch time. Parser
+fixes can then be applied by re-parsing the archive instead of re-crawling.
+"""
+import gzip
+import hashlib
+import os
+import sqlite3
+import threading
+import time
+from typing import Iterator, Optional, Tuple
+
+
+class HTMLArchive:
+    """Content-addressed, compressed store of raw page bodies"""
+
+    def __init__(self, directory: str, compresslevel: int = 6):
+        """
+        Args:
+            directory: Archive root; blobs live under objects/, the index in index.sqlite3
+            compresslevel: gzip compression level for new blobs
+        """
+        self.directory = directory
+        self.compresslevel = compresslevel
+        self._local = threading.local()
+
+        os.makedirs(os.path.join(directory, 'objects'), exist_ok=True)
+        with self._connection() as conn:
+            conn.execute(
+                'CREATE TABLE IF NOT EXISTS pages ('
+                ' url TEXT NOT NULL,'
+                ' sha256 TEXT NOT NULL,'
+                ' fetched_at REAL NOT NULL,'
+                ' PRIMARY KEY (url, sha256))'
+            )
+            conn.execute('CREATE INDEX IF NOT EXISTS ix_pages_url_fetched ON pages (url, fetched_at)')
+
+    def _connection(self) -> sqlite3.Connection:
+        """Return this thread's connection to the index"""
+        conn = getattr(self._local, 'conn', None)
+        if conn is None:
+            conn = sqlite3.connect(os.path.join(self.directory, 'index.sqlite3'), timeout=30)
+            conn.execute('PRAGMA journal_mode=WAL')
+            self._local.conn = conn
+        return conn
+
+    def _blob_path(self, digest: str) -> str:
+        return os.path.join(self.directory, 'objects', digest[:2], f'{digest}.html.gz')
+
+    def put(self, url: str, body: bytes, fetched_at: Optional[float] = None) -> str:
+        """
+        Archive a fetched page
+
+        Identical bodies are stored once; re-fetching an unchanged page only
+        refreshes its fetch time in the index.
+
+        Args:
+            url: URL the page was fetched from
+            body: Raw response body
+            fetched_at: Fetch time as a UNIX timestamp (defaults to now)
+
+        Returns:
+            SHA-256 hex digest of the body
+        """
+        digest = hashlib.sha256(body).hexdigest()
+        path = self._blob_path(digest)
+        if not os.path.exists(path):
+            os.makedirs(os.path.dirname(path), exist_ok=True)
+            tmp_path = f'{path}.tmp{os.getpid()}.{threading.get_ident()}'
+            with open(tmp_path, 'wb') as f:
+                f.write(gzip.compress(body, compresslevel=self.compresslevel))
+            os.replace(tmp_path, path)
+
+        with self._connection() as conn:
+            conn.execute(
+                'INSERT OR REPLACE INTO pages (url, sha256, fetched_at) VALUES (?, ?, ?)',
+                (url, digest, fetched_at if fetched_at is not None else time.time())
+            )
+        return digest
+
+    def get_blob(self, digest: str) -> Optional[bytes]:
+        """Return the raw body stored under a digest, or None"""
+        try:
+            with open(self._blob_path(digest), 'rb') as f:
+                return gzip.decompress(f.read())
+        except OSError:
+            return None
+
+    def latest(self, url: str) -> Optional[Tuple[str, float]]:
+        """Return (digest, fetched_at) of the most recent fetch of a URL"""
+        row = self._connection().execute(
+            'SELECT sha256, fetched_at FROM pages WHERE url = ? ORDER BY fetched_at DESC LIMIT 1',
+            (url,)
+        ).fetchone()
+        return (row[0], row[1]) if row else None
+
+    def get(self, url: str) -> Optional[bytes]:
+        """Return the most recently archived body for a URL, or None"""
+        entry = self.latest(url)
+        return self.get_blob(entry[0]) if entry else None
+
+    def urls(self, prefix: str = '') -> Iterator[str]:
+        """Iterate archived URLs starting with a prefix"""
+        rows = self._connection().execute(
+            'SELECT DISTINCT url FROM pages WHERE url >= ? AND url < ? ORDER BY url',
+            (prefix, prefix + '\U0010ffff')
+        )
+        for (url,) in rows:
+            yield url
+
+    def close(self):
+        conn = getattr(self._local, 'conn', None)
+        if conn is not None:
+            conn.close()
+            self._local.conn = None
@@ -0,0 +1,196 @@
+"""
+On-disk HTTP Cache for Scraper Page Fetches
+Author: Osman Yildiz
+
+Stores response bodies together with their ETag/Last-Modified validators so
+re-scrapes can send conditional GETs and reuse the stored body on 304.
+The cache is bounded in size and evicts least recently used entries.
+"""
+import hashlib
+import json
+import logging
+import os
+import threading
+import time
+from collections import OrderedDict
+from typing import Dict, Optional
+
+logger = logging.getLogger(__name__)
+
+
+class CachedResponse:
+    """A cached response body and the validators it was served with"""
+
+    def __init__(self, url: str, body: bytes, etag: Optional[str] = None,
+                 last_modified: Optional[str] = None, stored_at: Optional[float] = None):
+        self.url = url
+        self.body = body
+        self.etag = etag
+        self.last_modified = last_modified
+        self.stored_at = stored_at
+
+    def conditional_headers(self) -> Dict[str, str]:
+        """Request headers that let the server answer 304 Not Modified"""
+        headers = {}
+        if self.etag:
+            headers['If-None-Match'] = self.etag
+        if self.last_modified:
+            headers['If-Modified-Since'] = self.last_modified
+        return headers
+
+
+class HTTPCache:
+    """
+    Persistent, size-bounded LRU cache of HTTP responses
+
+    Each entry is a pair of files named after the SHA-256 of the URL: a
+    `.body` file with the raw response and a `.meta` JSON file with the
+    validators. File modification times record recency, so LRU order
+    survives restarts.
+    """
+
+    def __init__(self, directory: str, max_bytes: int = 256 * 1024 * 1024):
+        """
+        Args:
+            directory: Directory holding the cache files (created if missing)
+            max_bytes: Total size the cache is trimmed back to after each store
+        """
+        self.directory = directory
+        self.max_bytes = max_bytes
+        self.hits = 0
+        self.misses = 0
+        self.stores = 0
+        self.evictions = 0
+
+        self._lock = threading.Lock()
+        self._entries = OrderedDict()  # key -> size in bytes, least recent first
+        self._total_bytes = 0
+
+        os.makedirs(directory, exist_ok=True)
+        self._load_index()
+
+    def _load_index(self):
+        """Rebuild the in-memory LRU order from the files on disk"""
+        found = []
+        for filename in os.listdir(self.directory):
+            if not filename.endswith('.meta'):
+                continue
+            key = filename[:-len('.meta')]
+            try:
+                meta_stat = os.stat(self._path(key, 'meta'))
+                body_stat = os.stat(self._path(key, 'body'))
+            except OSError:
+                continue
+            found.append((meta_stat.st_mtime, key, meta_stat.st_size + body_stat.st_size))
+
+        for _, key, size in sorted(found):
+            self._entries[key] = size
+            self._total_bytes += size
+
+    @staticmethod
+    def _key(url: str) -> str:
+        return hashlib.sha256(url.encode('utf-8')).hexdigest()
+
+    def _path(self, key: str, kind: str) -> str:
+        return os.path.join(self.directory, f'{key}.{kind}')
+
+    def lookup(self, url: str) -> Optional[CachedResponse]:
+        """
+        Return the cached response for a URL, or None
+
+        Args:
+            url: Request URL
+        """
+        key = self._key(url)
+        try:
+            with open(self._path(key, 'meta'), 'r', encoding='utf-8') as f:
+                meta = json.load(f)
+            with open(self._path(key, 'body'), 'rb') as f:
+                body = f.read()
+        except (OSError, ValueError):
+            return None
+
+        return CachedResponse(url, body, meta.get('etag'), meta.get('last_modified'),
+                              meta.get('stored_at'))
+
+    def record_hit(self, url: str):
+        """Mark a cached entry as used after the server confirmed it (304)"""
+        key = self._key(url)
+        with self._lock:
+            self.hits += 1
+            if key in self._entries:
+                self._entries.move_to_end(key)
+        try:
+            os.utime(self._path(key, 'meta'))
+        except OSError:
+            pass
+
+    def store(self, url: str, headers, body: bytes) -> bool:
+        """
+        Store a response if it carries a validator
+
+        Args:
+            url: Request URL
+            headers: Response headers (case-insensitive mapping)
+            body: Response body
+
+        Returns:
+            True if the response was cached
+        """
+        etag = headers.get('ETag')
+        last_modified = headers.get('Last-Modified')
+        with self._lock:
+            self.misses += 1
+        if not etag and not last_modified:
+            return False
+
+        key = self._key(url)
+        meta = json.dumps({
+            'url': url,
+            'etag': etag,
+            'last_modified': last_modified,
+            'stored_at': time.time()
+        }).encode('utf-8')
+
+        try:
+            # Write the body first so a visible .meta always has its body
+            for kind, data in (('body', body), ('meta', meta)):
+                tmp_path = self._path(key, f'{kind}.tmp{threading.get_ident()}')
+                with open(tmp_path, 'wb') as f:
+                    f.write(data)
+                os.replace(tmp_path, self._path(key, kind))
+        except OSError as e:
+            logger.warning(f"Could not cache {url}: {e}")
+            return False
+
+        with self._lock:
+            self._total_bytes += len(body) + len(meta) - self._entries.pop(key, 0)
+            self._entries[key] = len(body) + len(meta)
+            self.stores += 1
+            self._evict()
+        return True
+
+    def _evict(self):
+        """Drop least recently used entries until the cache fits (lock held)"""
+        while self._total_bytes > self.max_bytes and len(self._entries) > 1:
+            key, size = self._entries.popitem(last=False)
+            self._total_bytes -= size
+            self.evictions += 1
+            for kind in ('meta', 'body'):
+                try:
+                    os.remove(self._path(key, kind))
+                except OSError:
+                    pass
+
+    def stats(self) -> Dict:
+        """Return cache counters and current size"""
+        with self._lock:
+            return {
+                'entries': len(self._entries),
+                'bytes': self._total_bytes,
+                'max_bytes': self.max_bytes,
+                'hits': self.hits,
+                'misses': self.misses,
+                'stores': self.stores,
+                'evictions': self.evictions
+            }
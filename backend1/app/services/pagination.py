@@ -0,0 +1,156 @@
+"""
+Keyset (Cursor) Pagination
+Author: Osman Yildiz
+
+List endpoints page with ?after=<cursor>&limit=<n>. A cursor is an opaque
+URL-safe token holding the sort key of the last row served. The next page
+is the rows after that key in the endpoint's unique sort order, such as
+(name, id). Every page, however deep, is then a single indexed range scan
+instead of an OFFSET scan plus a COUNT(*).
+
+Search results ranked by relevance have no stored sort key, so their
+cursors carry an offset instead. Such result sets are small.
+
+The total is only counted on request (?count=true) and is cached for
+COUNT_TTL seconds per database and filter set.
+"""
+import base64
+import json
+import threading
+import time
+from datetime import datetime
+from typing import List, Optional, Sequence, Tuple
+
+from backend1.app import db
+
+DEFAULT_LIMIT = 20
+MAX_LIMIT = 100
+
+# Seconds a counted total is reused
+COUNT_TTL = 30
+
+
+def wants_cursor(args) -> bool:
+    """Whether a request asks for cursor pagination (rather than page/per_page)"""
+    return 'after' in args or 'limit' in args
+
+
+def wants_count(args) -> bool:
+    return args.get('count', '').lower() in ('1', 'true', 'yes')
+
+
+def page_limit(args) -> int:
+    """?limit= clamped to 1..MAX_LIMIT"""
+    return min(max(args.get('limit', DEFAULT_LIMIT, type=int), 1), MAX_LIMIT)
+
+
+def encode_cursor(payload) -> str:
+    raw = json.dumps(payload, separators=(',', ':'), default=lambda value: value.isoformat())
+    return base64.urlsafe_b64encode(raw.encode()).decode().rstrip('=')
+
+
+def decode_cursor(token: str):
+    """
+    Payload of a cursor
+
+    Raises:
+        ValueError: Malformed cursor
+    """
+    try:
+        return json.loads(base64.urlsafe_b64decode(token + '=' * (-len(token) % 4)))
+    except (ValueError, TypeError):
+        raise ValueError('Invalid cursor')
+
+
+def keyset_page(query, order: Sequence, after: Optional[str], limit: int,
+                descending: bool = False) -> Tuple[List, Optional[str]]:
+    """
+    One page of a query in keyset order
+
+    Args:
+        query: Query for model instances, without an ORDER BY
+        order: Model columns forming a unique sort key, e.g. (Company.name, Company.id)
+        after: Cursor from the previous page, or None for the first page
+        limit: Page size
+        descending: Sort (and page) from the highest key down
+
+    Returns:
+        (items, cursor of the next page or None on the last page)
+
+    Raises:
+        ValueError: Malformed cursor
+    """
+    if after:
+        values = decode_cursor(after)
+        if not isinstance(values, list) or len(values) != len(order):
+            raise ValueError('Invalid cursor')
+        values = [datetime.fromisoformat(value) if isinstance(column.type, db.DateTime) and value is not None
+                  else value for column, value in zip(order, values)]
+        key, last = db.tuple_(*order), db.tuple_(*values)
+        query = query.filter(key < last if descending else key > last)
+
+    items = query.order_by(*(column.desc() if descending else column for column in order)).limit(limit + 1).all()
+    if len(items) <= limit:
+        return items, None
+    items = items[:limit]
+    return items, encode_cursor([getattr(items[-1], column.key) for column in order])
+
+
+def offset_page(query, after: Optional[str], limit: int) -> Tuple[List, Optional[str]]:
+    """
+    One page of an already ordered query, with an offset cursor
+
+    Returns:
+        (items, cursor of the next page or None on the last page)
+
+    Raises:
+        ValueError: Malformed cursor
+    """
+    offset = 0
+    if after:
+        payload = decode_cursor(after)
+        offset = payload.get('offset') if isinstance(payload, dict) else None
+        if not isinstance(offset, int) or offset < 0:
+            raise ValueError('Invalid cursor')
+
+    items = query.offset(offset).limit(limit + 1).all()
+    if len(items) <= limit:
+        return items, None
+    return items[:limit], encode_cursor({'offset': offset + limit})
+
+
+class _CountCache:
+    """Totals keyed by database and compiled count query"""
+
+    def __init__(self, ttl=COUNT_TTL):
+        self.ttl = ttl
+        self._entries = {}  # key -> (expires_at, total)
+        self._lock = threading.Lock()
+
+    def count(self, query) -> int:
+        query = query.order_by(None)
+        compiled = query.statement.compile(db.engine)
+        key = (str(db.engine.url), str(compiled), repr(sorted(compiled.params.items())))
+        now = time.monotonic()
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None and entry[0] > now:
+                return entry[1]
+        total = query.count()
+        with self._lock:
+            # Drop expired entries so distinct filters don't pile up
+            self._entries = {k: v for k, v in self._entries.items() if v[0] > now}
+            self._entries[key] = (now + self.ttl, total)
+        return total
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+
+
+count_cache = _CountCache()
+
+
+def cached_count(query) -> int:
+    """Total rows of a query, reused for COUNT_TTL seconds"""
+    return count_cache.count(query)
@@ -0,0 +1,146 @@
+"""
+Industry Peer Percentiles
+Author: Osman Yildiz
+
+Keeps, per industry (as classified by ComplianceAnalyzer._extract_industry)
+and control, a sorted list of every stored company score. A company's
+percentile rank is then two bisect lookups per control instead of a
+rescore of all its peers.
+
+The index lives in process memory (one per app) and follows the
+compliance_scores table incrementally: each lookup first applies the rows
+written since the last sync (from any process), moving the changed
+companies' scores between lists. Deleted companies are noticed through
+the row count and trigger a full rebuild.
+"""
+import threading
+from bisect import bisect_left, bisect_right, insort
+from datetime import datetime, timedelta
+from typing import Dict, Optional, Tuple
+
+from flask import current_app
+
+from backend1.app import db
+from backend1.app.models.company import Company
+from backend1.app.models.compliance_score import ComplianceScore
+from backend1.app.services.compliance_analyzer import ComplianceAnalyzer
+from backend1.app.services.compliance_history import SCORE_FIELDS, flatten, unflatten
+
+# Rows are re-read this far back on every sync, to cover transactions that
+# committed after a later-stamped one was already seen
+SYNC_OVERLAP = timedelta(seconds=60)
+
+
+class PeerIndex:
+    """Sorted per-industry score lists with incremental updates"""
+
+    def __init__(self):
+        self._analyzer = ComplianceAnalyzer()
+        self._lock = threading.Lock()
+        self._companies = {}  # company id -> (industry, scores tuple)
+        self._sorted = {}  # industry -> one sorted list per SCORE_FIELDS entry
+        self._synced_at = None
+
+    def industry_of(self, industry: Optional[str], sector: Optional[str]) -> str:
+        return self._analyzer._extract_industry({'industry': industry, 'sector': sector})
+
+    def update(self, company_id: int, industry: str, values: Tuple[int, ...]):
+        """Move a company's scores into its industry's lists"""
+        with self._lock:
+            self._update(company_id, industry, values)
+
+    def remove(self, company_id: int):
+        with self._lock:
+            self._remove(company_id)
+
+    def percentiles(self, industry: str, values: Tuple[int, ...]) -> Tuple[int, Dict]:
+        """
+        Percentile rank of scores within an industry
+
+        Counts peers below plus half of the peers with an equal score.
+
+        Returns:
+            (number of peers, {framework: {control: percentile}})
+        """
+        with self._lock:
+            columns = self._sorted.get(industry)
+            if not columns or not columns[0]:
+                return 0, unflatten(None for _ in SCORE_FIELDS)
+            peers = len(columns[0])
+            ranks = []
+            for column, value in zip(columns, values):
+                below = bisect_left(column, value)
+                equal = bisect_right(column, value, lo=below) - below
+                ranks.append(round(100.0 * (below + 0.5 * equal) / peers, 1))
+            return peers, unflatten(ranks)
+
+    def sync(self):
+        """Apply score rows written since the last sync; rebuild if rows were deleted"""
+        started = datetime.utcnow()
+        query = (db.session.query(ComplianceScore.company_id, ComplianceScore.scores,
+                                  Company.industry, Company.sector)
+                 .join(Company, Company.id == ComplianceScore.company_id))
+        rebuild = self._synced_at is None
+        if not rebuild:
+            query = query.filter(ComplianceScore.computed_at >= self._synced_at - SYNC_OVERLAP)
+
+        rows = query.all()
+        with self._lock:
+            if rebuild:
+                self._companies.clear()
+                self._sorted.clear()
+            for company_id, scores, industry, sector in rows:
+                self._update(company_id, self.industry_of(industry, sector), flatten(scores))
+            tracked = len(self._companies)
+
+        if not rebuild and db.session.query(db.func.count(ComplianceScore.company_id)).scalar() != tracked:
+            self._synced_at = None
+            return self.sync()
+        self._synced_at = started
+        return len(rows)
+
+    def reset(self):
+        with self._lock:
+            self._companies.clear()
+            self._sorted.clear()
+            self._synced_at = None
+
+    def _update(self, company_id, industry, values):
+        # Caller holds the lock
+        current = self._companies.get(company_id)
+        if current == (industry, values):
+            return
+        if current is not None:
+            self._remove(company_id)
+        columns = self._sorted.setdefault(industry, [[] for _ in SCORE_FIELDS])
+        for column, value in zip(columns, values):
+            insort(column, value)
+        self._companies[company_id] = (industry, values)
+
+    def _remove(self, company_id):
+        # Caller holds the lock
+        current = self._companies.pop(company_id, None)
+        if current is None:
+            return
+        industry, values = current
+        for column, value in zip(self._sorted[industry], values):
+            del column[bisect_left(column, value)]
+
+
+def get_peer_index() -> PeerIndex:
+    """The application's peer index, created on first use"""
+    return current_app.extensions.setdefault('peer_index', PeerIndex())
+
+
+def peer_percentiles(company: Company, scores: Dict) -> Tuple[Dict, Dict]:
+    """
+    Percentile rank of a company's scores among its industry peers
+
+    Returns:
+        Tuple of ({'industry', 'peer_count'}, {framework: {control: percentile}})
+    """
+    index = get_peer_index()
+    index.sync()
+    industry = index.industry_of(company.industry, company.sector)
+    peers, ranks = index.percentiles(industry, flatten(scores))
+    return {'industry': industry, 'peer_count': peers}, ranks
@@ -0,0 +1,85 @@
+"""
+Annual Report Counters
+Author: Osman Yildiz
+
+companies.report_count, latest_report_year and recent_report_count
+summarize each company's annual reports, so company lists can filter and
+sort on them without joining or loading the reports.
+
+compliance_scores.refresh stores them along with the scores, from the
+report rows it already loads. That covers:
+    - reports written through the ORM (rescored when the session commits)
+    - companies seeded with Core inserts
+
+The full-catalog rescore (compliance_rescore, `flask compliance rescore`)
+rewrites every counter that changed; run at the start of a year it moves
+the recent-report window along.
+"""
+from datetime import datetime
+from typing import Dict, Iterable, List
+
+from sqlalchemy.orm.attributes import set_committed_value
+
+from backend1.app import db
+from backend1.app.models.company import Company
+
+# Reports from this many years before the current one still count as recent
+# (the same window as the analyzer's company size heuristic)
+RECENT_YEARS = 2
+
+COUNTER_FIELDS = ('report_count', 'latest_report_year', 'recent_report_count')
+
+
+def counter_values(years: Iterable[int]) -> Dict:
+    """Counter column values for a company's report years"""
+    years = [year for year in years if year is not None]
+    since = datetime.now().year - RECENT_YEARS
+    return {
+        'report_count': len(years),
+        'latest_report_year': max(years, default=None),
+        'recent_report_count': sum(1 for year in years if year >= since),
+    }
+
+
+def store_counters(companies: List[Company], reports: Dict[int, list]) -> int:
+    """
+    Write the counters of companies whose values changed (does not commit)
+
+    Args:
+        companies: Company rows
+        reports: Report rows (with a year) by company id
+
+    Returns:
+        Number of companies updated
+    """
+    changed = []
+    for company in companies:
+        values = counter_values(report.year for report in reports.get(company.id, []))
+        if any(getattr(company, field) != value for field, value in values.items()):
+            changed.append((company, values))
+    if not changed:
+        return 0
+
+    write_counters({company.id: values for company, values in changed})
+    # Keep the loaded objects in step without marking them dirty
+    for company, values in changed:
+        for field, value in values.items():
+            set_committed_value(company, field, value)
+    return len(changed)
+
+
+def write_counters(values_by_company: Dict[int, Dict]):
+    """
+    Bulk UPDATE of counter values by company id (does not commit)
+
+    updated_at keeps its value, since a new report does not change the
+    company's own data.
+    """
+    table = Company.__table__
+    db.session.execute(
+        table.update()
+        .where(table.c.id == db.bindparam('company_id'))
+        .values(updated_at=table.c.updated_at,
+                **{field: db.bindparam(f'new_{field}') for field in COUNTER_FIELDS}),
+        [dict({f'new_{field}': value for field, value in values.items()}, company_id=company_id)
+         for company_id, values in values_by_company.items()])
@@ -0,0 +1,127 @@
+"""
+Staleness-driven Re-scrape Scheduler
+Author: Osman Yildiz
+
+Picks the companies scraped longest ago, re-scrapes them within a per-run
+budget and only writes to the database when the scraped content changed.
+
+Failed attempts (no slug, page gone, unparseable, store error) are
+recorded too, so a company that keeps failing moves to the back of the
+queue instead of taking the front of every run's budget. Companies with
+more consecutive failures come after those with fewer.
+"""
+import logging
+import time
+from datetime import datetime, timedelta
+from typing import Dict, List, Optional
+
+from backend1.app import db
+from backend1.app.models.company import Company
+from backend1.app.services.company_sync import mark_scrape_failed, mark_scraped, sync_company
+from backend1.app.services.scraper import AnnualReportsScraper
+
+logger = logging.getLogger(__name__)
+
+COMPANY_PATH = '/Company/'
+
+
+def company_slug(company: Company) -> Optional[str]:
+    """Return the AnnualReports.com slug a company was scraped from"""
+    _, sep, slug = (company.source_url or '').partition(COMPANY_PATH)
+    if not sep:
+        return None
+    return slug.strip('/') or None
+
+
+class RescrapeScheduler:
+    """Re-scrapes the stalest companies first"""
+
+    def __init__(self, scraper: AnnualReportsScraper, budget: int = 100,
+                 min_age: timedelta = timedelta(days=7)):
+        """
+        Args:
+            scraper: Scraper used for fetching
+            budget: Maximum number of companies re-scraped per run
+            min_age: Companies scraped more recently than this are skipped
+        """
+        self.scraper = scraper
+        self.budget = budget
+        self.min_age = min_age
+
+    def select_stale(self, now: Optional[datetime] = None) -> List[Company]:
+        """
+        Return up to `budget` companies not attempted within min_age
+
+        Never-attempted companies come first, then the fewest consecutive
+        failures, then the oldest attempt.
+        """
+        cutoff = (now or datetime.utcnow()) - self.min_age
+        attempted_at = Company.last_scrape_attempt_at
+        return Company.query.filter(
+            db.or_(attempted_at.is_(None), attempted_at < cutoff)
+        ).order_by(
+            attempted_at.is_(None).desc(),
+            Company.scrape_failures.asc(),
+            attempted_at.asc(),
+            Company.id.asc()
+        ).limit(self.budget).all()
+
+    def run(self, now: Optional[datetime] = None) -> Dict:
+        """
+        Re-scrape one budget's worth of stale companies
+
+        Changed companies are written and committed one at a time; unchanged
+        ones only get their last_scraped_at advanced and failed ones their
+        attempt time and failure count, in one statement each at the end of
+        the run.
+
+        Returns:
+            Counts of companies selected, pages fetched, and companies
+            changed, unchanged and failed, plus the run time in seconds
+        """
+        started = time.monotonic()
+        result = {'selected': 0, 'fetched': 0, 'changed': 0, 'unchanged': 0, 'failed': 0}
+
+        companies = {}
+        failed_ids = []
+        for company in self.select_stale(now):
+            slug = company_slug(company)
+            if slug:
+                companies[slug] = company
+            else:
+                logger.warning(f"Company {company.id} has no AnnualReports.com slug")
+                failed_ids.append(company.id)
+        result['selected'] = len(companies) + len(failed_ids)
+
+        unchanged_ids = []
+        for slug, company_data in self.scraper.scrape_many(list(companies)):
+            company = companies[slug]
+            if company_data is None or not company_data.get('name'):
+                failed_ids.append(company.id)
+                continue
+            result['fetched'] += 1
+
+            # Keep the stored URL so the page always maps back to this row
+            company_data['source_url'] = company.source_url
+            try:
+                _, changed = sync_company(company_data, company)
+                if changed:
+                    db.session.commit()
+                    result['changed'] += 1
+                else:
+                    unchanged_ids.append(company.id)
+            except Exception as e:
+                db.session.rollback()
+                logger.error(f"Error storing re-scraped company {slug}: {e}")
+                failed_ids.append(company.id)
+
+        if unchanged_ids or failed_ids:
+            mark_scraped(unchanged_ids)
+            mark_scrape_failed(failed_ids)
+            db.session.commit()
+        result['unchanged'] = len(unchanged_ids)
+        result['failed'] = len(failed_ids)
+        result['duration_seconds'] = round(time.monotonic() - started, 3)
+
+        logger.info(f"Re-scrape run: {result}")
+        return result
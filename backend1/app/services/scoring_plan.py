@@ -0,0 +1,190 @@
+"""
+Compliance Scoring Plan
+Author: Osman Yildiz
+
+The compliance frameworks, their controls and every weight, offset and
+cap live in a declarative spec (scoring_spec.json). The spec is compiled
+once into a ScoringPlan: flat per-control coefficient tables that score
+one company with a short loop, or a whole batch with a few NumPy array
+operations.
+
+Each control score is computed as
+
+    value = baseline                      (the industry's baseline column,
+                                           optionally scaled and truncated)
+    value = value * factor ...            (in the order of FACTORS)
+    value = min(int(value * weight), cap)
+    score = clip(value + variance + offset, score_floor, cap)
+
+where the factors are the company's size multiplier, report quality,
+maturity and industry boost. A new framework (e.g. NIST CSF) is a new
+entry under "frameworks"; it may reference the existing baseline columns
+or add its own to every industry. Frameworks and controls keep their
+spec order, so add new ones at the end.
+"""
+import hashlib
+import json
+import os
+from functools import lru_cache
+from typing import Dict, Optional
+
+import numpy as np
+
+DEFAULT_SPEC_PATH = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'scoring_spec.json')
+
+# Company factors a control may multiply by, in the order they are applied
+FACTORS = ('size', 'report_quality', 'maturity', 'industry_boost')
+
+CONTROL_FIELDS = {'name', 'baseline', 'baseline_scale', 'factors', 'weight', 'offset', 'cap'}
+
+
+class ScoringPlan:
+    """A compiled scoring spec"""
+
+    def __init__(self, spec: Dict):
+        """
+        Compile a spec
+
+        Args:
+            spec: Parsed scoring spec (see scoring_spec.json)
+
+        Raises:
+            ValueError: The spec is incomplete or inconsistent
+        """
+        try:
+            self._compile(spec)
+        except (KeyError, TypeError) as e:
+            raise ValueError(f'Invalid scoring spec: {e!r}') from e
+
+    def _compile(self, spec):
+        canonical = json.dumps(spec, sort_keys=True, separators=(',', ':'))
+        # Any edit to the spec changes the version, so stored scores get recomputed
+        self.version = f"{spec['version']}-{hashlib.sha256(canonical.encode()).hexdigest()[:8]}"
+        self.score_floor = int(spec['score_floor'])
+        self.size_multipliers = {size: float(value) for size, value in spec['size_multipliers'].items()}
+
+        industries = spec['industries']
+        self.industries = tuple(industry['name'] for industry in industries)
+        if len(set(self.industries)) != len(self.industries):
+            raise ValueError('Invalid scoring spec: duplicate industry names')
+        self.default_industry = spec['default_industry']
+        if self.default_industry not in self.industries:
+            raise ValueError(f'Invalid scoring spec: unknown default industry {self.default_industry!r}')
+        self.industry_keywords = tuple((industry['name'], tuple(industry['keywords'])) for industry in industries
+                                       if industry['name'] != self.default_industry)
+        self.industry_boost = np.array([float(industry.get('boost', 1.0)) for industry in industries])
+
+        controls, bases, masks, weights, offsets, caps, rows, framework_rows = [], [], [], [], [], [], [], []
+        self.frameworks = {}
+        self.averaged_frameworks = tuple(framework['name'] for framework in spec['frameworks']
+                                         if framework.get('averaged'))
+        for framework in spec['frameworks']:
+            name = framework['name']
+            if name in self.frameworks:
+                raise ValueError(f'Invalid scoring spec: duplicate framework {name!r}')
+            start = len(controls)
+            for control in framework['controls']:
+                unknown = set(control) - CONTROL_FIELDS
+                if unknown:
+                    raise ValueError(f"Invalid scoring spec: {name}.{control['name']} has unknown "
+                                     f"fields {', '.join(sorted(unknown))}")
+                factors = control.get('factors', [])
+                if [f for f in FACTORS if f in factors] != list(factors):
+                    raise ValueError(f"Invalid scoring spec: {name}.{control['name']} factors must be "
+                                     f"a subset of {', '.join(FACTORS)} in that order")
+
+                # Baseline per industry, scaled and truncated up front
+                scale = control.get('baseline_scale')
+                base = [industry['baselines'][control['baseline']] for industry in industries]
+                base = [int(value * scale) if scale is not None else int(value) for value in base]
+
+                controls.append((name, control['name']))
+                bases.append(base)
+                masks.append([factor in factors for factor in FACTORS])
+                weights.append(float(control['weight']))
+                offsets.append(int(control.get('offset', 0)))
+                caps.append(int(control['cap']))
+                rows.append((control['name'], tuple(base), tuple(FACTORS.index(f) for f in factors),
+                             weights[-1], offsets[-1], caps[-1]))
+            if len(controls) == start:
+                raise ValueError(f'Invalid scoring spec: framework {name!r} has no controls')
+            self.frameworks[name] = tuple(control for _, control in controls[start:])
+            framework_rows.append((name, tuple(rows[start:])))
+
+        # Flat coefficient tables, one column per control
+        self.controls = tuple(controls)
+        self.base = np.array(bases, dtype=np.int64).T  # industry x control
+        self.factor_mask = np.array(masks, dtype=bool).T  # factor x control
+        self.weight = np.array(weights)
+        self.offset = np.array(offsets, dtype=np.int64)
+        self.cap = np.array(caps, dtype=np.int64)
+        self._rows = tuple(framework_rows)  # per framework: (control, base by industry, factors, weight, offset, cap)
+
+    def classify(self, text: str) -> str:
+        """Industry whose keywords first match (lowercase) text, else the default"""
+        for industry, keywords in self.industry_keywords:
+            if any(word in text for word in keywords):
+                return industry
+        return self.default_industry
+
+    def score(self, industry: str, size: str, report_quality: float, maturity: float, variance: int) -> Dict:
+        """
+        Score one company
+
+        Returns:
+            {framework: {control: score}}
+        """
+        code = self.industries.index(industry)
+        factors = (self.size_multipliers.get(size, 1.0), report_quality, maturity,
+                   float(self.industry_boost[code]))
+        floor = self.score_floor
+        scores = {}
+        for framework, rows in self._rows:
+            controls = scores[framework] = {}
+            for control, base, used, weight, offset, cap in rows:
+                value = base[code]
+                for factor in used:
+                    value = value * factors[factor]
+                value = int(value * weight)
+                value = (cap if value > cap else value) + variance + offset
+                controls[control] = cap if value > cap else floor if value < floor else value
+        return scores
+
+    def score_batch(self, industry: np.ndarray, size_multiplier: np.ndarray, report_quality: np.ndarray,
+                    maturity: np.ndarray, variance: np.ndarray) -> np.ndarray:
+        """
+        Score many companies
+
+        Args:
+            industry: Industry codes (positions in self.industries)
+            size_multiplier, report_quality, maturity: Float arrays
+            variance: Integer array
+
+        Returns:
+            Int64 array of shape (companies, controls), columns in self.controls order
+        """
+        factors = (size_multiplier, report_quality, maturity, self.industry_boost[industry])
+        value = self.base[industry].astype(np.float64)
+        for mask, factor in zip(self.factor_mask, factors):
+            # Multiplying by 1.0 is exact, so unused factors change nothing
+            value = value * np.where(mask, factor[:, None], 1.0)
+        value = np.minimum((value * self.weight).astype(np.int64), self.cap)
+        return np.clip(value + variance[:, None] + self.offset, self.score_floor, self.cap)
+
+    def nest(self, row) -> Dict:
+        """{framework: {control: value}} from one value per control"""
+        nested = {framework: {} for framework in self.frameworks}
+        for (framework, control), value in zip(self.controls, row):
+            nested[framework][control] = value
+        return nested
+
+
+def load_spec(path: Optional[str] = None) -> Dict:
+    with open(path or DEFAULT_SPEC_PATH, encoding='utf-8') as f:
+        return json.load(f)
+
+
+@lru_cache(maxsize=None)
+def default_plan() -> ScoringPlan:
+    """The plan compiled from scoring_spec.json (compiled once per process)"""
+    return ScoringPlan(load_spec())
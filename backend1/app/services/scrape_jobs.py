@@ -0,0 +1,209 @@
+"""
+Background Batch Scrape Jobs
+Author: Osman Yildiz
+
+Jobs and their per-slug results are stored in the database. A bounded
+thread pool per process works through them; every finished slug is
+committed, so a restarted process resumes a job where it stopped. A job is
+claimed with a conditional UPDATE and kept alive with a heartbeat, so with
+several server processes each job runs in exactly one of them.
+"""
+import logging
+import os
+import socket
+import threading
+from concurrent.futures import Future, ThreadPoolExecutor
+from datetime import datetime, timedelta
+from typing import List, Optional
+
+from backend1.app import db
+from backend1.app.models.scrape_job import ScrapeJob, ScrapeJobItem
+from backend1.app.services.company_sync import find_company, mark_scraped, sync_company
+
+logger = logging.getLogger(__name__)
+
+
+def create_job(slugs: List[str], force_update: bool = False, user_id: Optional[int] = None) -> ScrapeJob:
+    """
+    Persist a new job with one pending item per unique slug
+
+    Args:
+        slugs: Company slugs to scrape
+        force_update: Re-scrape companies that are already stored
+        user_id: Submitting user
+
+    Returns:
+        The committed ScrapeJob
+    """
+    job = ScrapeJob(force_update=force_update, created_by=user_id)
+    for slug in dict.fromkeys(slugs):
+        job.items.append(ScrapeJobItem(slug=slug))
+    db.session.add(job)
+    db.session.commit()
+    return job
+
+
+class ScrapeJobRunner:
+    """Bounded worker pool processing scrape jobs for one Flask app"""
+
+    def __init__(self, app, max_workers: int = 2, stale_after: timedelta = timedelta(minutes=5)):
+        """
+        Args:
+            app: Flask app whose database holds the jobs
+            max_workers: Jobs processed concurrently in this process
+            stale_after: A running job without heartbeat for this long is taken over
+        """
+        self.app = app
+        self.stale_after = stale_after
+        self.worker_id = f"{socket.gethostname()}:{os.getpid()}"
+        self._executor = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix='scrape-job')
+        self._futures = {}
+        self._lock = threading.Lock()
+
+    def submit(self, job_id: int) -> Future:
+        """Queue a job for processing in this process"""
+        with self._lock:
+            future = self._futures.get(job_id)
+            if future is None or future.done():
+                future = self._executor.submit(self._run, job_id)
+                self._futures[job_id] = future
+            return future
+
+    def wait(self, job_id: int, timeout: Optional[float] = None):
+        """Block until a job submitted in this process has finished"""
+        future = self._futures.get(job_id)
+        if future is not None:
+            future.result(timeout)
+
+    def resume(self) -> List[int]:
+        """Submit queued jobs and running jobs whose worker went away"""
+        stale = datetime.utcnow() - self.stale_after
+        jobs = ScrapeJob.query.filter(db.or_(
+            ScrapeJob.status == 'queued',
+            db.and_(ScrapeJob.status == 'running',
+                    db.or_(ScrapeJob.heartbeat_at.is_(None), ScrapeJob.heartbeat_at < stale))
+        )).order_by(ScrapeJob.id).all()
+
+        job_ids = [job.id for job in jobs]
+        for job_id in job_ids:
+            self.submit(job_id)
+        if job_ids:
+            logger.info(f"Resuming scrape jobs {job_ids}")
+        return job_ids
+
+    def _claim(self, job_id: int) -> bool:
+        """Atomically take ownership of a job that is queued or abandoned"""
+        now = datetime.utcnow()
+        result = db.session.execute(
+            db.update(ScrapeJob)
+            .where(ScrapeJob.id == job_id)
+            .where(db.or_(
+                ScrapeJob.status == 'queued',
+                db.and_(ScrapeJob.status == 'running', ScrapeJob.worker == self.worker_id),
+                db.and_(ScrapeJob.status == 'running',
+                        db.or_(ScrapeJob.heartbeat_at.is_(None),
+                               ScrapeJob.heartbeat_at < now - self.stale_after))
+            ))
+            .values(status='running', worker=self.worker_id, heartbeat_at=now,
+                    started_at=db.func.coalesce(ScrapeJob.started_at, now))
+        )
+        db.session.commit()
+        return result.rowcount == 1
+
+    def _run(self, job_id: int):
+        with self.app.app_context():
+            try:
+                if not self._claim(job_id):
+                    return
+                self.process(job_id)
+            except Exception as e:
+                db.session.rollback()
+                logger.error(f"Scrape job {job_id} aborted: {e}")
+            finally:
+                db.session.remove()
+
+    def process(self, job_id: int):
+        """Scrape every pending item of a claimed job (runs in an app context)"""
+        from backend1.app.services.scraper import get_scraper
+
+        scraper = get_scraper()
+        job = db.session.get(ScrapeJob, job_id)
+        pending = {item.slug: item for item in job.items if item.status == 'pending'}
+
+        to_scrape = []
+        for slug, item in pending.items():
+            existing = find_company(scraper.company_url(slug))
+            if existing and not job.force_update:
+                self._finish(item, 'skipped', existing.id)
+            else:
+                to_scrape.append(slug)
+        db.session.commit()
+
+        for slug, company_data in scraper.scrape_many(to_scrape):
+            item = pending[slug]
+            try:
+                if not company_data or not company_data.get('name'):
+                    self._finish(item, 'failed', error='Failed to scrape company data')
+                else:
+                    existing = find_company(company_data['source_url'])
+                    company, changed = sync_company(company_data, existing)
+                    if not changed:
+                        mark_scraped([company.id])
+                    status = 'updated' if existing and changed else 'unchanged' if existing else 'created'
+                    self._finish(item, status, company.id)
+            except Exception as e:
+                db.session.rollback()
+                self._finish(item, 'failed', error=str(e)[:500])
+
+            # Every finished slug is durable; a restart only redoes pending ones
+            job.heartbeat_at = datetime.utcnow()
+            db.session.commit()
+
+        job.status = 'completed'
+        job.finished_at = datetime.utcnow()
+        job.heartbeat_at = job.finished_at
+        db.session.commit()
+        logger.info(f"Scrape job {job_id} completed: {job.progress()['by_status']}")
+
+    @staticmethod
+    def _finish(item: ScrapeJobItem, status: str, company_id: Optional[int] = None,
+                error: Optional[str] = None):
+        item.status = status
+        item.company_id = company_id
+        item.error = error
+        item.finished_at = datetime.utcnow()
+
+    def shutdown(self, wait: bool = True):
+        self._executor.shutdown(wait=wait)
+
+
+def init_app(app):
+    """
+    Attach a job runner to the app
+
+    Unfinished jobs are resumed on the first request a process serves, so
+    CLI commands such as migrations never start scraping.
+    """
+    runner = ScrapeJobRunner(app, max_workers=app.config.get('SCRAPE_JOB_WORKERS', 2))
+    app.extensions['scrape_jobs'] = runner
+    resumed = threading.Event()
+
+    @app.before_request
+    def resume_scrape_jobs():
+        if resumed.is_set() or not app.config.get('SCRAPE_JOB_RESUME', True):
+            return
+        resumed.set()
+        try:
+            runner.resume()
+        except Exception as e:
+            db.session.rollback()
+            logger.error(f"Could not resume scrape jobs: {e}")
+
+    return runner
+
+
+def get_runner() -> ScrapeJobRunner:
+    """Return the job runner of the current app"""
+    from flask import current_app
+    return current_app.extensions['scrape_jobs']
+
@@ -6,11 +6,25 @@ This module provides functionality to scrape company data and annual reports
 from AnnualReports.com.
 """
 import requests
+from requests.adapters import HTTPAdapter
+from urllib3.connectionpool import HTTPConnectionPool, HTTPSConnectionPool
+from urllib3.util.retry import Retry
 from bs4 import BeautifulSoup
+from backend1.app.services.http_cache import CachedResponse, HTTPCache
+from backend1.app.services.html_archive import HTMLArchive
+from backend1.app.services.fast_parser import parse_company_page
+from concurrent.futures import ProcessPoolExecutor
+import asyncio
+import os
+import queue
+import threading
 import time
 import re
-from datetime import datetime
-from typing import Dict, List, Optional
+import weakref
+from datetime import datetime, timezone
+from email.utils import parsedate_to_datetime
+from typing import Dict, Iterable, Iterator, List, Optional, Tuple
+from urllib.parse import urlparse
 import logging
 
 # Configure logging
@@ -18,6 +32,129 @@ logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger(__name__)
 
 
+class TokenBucket:
+    """
+    Token bucket pacing requests to a single host
+    
+    Callers reserve a token and sleep for the returned wait time, so the same
+    bucket serves blocking and asyncio callers. Throttling responses halve the
+    refill rate and push the bucket into debt for the server-requested delay;
+    successful responses restore the rate gradually (AIMD).
+    """
+    
+    def __init__(self, rate: float, capacity: float = 1.0, min_rate: float = 0.05):
+        """
+        Args:
+            rate: Tokens added per second (requests per second when saturated)
+            capacity: Maximum burst size
+            min_rate: Floor the adaptive rate never drops below
+        """
+        self.base_rate = rate
+        self.rate = rate
+        self.capacity = capacity
+        self.min_rate = min(min_rate, rate)
+        self.tokens = capacity
+        self.updated = time.monotonic()
+        self._lock = threading.Lock()
+    
+    def reserve(self) -> float:
+        """Take a token and return the number of seconds to wait before using it"""
+        with self._lock:
+            now = time.monotonic()
+            self.tokens = min(self.capacity, self.tokens + (now - self.updated) * self.rate)
+            self.updated = now
+            self.tokens -= 1
+            if self.tokens >= 0:
+                return 0.0
+            return -self.tokens / self.rate
+    
+    def penalize(self, delay: float):
+        """Back off after a 429/503: slow down and block for at least `delay` seconds"""
+        with self._lock:
+            self.rate = max(self.min_rate, self.rate / 2)
+            self.tokens = min(self.tokens, -delay * self.rate)
+    
+    def reward(self):
+        """Recover a tenth of the base rate after a successful response"""
+        with self._lock:
+            self.rate = min(self.base_rate, self.rate + self.base_rate * 0.1)
+
+
+class PoolStats:
+    """Thread-safe connection pool counters shared by an adapter and its pools"""
+    
+    def __init__(self):
+        self.requests = 0
+        self.new_connections = 0
+        self.in_flight = 0
+        self._lock = threading.Lock()
+    
+    def add(self, field: str, amount: int = 1):
+        with self._lock:
+            setattr(self, field, getattr(self, field) + amount)
+    
+    def snapshot(self) -> Dict:
+        with self._lock:
+            return {
+                'requests': self.requests,
+                'hits': max(0, self.requests - self.new_connections),
+                'new_connections': self.new_connections,
+                'in_flight': self.in_flight
+            }
+
+
+def _counting_pool(pool_class, stats: PoolStats):
+    """Subclass a urllib3 pool so every socket it opens is counted"""
+    class CountingConnection(pool_class.ConnectionCls):
+        def connect(self):
+            stats.add('new_connections')
+            return super().connect()
+    
+    class CountingPool(pool_class):
+        ConnectionCls = CountingConnection
+    
+    CountingPool.__name__ = f'Counting{pool_class.__name__}'
+    return CountingPool
+
+
+class PooledHTTPAdapter(HTTPAdapter):
+    """
+    HTTP adapter with keep-alive pooling, connection-level retries and statistics
+    
+    Only connection and read errors are retried here; throttling statuses
+    (429/503) are left to the scraper so they feed its token buckets.
+    """
+    
+    def __init__(self, pool_size=10, retries=3, **kwargs):
+        self.stats = PoolStats()
+        max_retries = Retry(
+            total=retries,
+            connect=retries,
+            read=retries,
+            status=0,
+            backoff_factor=0.3,
+            allowed_methods=frozenset(['GET', 'HEAD']),
+            raise_on_status=False
+        )
+        super().__init__(pool_connections=pool_size, pool_maxsize=pool_size,
+                         max_retries=max_retries, **kwargs)
+    
+    def init_poolmanager(self, *args, **kwargs):
+        super().init_poolmanager(*args, **kwargs)
+        self.poolmanager.pool_classes_by_scheme = {
+            'http': _counting_pool(HTTPConnectionPool, self.stats),
+            'https': _counting_pool(HTTPSConnectionPool, self.stats)
+        }
+    
+    def send(self, request, **kwargs):
+        self.stats.add('requests')
+        self.stats.add('in_flight')
+        try:
+            return super().send(request, **kwargs)
+        finally:
+            self.stats.add('in_flight', -1)
+
+
 class AnnualReportsScraper:
     """Scraper for AnnualReports.com"""
     
@@ -26,40 +163,296 @@ class AnnualReportsScraper:
         'User-Agent': 'Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/91.0.4472.124 Safari/537.36'
     }
     
-    def __init__(self, rate_limit_delay=1.0):
+    # Responses that mean "slow down" rather than "failed"
+    RETRY_STATUSES = (429, 503)
+    MAX_BACKOFF = 60.0
+    
+    def __init__(self, rate_limit_delay=1.0, max_concurrency=4, max_retries=3, timeout=10,
+                 pool_size=10, pool_retries=3, cache: Optional[HTTPCache] = None,
+                 archive: Optional[HTMLArchive] = None, replay=False, parser='lxml',
+                 base_url: Optional[str] = None):
         """
         Initialize the scraper
         
         Args:
-            rate_limit_delay: Delay in seconds between requests to respect rate limiting
+            rate_limit_delay: Minimum seconds between requests to the same host
+            max_concurrency: Maximum concurrent connections in async/batch mode
+            max_retries: Retries for throttled (429/503) responses
+            timeout: Per-request timeout in seconds
+            pool_size: Keep-alive connections kept per host
+            pool_retries: Connection-level retries done by the HTTP adapter
+            cache: Optional on-disk HTTP cache used for conditional GETs
+            archive: Optional raw HTML archive every fetched page is written to
+            replay: Serve pages from the archive only, never touching the network
+            parser: 'lxml' for the single-pass parser, 'soup' for the BeautifulSoup reference
+            base_url: Site root to scrape instead of BASE_URL (e.g. a local mirror)
         """
+        if replay and archive is None:
+            raise ValueError('Replay mode requires an archive')
+        
         self.rate_limit_delay = rate_limit_delay
+        self.max_concurrency = max(1, max_concurrency)
+        self.max_retries = max_retries
+        self.timeout = timeout
+        self.pool_size = max(pool_size, self.max_concurrency)
+        self.cache = cache
+        self.archive = archive
+        self.replay = replay
+        self.parser = parser
+        if base_url:
+            self.BASE_URL = base_url.rstrip('/')
+        
+        self.adapter = PooledHTTPAdapter(pool_size=self.pool_size, retries=pool_retries)
         self.session = requests.Session()
         self.session.headers.update(self.HEADERS)
+        self.session.headers['Connection'] = 'keep-alive'
+        self.session.mount('https://', self.adapter)
+        self.session.mount('http://', self.adapter)
+        
+        self._buckets = {}
+        self._buckets_lock = threading.Lock()
+        self._slots = weakref.WeakKeyDictionary()
     
-    def _make_request(self, url: str) -> Optional[BeautifulSoup]:
+    def pool_stats(self) -> Dict:
+        """Return connection pool statistics for this scraper's session"""
+        stats = self.adapter.stats.snapshot()
+        stats['pool_size'] = self.pool_size
+        if self.cache:
+            stats['cache'] = self.cache.stats()
+        return stats
+    
+    def _bucket_for(self, url: str) -> Optional[TokenBucket]:
+        """Return the token bucket for the URL's host (None when rate limiting is off)"""
+        if not self.rate_limit_delay or self.rate_limit_delay <= 0:
+            return None
+        host = urlparse(url).netloc
+        with self._buckets_lock:
+            bucket = self._buckets.get(host)
+            if bucket is None:
+                bucket = TokenBucket(rate=1.0 / self.rate_limit_delay)
+                self._buckets[host] = bucket
+            return bucket
+    
+    def _retry_delay(self, response: requests.Response, attempt: int) -> float:
+        """Delay before retrying a throttled response, honoring Retry-After"""
+        retry_after = response.headers.get('Retry-After')
+        if retry_after:
+            try:
+                return min(self.MAX_BACKOFF, max(0.0, float(retry_after)))
+            except ValueError:
+                try:
+                    retry_at = parsedate_to_datetime(retry_after)
+                    if retry_at.tzinfo is None:
+                        retry_at = retry_at.replace(tzinfo=timezone.utc)
+                    delay = (retry_at - datetime.now(timezone.utc)).total_seconds()
+                    return min(self.MAX_BACKOFF, max(0.0, delay))
+                except (TypeError, ValueError):
+                    pass
+        return min(self.MAX_BACKOFF, max(self.rate_limit_delay or 0, 0.5) * (2 ** attempt))
+    
+    def _should_retry(self, url: str, response: requests.Response, bucket: Optional[TokenBucket],
+                      attempt: int) -> Optional[float]:
         """
-        Make a GET request and return parsed HTML
+        Decide whether a response must be retried
+        
+        Returns:
+            Seconds to wait before the retry, or None if the response is final
+        """
+        if response.status_code not in self.RETRY_STATUSES or attempt >= self.max_retries:
+            return None
+        
+        delay = self._retry_delay(response, attempt)
+        logger.warning(f"Throttled ({response.status_code}) on {url}, retrying in {delay:.1f}s")
+        if bucket:
+            bucket.penalize(delay)
+        return delay
+    
+    def _get(self, url: str) -> Tuple[requests.Response, Optional[CachedResponse]]:
+        """Send one GET, made conditional when the cache holds a copy of the page"""
+        cached = self.cache.lookup(url) if self.cache else None
+        headers = cached.conditional_headers() if cached else None
+        return self.session.get(url, timeout=self.timeout, headers=headers), cached
+    
+    def _read_body(self, url: str, response: requests.Response,
+                   cached: Optional[CachedResponse]) -> bytes:
+        """Return the page body, reusing the cached copy on 304 Not Modified"""
+        if response.status_code == 304 and cached is not None:
+            logger.info(f"Not modified: {url}")
+            self.cache.record_hit(url)
+            return cached.body
+        
+        response.raise_for_status()
+        if self.cache:
+            self.cache.store(url, response.headers, response.content)
+        if self.archive:
+            self.archive.put(url, response.content)
+        return response.content
+    
+    def _replay(self, url: str) -> Optional[bytes]:
+        """Serve a page from the archive without touching the network"""
+        content = self.archive.get(url)
+        if content is None:
+            logger.warning(f"Not in archive: {url}")
+        return content
+    
+    def _fetch(self, url: str) -> Optional[bytes]:
+        """
+        Fetch a URL, pacing by host and retrying throttled responses
         
         Args:
             url: URL to fetch
             
         Returns:
-            BeautifulSoup object or None if request failed
+            Response body or None if request failed
         """
+        if self.replay:
+            return self._replay(url)
+        
+        bucket = self._bucket_for(url)
         try:
             logger.info(f"Fetching: {url}")
-            time.sleep(self.rate_limit_delay)  # Rate limiting
-            
-            response = self.session.get(url, timeout=10)
-            response.raise_for_status()
-            
-            return BeautifulSoup(response.content, 'lxml')
+            for attempt in range(self.max_retries + 1):
+                if bucket:
+                    time.sleep(bucket.reserve())
+                
+                response, cached = self._get(url)
+                delay = self._should_retry(url, response, bucket, attempt)
+                if delay is not None:
+                    if not bucket:
+                        time.sleep(delay)
+                    continue
+                
+                content = self._read_body(url, response, cached)
+                if bucket:
+                    bucket.reward()
+                return content
         
         except requests.RequestException as e:
             logger.error(f"Error fetching {url}: {e}")
             return None
     
+    def _connection_slots(self) -> asyncio.Semaphore:
+        """Semaphore bounding concurrent connections for the running event loop"""
+        loop = asyncio.get_running_loop()
+        slots = self._slots.get(loop)
+        if slots is None:
+            slots = asyncio.Semaphore(self.max_concurrency)
+            self._slots[loop] = slots
+        return slots
+    
+    async def _afetch(self, url: str) -> Optional[bytes]:
+        """
+        Async counterpart of _fetch
+        
+        All blocking I/O runs on the loop's executor: the request, and the
+        cache and archive reads and writes, so none of them stall the other
+        fetches in flight on the loop.
+        """
+        loop = asyncio.get_running_loop()
+        if self.replay:
+            return await loop.run_in_executor(None, self._replay, url)
+        
+        bucket = self._bucket_for(url)
+        
+        async with self._connection_slots():
+            try:
+                logger.info(f"Fetching: {url}")
+                for attempt in range(self.max_retries + 1):
+                    if bucket:
+                        await asyncio.sleep(bucket.reserve())
+                    
+                    response, cached = await loop.run_in_executor(None, self._get, url)
+                    delay = self._should_retry(url, response, bucket, attempt)
+                    if delay is not None:
+                        if not bucket:
+                            await asyncio.sleep(delay)
+                        continue
+                    
+                    content = await loop.run_in_executor(None, self._read_body, url, response, cached)
+                    if bucket:
+                        bucket.reward()
+                    return content
+            
+            except requests.RequestException as e:
+                logger.error(f"Error fetching {url}: {e}")
+                return None
+    
+    def _make_request(self, url: str) -> Optional[BeautifulSoup]:
+        """
+        Make a GET request and return parsed HTML
+        
+        Args:
+            url: URL to fetch
+            
+        Returns:
+            BeautifulSoup object or None if request failed
+        """
+        content = self._fetch(url)
+        if content is None:
+            return None
+        return BeautifulSoup(content, 'lxml')
+    
+    def fetch_many(self, urls: Iterable[str]) -> Iterator[Tuple[str, Optional[bytes]]]:
+        """
+        Fetch URLs concurrently, yielding (url, content) pairs as they complete
+        
+        Runs an asyncio event loop on a background thread with at most
+        `max_concurrency` requests in flight. Results are handed over through a
+        bounded queue, so a slow consumer applies backpressure to the fetchers.
+        Closing the generator early stops scheduling new requests.
+        
+        Args:
+            urls: URLs to fetch (consumed lazily)
+            
+        Yields:
+            Tuples of (url, content), content is None if the fetch failed
+        """
+        results = queue.Queue(maxsize=self.max_concurrency * 2)
+        stop = threading.Event()
+        done = object()
+        pending = iter(urls)
+        
+        async def worker():
+            loop = asyncio.get_running_loop()
+            for url in pending:
+                if stop.is_set():
+                    return
+                content = await self._afetch(url)
+                await loop.run_in_executor(None, results.put, (url, content))
+        
+        async def run_all():
+            await asyncio.gather(*(worker() for _ in range(self.max_concurrency)))
+        
+        def runner():
+            try:
+                asyncio.run(run_all())
+            except Exception as e:
+                logger.error(f"Batch fetch aborted: {e}")
+            finally:
+                results.put(done)
+        
+        thread = threading.Thread(target=runner, name='scraper-fetch', daemon=True)
+        thread.start()
+        
+        try:
+            while True:
+                item = results.get()
+                if item is done:
+                    break
+                yield item
+        finally:
+            stop.set()
+            # Unblock workers still waiting to hand over results
+            while thread.is_alive():
+                try:
+                    results.get(timeout=0.1)
+                except queue.Empty:
+                    pass
+    
+    def company_url(self, company_slug: str) -> str:
+        """Return the AnnualReports.com URL for a company slug"""
+        return f"{self.BASE_URL}/Company/{company_slug}"
+    
     def scrape_company(self, company_slug: str) -> Optional[Dict]:
         """
         Scrape company information from a company page
@@ -70,11 +463,60 @@ class AnnualReportsScraper:
         Returns:
             Dictionary containing company data or None if scraping failed
         """
-        url = f"{self.BASE_URL}/Company/{company_slug}"
-        soup = self._make_request(url)
-        
-        if not soup:
+        content = self._fetch(self.company_url(company_slug))
+        if content is None:
+            return None
+        return self.parse_company(content, company_slug)
+    
+    async def ascrape_company(self, company_slug: str) -> Optional[Dict]:
+        """Async version of scrape_company"""
+        content = await self._afetch(self.company_url(company_slug))
+        if content is None:
             return None
+        return self.parse_company(content, company_slug)
+    
+    def scrape_many(self, slugs: Iterable[str]) -> Iterator[Tuple[str, Optional[Dict]]]:
+        """
+        Scrape many companies concurrently, yielding results as they complete
+        
+        Args:
+            slugs: Company slugs to scrape
+            
+        Yields:
+            Tuples of (slug, company_data), company_data is None on failure
+        """
+        prefix = self.company_url('')
+        urls = (self.company_url(slug) for slug in slugs)
+        
+        for url, content in self.fetch_many(urls):
+            slug = url[len(prefix):]
+            if content is None:
+                yield slug, None
+            else:
+                yield slug, self.parse_company(content, slug)
+    
+    def parse_company(self, content: bytes, company_slug: str) -> Optional[Dict]:
+        """
+        Parse a fetched company page
+        
+        Args:
+            content: Raw HTML of the company page
+            company_slug: Company identifier in URL
+            
+        Returns:
+            Dictionary containing company data or None if parsing failed
+        """
+        url = self.company_url(company_slug)
+        if self.parser == 'lxml':
+            try:
+                company_data = parse_company_page(content, url, company_slug, self.BASE_URL)
+                logger.info(f"Successfully scraped company: {company_data['name']}")
+                return company_data
+            except Exception as e:
+                logger.error(f"Error parsing company data for {company_slug}: {e}")
+                return None
+        
+        soup = BeautifulSoup(content, 'lxml')
         
         try:
             company_data = {
@@ -255,12 +697,34 @@ class AnnualReportsScraper:
         Returns:
             List of company results
         """
-        url = f"{self.BASE_URL}/Companies?search={query}"
-        soup = self._make_request(url)
-        
-        if not soup:
+        content = self._fetch(self.search_url(query))
+        if content is None:
             return []
+        return self.parse_search_results(content, query)
+    
+    async def asearch_companies(self, query: str) -> List[Dict]:
+        """Async version of search_companies"""
+        content = await self._afetch(self.search_url(query))
+        if content is None:
+            return []
+        return self.parse_search_results(content, query)
+    
+    def search_url(self, query: str) -> str:
+        """Return the AnnualReports.com search URL for a query"""
+        return f"{self.BASE_URL}/Companies?search={query}"
+    
+    def parse_search_results(self, content: bytes, query: str) -> List[Dict]:
+        """
+        Parse a fetched search results page
         
+        Args:
+            content: Raw HTML of the search page
+            query: Query the page was fetched for (used for logging)
+            
+        Returns:
+            List of company results
+        """
+        soup = BeautifulSoup(content, 'lxml')
         companies = []
         
         try:
@@ -299,6 +763,95 @@ class AnnualReportsScraper:
             return []
 
 
+# Process-wide scraper registry, keyed by PID so forked workers never share sockets
+_scrapers = {}
+_scrapers_lock = threading.Lock()
+
+
+def _scraper_settings() -> Dict:
+    """Read scraper settings from the Flask app config, falling back to Config"""
+    from flask import current_app, has_app_context
+    from backend1.config import Config
+    
+    source = current_app.config if has_app_context() else vars(Config)
+    cache_dir = source.get('SCRAPER_CACHE_DIR')
+    archive_dir = source.get('SCRAPER_ARCHIVE_DIR')
+    return {
+        'rate_limit_delay': source.get('SCRAPER_RATE_LIMIT_DELAY', 1.0),
+        'max_concurrency': source.get('SCRAPER_MAX_CONCURRENCY', 4),
+        'pool_size': source.get('SCRAPER_POOL_SIZE', 10),
+        'pool_retries': source.get('SCRAPER_POOL_RETRIES', 3),
+        'cache': HTTPCache(cache_dir, source.get('SCRAPER_CACHE_MAX_BYTES', 256 * 1024 * 1024))
+                 if cache_dir else None,
+        'archive': HTMLArchive(archive_dir) if archive_dir else None,
+        'parser': source.get('SCRAPER_PARSER', 'lxml'),
+        'base_url': source.get('SCRAPER_BASE_URL'),
+    }
+
+
+def get_scraper() -> AnnualReportsScraper:
+    """
+    Return the shared scraper for this process
+    
+    The scraper (and its pooled session) is created lazily on first use in
+    each worker process and reused by every later caller.
+    """
+    pid = os.getpid()
+    scraper = _scrapers.get(pid)
+    if scraper is None:
+        with _scrapers_lock:
+            scraper = _scrapers.get(pid)
+            if scraper is None:
+                scraper = AnnualReportsScraper(**_scraper_settings())
+                _scrapers.clear()
+                _scrapers[pid] = scraper
+    return scraper
+
+
+def get_pool_stats() -> Optional[Dict]:
+    """Return pool statistics of this process's shared scraper, if one exists"""
+    scraper = _scrapers.get(os.getpid())
+    return scraper.pool_stats() if scraper else None
+
+
+_replay_scraper = None
+
+
+def _init_replay_worker(archive_dir: str, base_url: str):
+    """Process pool initializer: one replay scraper per worker process"""
+    global _replay_scraper
+    _replay_scraper = AnnualReportsScraper(archive=HTMLArchive(archive_dir), replay=True,
+                                           base_url=base_url)
+
+
+def _replay_company(slug: str) -> Tuple[str, Optional[Dict]]:
+    return slug, _replay_scraper.scrape_company(slug)
+
+
+def reparse_archive(archive_dir: str, processes: Optional[int] = None,
+                    base_url: str = AnnualReportsScraper.BASE_URL) -> Iterator[Tuple[str, Optional[Dict]]]:
+    """
+    Re-parse every archived company page on a local process pool
+    
+    No network requests are made; use this after fixing a parsing bug
+    instead of re-crawling the catalog.
+    
+    Args:
+        archive_dir: Directory of the HTMLArchive
+        processes: Worker processes (defaults to the CPU count)
+        base_url: Site root the pages were archived under
+        
+    Yields:
+        Tuples of (slug, company_data) in archive URL order
+    """
+    prefix = f"{base_url}/Company/"
+    slugs = [url[len(prefix):] for url in HTMLArchive(archive_dir).urls(prefix)]
+    
+    with ProcessPoolExecutor(max_workers=processes, initializer=_init_replay_worker,
+                             initargs=(archive_dir, base_url)) as executor:
+        yield from executor.map(_replay_company, slugs, chunksize=64)
+
+
 # Convenience functions for direct use
 def scrape_company_by_slug(slug: str) -> Optional[Dict]:
     """
@@ -310,8 +863,7 @@ def scrape_company_by_slug(slug: str) -> Optional[Dict]:
     Returns:
         Company data dictionary or None
     """
-    scraper = AnnualReportsScraper()
-    return scraper.scrape_company(slug)
+    return get_scraper().scrape_company(slug)
 
 
 def search_companies(query: str) -> List[Dict]:
@@ -324,5 +876,4 @@ def search_companies(query: str) -> List[Dict]:
     Returns:
         List of company results
     """
-    scraper = AnnualReportsScraper()
-    return scraper.search_companies(query)
+    return get_scraper().search_companies(query)
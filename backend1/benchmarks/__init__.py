@@ -0,0 +1,3 @@
+"""
+Scraper benchmarks and recorded fixture pages
+"""
@@ -0,0 +1,111 @@
+"""
+Compliance Scoring Benchmark
+Author: Osman Yildiz
+
+Scores a synthetic portfolio with the per-company ComplianceAnalyzer
+path and with the vectorized batch path (as score dicts and as columnar
+arrays), checks that all produce the same scores and reports companies
+per second for each.
+
+Usage:
+    python backend1/benchmarks/bench_compliance.py [--companies N] [--seed N] [--output FILE]
+"""
+import argparse
+import json
+import os
+import random
+import sys
+import time
+from datetime import datetime
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__)))))
+
+from backend1.app.services.compliance_analyzer import ComplianceAnalyzer
+
+INDUSTRIES = (
+    'Software', 'Internet Services', 'Banking', 'Insurance', 'Pharmaceuticals', 'Medical Devices',
+    'Retail', 'Consumer Goods', 'Industrial Machinery', 'Automotive', 'Oil & Gas', 'Utilities',
+    'Telecommunications', 'Wireless', 'Mining', 'Real Estate', None,
+)
+
+
+def synthetic_portfolio(count: int, seed: int = 0):
+    """
+    Build `count` (company_data, annual_reports) pairs with realistic spread
+
+    Returns:
+        List of pairs in the shape analyze_company takes
+    """
+    rng = random.Random(seed)
+    this_year = datetime.now().year
+    batch = []
+    for i in range(count):
+        company = {
+            'id': i + 1,
+            'name': f'Company {i} {rng.choice("ABCDEFGH")}',
+            'ticker': f'T{i}' if rng.random() < 0.7 else None,
+            'industry': rng.choice(INDUSTRIES),
+            'sector': None,
+            'description': 'x' * rng.choice((0, 80, 150, 250, 600)),
+        }
+        reports = [{
+            'year': this_year - rng.randint(0, 15),
+            'pdf_url': f'https://example.com/{i}-{n}.pdf' if rng.random() < 0.8 else None,
+            'title': 'Annual Report',
+        } for n in range(rng.choice((0, 1, 2, 3, 5, 8, 12)))]
+        batch.append((company, reports))
+    return batch
+
+
+def run(count: int, seed: int = 0) -> dict:
+    batch = synthetic_portfolio(count, seed)
+
+    analyzer = ComplianceAnalyzer()
+    start = time.perf_counter()
+    scalar = [analyzer.analyze_company(company, reports) for company, reports in batch]
+    scalar_seconds = time.perf_counter() - start
+
+    analyzer = ComplianceAnalyzer()
+    start = time.perf_counter()
+    vectorized = analyzer.analyze_companies(batch)
+    batch_seconds = time.perf_counter() - start
+
+    start = time.perf_counter()
+    columnar = analyzer.analyze_companies(batch, columnar=True)
+    columnar_seconds = time.perf_counter() - start
+    columnar_rows = [{framework: {control: int(values[i]) for control, values in controls.items()}
+                      for framework, controls in columnar.items()} for i in range(min(count, 1000))]
+
+    return {
+        'companies': count,
+        'identical': scalar == vectorized and scalar[:1000] == columnar_rows,
+        'scalar': {'seconds': round(scalar_seconds, 3),
+                   'companies_per_second': round(count / scalar_seconds, 1)},
+        'batch': {'seconds': round(batch_seconds, 3),
+                  'companies_per_second': round(count / batch_seconds, 1)},
+        'columnar': {'seconds': round(columnar_seconds, 3),
+                     'companies_per_second': round(count / columnar_seconds, 1)},
+        'speedup': round(scalar_seconds / batch_seconds, 1),
+        'columnar_speedup': round(scalar_seconds / columnar_seconds, 1),
+    }
+
+
+def main():
+    arg_parser = argparse.ArgumentParser(description='Benchmark per-company vs batch compliance scoring')
+    arg_parser.add_argument('--companies', type=int, default=100_000, help='Portfolio size (default: 100000)')
+    arg_parser.add_argument('--seed', type=int, default=0, help='Random seed for the portfolio')
+    arg_parser.add_argument('--output', help='Write results to this JSON file (default: stdout)')
+    args = arg_parser.parse_args()
+
+    results = run(args.companies, args.seed)
+
+    if args.output:
+        with open(args.output, 'w', encoding='utf-8') as f:
+            json.dump(results, f, indent=2)
+    else:
+        print(json.dumps(results, indent=2))
+    return 0 if results['identical'] else 1
+
+
+if __name__ == '__main__':
+    sys.exit(main())
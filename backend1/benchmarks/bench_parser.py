@@ -0,0 +1,96 @@
+"""
+Company Page Parser Benchmark
+Author: Osman Yildiz
+
+Times the BeautifulSoup reference parser against the single-pass lxml parser
+on the stored company pages in benchmarks/fixtures and checks that both
+return the same dict for every page.
+
+Usage:
+    python backend1/benchmarks/bench_parser.py [--repeat N] [--json]
+"""
+import argparse
+import glob
+import json
+import logging
+import os
+import statistics
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__)))))
+
+from backend1.app.services.scraper import AnnualReportsScraper
+
+FIXTURES_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'fixtures')
+
+
+def load_company_pages():
+    """Return [(slug, raw bytes)] for every stored company page"""
+    pages = []
+    for path in sorted(glob.glob(os.path.join(FIXTURES_DIR, '*.html'))):
+        slug = os.path.splitext(os.path.basename(path))[0]
+        if slug.startswith('search-'):
+            continue
+        with open(path, 'rb') as f:
+            pages.append((slug, f.read()))
+    return pages
+
+
+def time_parser(scraper, content, slug, repeat):
+    """Return per-call parse times in milliseconds"""
+    timings = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        scraper.parse_company(content, slug)
+        timings.append((time.perf_counter() - start) * 1000)
+    return timings
+
+
+def run(repeat=50):
+    """
+    Benchmark both parsers on every fixture page
+
+    Args:
+        repeat: Number of timed parses per page and parser
+
+    Returns:
+        List of per-page result dicts
+    """
+    parsers = {name: AnnualReportsScraper(rate_limit_delay=0, parser=name) for name in ('soup', 'lxml')}
+    results = []
+
+    for slug, content in load_company_pages():
+        outputs = {name: scraper.parse_company(content, slug) for name, scraper in parsers.items()}
+        row = {'page': slug, 'bytes': len(content), 'identical': outputs['soup'] == outputs['lxml']}
+        for name, scraper in parsers.items():
+            timings = time_parser(scraper, content, slug, repeat)
+            row[f'{name}_median_ms'] = round(statistics.median(timings), 3)
+            row[f'{name}_min_ms'] = round(min(timings), 3)
+        row['speedup'] = round(row['soup_median_ms'] / row['lxml_median_ms'], 2)
+        results.append(row)
+
+    return results
+
+
+def main():
+    arg_parser = argparse.ArgumentParser(description='Benchmark company page parsers')
+    arg_parser.add_argument('--repeat', type=int, default=50, help='Timed parses per page and parser')
+    arg_parser.add_argument('--json', action='store_true', help='Print results as JSON')
+    args = arg_parser.parse_args()
+    logging.disable(logging.INFO)  # Per-page scrape logs would dominate the timings
+
+    results = run(args.repeat)
+    if args.json:
+        print(json.dumps(results, indent=2))
+    else:
+        print(f"{'page':<20}{'bytes':>8}{'soup ms':>10}{'lxml ms':>10}{'speedup':>9}  identical")
+        for row in results:
+            print(f"{row['page']:<20}{row['bytes']:>8}{row['soup_median_ms']:>10.3f}"
+                  f"{row['lxml_median_ms']:>10.3f}{row['speedup']:>8.2f}x  {row['identical']}")
+
+    return 0 if all(row['identical'] for row in results) else 1
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,293 @@
+"""
+Scraper Benchmark Suite
+Author: Osman Yildiz
+
+Replays the recorded pages in benchmarks/fixtures through a local stand-in
+HTTP server and measures:
+
+    throughput    end-to-end pages/sec through scrape_many and search
+    parse         parse time per page for both parser backends
+    memory        peak and retained memory per parsed page
+    many_reports  annual report extraction on pages with hundreds of links
+
+Results are written as JSON; pass --compare with an earlier result file to
+see the change of every timing, rate and memory metric between commits.
+
+Usage:
+    python backend1/benchmarks/bench_scraper.py [--output FILE] [--compare FILE] [--quick]
+"""
+import argparse
+import gc
+import json
+import logging
+import os
+import platform
+import statistics
+import subprocess
+import sys
+import time
+import tracemalloc
+from datetime import datetime, timezone
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__)))))
+
+from bs4 import BeautifulSoup
+from lxml import etree
+
+from backend1.app.services import fast_parser
+from backend1.app.services.scraper import AnnualReportsScraper
+from backend1.benchmarks.bench_parser import FIXTURES_DIR, load_company_pages, time_parser
+from backend1.benchmarks.replay_server import ReplayServer
+
+PARSERS = ('soup', 'lxml')
+
+# Metrics where a lower value is better; everything else compared is higher-is-better
+LOWER_IS_BETTER = ('_ms', '_kib', 'seconds')
+
+
+def many_reports_page(count: int) -> bytes:
+    """Build a company page with `count` report links, one row per report"""
+    rows = []
+    for i in range(count):
+        year = 2024 - (i % 120)
+        rows.append(
+            f'<div class="annual_report_row"><span class="bold_txt">{year} Annual Report</span>'
+            f'<a href="/HostedData/AnnualReportArchive/b/NASDAQ_BIG_{year}_{i}.pdf">'
+            f'View {year} report {i}</a><a href="/Click/{i}">Download</a></div>'
+        )
+    return (
+        '<html><head><meta name="description" content="Big Co annual reports"></head><body>'
+        '<h1>Big Co</h1><div class="vendor_name"><span>Ticker:</span> BIG</div>'
+        f'<div class="archived_reports">{"".join(rows)}</div></body></html>'
+    ).encode('utf-8')
+
+
+def _median_ms(fn, repeat: int) -> float:
+    timings = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        fn()
+        timings.append((time.perf_counter() - start) * 1000)
+    return round(statistics.median(timings), 3)
+
+
+def bench_throughput(server: ReplayServer, pages, total_pages: int, concurrency: int) -> dict:
+    """Scrape `total_pages` distinct URLs (copies of the corpus) end to end"""
+    slugs = []
+    for i in range(total_pages):
+        slug, content = pages[i % len(pages)]
+        copy = f'{slug}-copy{i}'
+        server.add(f'/Company/{copy}', content)
+        slugs.append(copy)
+
+    results = {}
+    for parser in PARSERS:
+        scraper = AnnualReportsScraper(rate_limit_delay=0, max_concurrency=concurrency,
+                                       parser=parser, base_url=server.url)
+        start = time.perf_counter()
+        scraped = sum(1 for _, data in scraper.scrape_many(slugs) if data)
+        seconds = time.perf_counter() - start
+        results[parser] = {
+            'pages': scraped,
+            'seconds': round(seconds, 3),
+            'pages_per_second': round(scraped / seconds, 1),
+            'connections': scraper.pool_stats()['new_connections'],
+        }
+    return results
+
+
+def bench_search(server: ReplayServer, queries, repeat: int) -> dict:
+    """Time search page fetch + parse, sequentially over a warm connection"""
+    scraper = AnnualReportsScraper(rate_limit_delay=0, base_url=server.url)
+    scraper.search_companies(queries[0])  # Open the connection
+    start = time.perf_counter()
+    for i in range(repeat):
+        scraper.search_companies(queries[i % len(queries)])
+    seconds = time.perf_counter() - start
+    return {'requests': repeat, 'requests_per_second': round(repeat / seconds, 1)}
+
+
+def bench_parse(pages, repeat: int) -> dict:
+    """Median and minimum parse time per page and parser"""
+    scrapers = {parser: AnnualReportsScraper(rate_limit_delay=0, parser=parser) for parser in PARSERS}
+    results = {}
+    for slug, content in pages:
+        outputs = {parser: s.parse_company(content, slug) for parser, s in scrapers.items()}
+        row = {'bytes': len(content), 'identical': outputs['soup'] == outputs['lxml']}
+        for parser, scraper in scrapers.items():
+            timings = time_parser(scraper, content, slug, repeat)
+            row[parser] = {'median_ms': round(statistics.median(timings), 3),
+                           'min_ms': round(min(timings), 3)}
+        results[slug] = row
+    return results
+
+
+def bench_memory(pages) -> dict:
+    """Peak memory while parsing and memory retained by the result, per page"""
+    results = {}
+    for slug, content in pages:
+        row = {}
+        for parser in PARSERS:
+            scraper = AnnualReportsScraper(rate_limit_delay=0, parser=parser)
+            scraper.parse_company(content, slug)  # Warm imports and regex caches
+            gc.collect()
+            tracemalloc.start()
+            data = scraper.parse_company(content, slug)
+            peak = tracemalloc.get_traced_memory()[1]
+            gc.collect()  # Parse trees hold reference cycles; count only what survives
+            retained = tracemalloc.get_traced_memory()[0]
+            tracemalloc.stop()
+            row[parser] = {'peak_kib': round(peak / 1024, 1), 'retained_kib': round(retained / 1024, 1)}
+            del data
+        results[slug] = row
+    return results
+
+
+def bench_many_reports(counts, repeat: int) -> dict:
+    """Report extraction on pages with many report links, both backends"""
+    soup_scraper = AnnualReportsScraper(rate_limit_delay=0, parser='soup')
+    lxml_scraper = AnnualReportsScraper(rate_limit_delay=0, parser='lxml')
+    base_url = soup_scraper.BASE_URL
+    results = {}
+
+    for count in counts:
+        content = many_reports_page(count)
+
+        soup = BeautifulSoup(content, 'lxml')
+        root = next(fast_parser.parse_html(content))
+        links = [a for a in root.iter('a') if fast_parser.REPORT_HREF.search(a.get('href') or '')]
+
+        soup_reports = soup_scraper._extract_annual_reports(soup)
+        lxml_reports = fast_parser._extract_annual_reports(links, base_url)
+
+        soup_ms = _median_ms(lambda: soup_scraper._extract_annual_reports(soup), repeat)
+        lxml_ms = _median_ms(lambda: fast_parser._extract_annual_reports(links, base_url), repeat)
+        results[str(count)] = {
+            'report_links': len(links),
+            'reports_found': len(soup_reports),
+            'identical': soup_reports == lxml_reports,
+            'soup': {'extract_ms': soup_ms, 'per_link_us': round(soup_ms * 1000 / count, 2),
+                     'parse_company_ms': _median_ms(lambda: soup_scraper.parse_company(content, 'big'), repeat)},
+            'lxml': {'extract_ms': lxml_ms, 'per_link_us': round(lxml_ms * 1000 / count, 2),
+                     'parse_company_ms': _median_ms(lambda: lxml_scraper.parse_company(content, 'big'), repeat)},
+        }
+    return results
+
+
+def git_commit() -> str:
+    try:
+        return subprocess.run(['git', 'rev-parse', '--short', 'HEAD'], capture_output=True, text=True,
+                              cwd=os.path.dirname(os.path.abspath(__file__)), check=True).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return 'unknown'
+
+
+def run_suite(quick: bool = False, latency_ms: float = 0.0, concurrency: int = 8) -> dict:
+    """
+    Run every benchmark against the recorded corpus
+
+    Args:
+        quick: Fewer repetitions and pages, for smoke runs
+        latency_ms: Delay the stand-in server adds to each response
+        concurrency: Connections used by the throughput benchmark
+
+    Returns:
+        Results dictionary (JSON serializable)
+    """
+    repeat = 5 if quick else 30
+    pages = load_company_pages()
+
+    with ReplayServer(latency=latency_ms / 1000) as server:
+        corpus = server.load_corpus(FIXTURES_DIR)
+        throughput = bench_throughput(server, pages, 40 if quick else 400, concurrency)
+        search = bench_search(server, corpus['queries'], 20 if quick else 200)
+
+    return {
+        'meta': {
+            'commit': git_commit(),
+            'timestamp': datetime.now(timezone.utc).isoformat(timespec='seconds'),
+            'python': platform.python_version(),
+            'platform': platform.platform(),
+            'lxml': '.'.join(map(str, etree.LXML_VERSION)),
+            'corpus': corpus,
+            'latency_ms': latency_ms,
+            'concurrency': concurrency,
+            'quick': quick,
+        },
+        'throughput': {'company_pages': throughput, 'search': search},
+        'parse': bench_parse(pages, repeat),
+        'memory': bench_memory(pages),
+        'many_reports': bench_many_reports((100, 300, 1000), max(3, repeat // 5)),
+    }
+
+
+def _flatten(results: dict, prefix: str = '') -> dict:
+    flat = {}
+    for key, value in results.items():
+        path = f'{prefix}.{key}' if prefix else key
+        if isinstance(value, dict):
+            flat.update(_flatten(value, path))
+        elif isinstance(value, (int, float)) and not isinstance(value, bool):
+            flat[path] = value
+    return flat
+
+
+def compare(current: dict, baseline: dict):
+    """
+    Compare every timing, rate and memory metric against a baseline run
+
+    Returns:
+        List of (metric, baseline, current, change in percent, regressed)
+    """
+    now, before = _flatten(current), _flatten(baseline)
+    rows = []
+    for metric in sorted(now):
+        if metric.startswith('meta.') or metric not in before or not before[metric]:
+            continue
+        leaf = metric.rsplit('.', 1)[-1]
+        if not (leaf.endswith(LOWER_IS_BETTER) or leaf.endswith('_per_second')):
+            continue
+        change = 100.0 * (now[metric] - before[metric]) / before[metric]
+        regressed = change > 0 if leaf.endswith(LOWER_IS_BETTER) else change < 0
+        rows.append((metric, before[metric], now[metric], round(change, 1), regressed))
+    return rows
+
+
+def main():
+    arg_parser = argparse.ArgumentParser(description='Benchmark the scraper on recorded pages')
+    arg_parser.add_argument('--output', help='Write results to this JSON file (default: stdout)')
+    arg_parser.add_argument('--compare', help='Earlier results JSON to compare against')
+    arg_parser.add_argument('--threshold', type=float, default=10.0,
+                            help='Percent change reported as a regression (default: 10)')
+    arg_parser.add_argument('--quick', action='store_true', help='Fewer repetitions, for smoke runs')
+    arg_parser.add_argument('--latency-ms', type=float, default=0.0, help='Simulated server latency')
+    arg_parser.add_argument('--concurrency', type=int, default=8, help='Connections for the throughput run')
+    args = arg_parser.parse_args()
+    logging.disable(logging.INFO)  # Per-page scrape logs would dominate the timings
+
+    results = run_suite(quick=args.quick, latency_ms=args.latency_ms, concurrency=args.concurrency)
+
+    if args.output:
+        with open(args.output, 'w', encoding='utf-8') as f:
+            json.dump(results, f, indent=2)
+        print(f"Results written to {args.output}", file=sys.stderr)
+    else:
+        print(json.dumps(results, indent=2))
+
+    if args.compare:
+        with open(args.compare, encoding='utf-8') as f:
+            baseline = json.load(f)
+        regressions = 0
+        print(f"\nCompared with {baseline['meta'].get('commit')}:", file=sys.stderr)
+        for metric, before, now, change, regressed in compare(results, baseline):
+            flag = regressed and abs(change) >= args.threshold
+            regressions += flag
+            print(f"  {'REGRESSION ' if flag else ''}{metric}: {before} -> {now} ({change:+.1f}%)",
+                  file=sys.stderr)
+        return 1 if regressions else 0
+
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
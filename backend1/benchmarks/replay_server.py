@@ -0,0 +1,113 @@
+"""
+Local Stand-in for AnnualReports.com
+Author: Osman Yildiz
+
+Serves canned pages over HTTP/1.1 keep-alive so the scraper can be tested
+and benchmarked without touching the live site. Used by the test suite
+and by the benchmark suite.
+"""
+import os
+import socket
+import threading
+import time
+from http.server import ThreadingHTTPServer, BaseHTTPRequestHandler
+
+
+class ReplayServer:
+    """Threaded HTTP server answering from an in-memory route table"""
+
+    def __init__(self, latency: float = 0.0):
+        """
+        Args:
+            latency: Seconds added to every response to emulate network delay
+        """
+        self.routes = {}
+        self.hits = []
+        self.latency = latency
+        self._lock = threading.Lock()
+
+        server = self
+
+        class Handler(BaseHTTPRequestHandler):
+            protocol_version = 'HTTP/1.1'
+
+            def setup(self):
+                super().setup()
+                # Headers and body go out in separate writes; don't let Nagle delay the body
+                self.connection.setsockopt(socket.IPPROTO_TCP, socket.TCP_NODELAY, 1)
+
+            def do_GET(self):
+                with server._lock:
+                    server.hits.append(self.path)
+                route = server.routes.get(self.path)
+                if callable(route):
+                    route = route(self)
+                if route is None:
+                    route = (404, {}, b'not found')
+                status, headers, body = route
+                if isinstance(body, str):
+                    body = body.encode('utf-8')
+                if server.latency:
+                    time.sleep(server.latency)
+                self.send_response(status)
+                for key, value in headers.items():
+                    self.send_header(key, value)
+                self.send_header('Content-Length', str(len(body)))
+                self.end_headers()
+                self.wfile.write(body)
+
+            def log_message(self, *args):
+                pass
+
+        self.httpd = ThreadingHTTPServer(('127.0.0.1', 0), Handler)
+        self.httpd.daemon_threads = True
+        self.url = f'http://127.0.0.1:{self.httpd.server_address[1]}'
+        self._thread = threading.Thread(target=self.httpd.serve_forever, daemon=True)
+
+    def add(self, path, body, status=200, headers=None):
+        """Serve `body` at `path` (path includes the query string)"""
+        self.routes[path] = (status, headers or {'Content-Type': 'text/html'}, body)
+
+    def load_corpus(self, directory: str) -> dict:
+        """
+        Serve a directory of recorded pages
+
+        `<slug>.html` is served at /Company/<slug>; `search-<query>.html`
+        at /Companies?search=<query>.
+
+        Returns:
+            Dictionary with the 'companies' slugs and search 'queries' served
+        """
+        served = {'companies': [], 'queries': []}
+        for filename in sorted(os.listdir(directory)):
+            if not filename.endswith('.html'):
+                continue
+            with open(os.path.join(directory, filename), 'rb') as f:
+                body = f.read()
+            name = filename[:-len('.html')]
+            if name.startswith('search-'):
+                query = name[len('search-'):]
+                self.add(f'/Companies?search={query}', body)
+                served['queries'].append(query)
+            else:
+                self.add(f'/Company/{name}', body)
+                served['companies'].append(name)
+        return served
+
+    def hit_count(self, path):
+        with self._lock:
+            return self.hits.count(path)
+
+    def start(self):
+        self._thread.start()
+        return self
+
+    def stop(self):
+        self.httpd.shutdown()
+        self.httpd.server_close()
+
+    def __enter__(self):
+        return self.start()
+
+    def __exit__(self, *exc):
+        self.stop()
@@ -25,6 +25,30 @@ class Config:
     JWT_ACCESS_TOKEN_EXPIRES = timedelta(hours=1)
     JWT_REFRESH_TOKEN_EXPIRES = timedelta(days=30)
     
+    # Scraper settings (shared pooled session per worker process)
+    SCRAPER_BASE_URL = os.environ.get('SCRAPER_BASE_URL')  # Defaults to https://www.annualreports.com
+    SCRAPER_RATE_LIMIT_DELAY = float(os.environ.get('SCRAPER_RATE_LIMIT_DELAY', 1.0))
+    SCRAPER_MAX_CONCURRENCY = int(os.environ.get('SCRAPER_MAX_CONCURRENCY', 4))
+    SCRAPER_POOL_SIZE = int(os.environ.get('SCRAPER_POOL_SIZE', 10))
+    SCRAPER_POOL_RETRIES = int(os.environ.get('SCRAPER_POOL_RETRIES', 3))
+    # Company page parser: 'lxml' (single pass) or 'soup' (BeautifulSoup reference)
+    SCRAPER_PARSER = os.environ.get('SCRAPER_PARSER', 'lxml')
+    # Conditional-GET page cache; disabled unless a directory is configured
+    SCRAPER_CACHE_DIR = os.environ.get('SCRAPER_CACHE_DIR')
+    SCRAPER_CACHE_MAX_BYTES = int(os.environ.get('SCRAPER_CACHE_MAX_BYTES', 256 * 1024 * 1024))
+    # Compressed raw HTML archive for offline re-parsing; disabled unless configured
+    SCRAPER_ARCHIVE_DIR = os.environ.get('SCRAPER_ARCHIVE_DIR')
+    # Resumable frontier of the company directory crawler
+    SCRAPER_FRONTIER_PATH = os.environ.get('SCRAPER_FRONTIER_PATH') or \
+        os.path.join('instance', 'crawl_frontier.sqlite3')
+    # Re-scrape scheduler: companies per run and minimum age before a re-scrape
+    SCRAPER_RESCRAPE_BUDGET = int(os.environ.get('SCRAPER_RESCRAPE_BUDGET', 100))
+    SCRAPER_RESCRAPE_MIN_AGE_HOURS = float(os.environ.get('SCRAPER_RESCRAPE_MIN_AGE_HOURS', 24 * 7))
+    # Batch scrape jobs: concurrent jobs per process and slugs per job
+    SCRAPE_JOB_WORKERS = int(os.environ.get('SCRAPE_JOB_WORKERS', 2))
+    SCRAPE_BATCH_MAX_SLUGS = int(os.environ.get('SCRAPE_BATCH_MAX_SLUGS', 500))
+    SCRAPE_JOB_RESUME = True  # Resume unfinished jobs on the first request after a restart
+    
     # CORS settings
     CORS_HEADERS = 'Content-Type'
 
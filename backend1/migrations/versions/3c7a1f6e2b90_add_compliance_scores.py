@@ -0,0 +1,32 @@
+"""Add compliance_scores table
+
+Revision ID: 3c7a1f6e2b90
+Revises: 9d41c8e2f7b3
+Create Date: 2026-10-17 14:12:05.318204
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = '3c7a1f6e2b90'
+down_revision = '9d41c8e2f7b3'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    op.create_table('compliance_scores',
+    sa.Column('company_id', sa.Integer(), nullable=False),
+    sa.Column('input_hash', sa.String(length=64), nullable=False),
+    sa.Column('algorithm_version', sa.String(length=20), nullable=False),
+    sa.Column('scores', sa.JSON(), nullable=False),
+    sa.Column('computed_at', sa.DateTime(), nullable=True),
+    sa.ForeignKeyConstraint(['company_id'], ['companies.id'], ondelete='CASCADE'),
+    sa.PrimaryKeyConstraint('company_id')
+    )
+
+
+def downgrade():
+    op.drop_table('compliance_scores')
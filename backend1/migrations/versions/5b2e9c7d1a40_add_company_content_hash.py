@@ -0,0 +1,28 @@
+"""Add content hash and last_scraped_at index to companies
+
+Revision ID: 5b2e9c7d1a40
+Revises: 148cd1c66438
+Create Date: 2026-10-17 09:12:41.318204
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = '5b2e9c7d1a40'
+down_revision = '148cd1c66438'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    with op.batch_alter_table('companies', schema=None) as batch_op:
+        batch_op.add_column(sa.Column('content_hash', sa.String(length=64), nullable=True))
+        batch_op.create_index('ix_companies_last_scraped_at', ['last_scraped_at'], unique=False)
+
+
+def downgrade():
+    with op.batch_alter_table('companies', schema=None) as batch_op:
+        batch_op.drop_index('ix_companies_last_scraped_at')
+        batch_op.drop_column('content_hash')
@@ -0,0 +1,50 @@
+"""Add compliance_rollups table
+
+Revision ID: 7e4b2d9a5c13
+Revises: 3c7a1f6e2b90
+Create Date: 2026-10-17 16:40:51.902113
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = '7e4b2d9a5c13'
+down_revision = '3c7a1f6e2b90'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    # Rows are filled in by the application (see services/compliance_rescore.py)
+    op.create_table('compliance_rollups',
+    sa.Column('company_id', sa.Integer(), nullable=False),
+    sa.Column('name', sa.String(length=200), nullable=False),
+    sa.Column('ticker', sa.String(length=10), nullable=True),
+    sa.Column('industry', sa.String(length=100), nullable=True),
+    sa.Column('report_count', sa.Integer(), nullable=False),
+    sa.Column('iso27001_average', sa.Float(), nullable=False),
+    sa.Column('iso27017_average', sa.Float(), nullable=False),
+    sa.Column('soc2_average', sa.Float(), nullable=False),
+    sa.Column('policies_average', sa.Float(), nullable=False),
+    sa.Column('average_compliance', sa.Integer(), nullable=False),
+    sa.Column('algorithm_version', sa.String(length=20), nullable=False),
+    sa.Column('score_year', sa.Integer(), nullable=False),
+    sa.Column('updated_at', sa.DateTime(), nullable=True),
+    sa.ForeignKeyConstraint(['company_id'], ['companies.id'], ondelete='CASCADE'),
+    sa.PrimaryKeyConstraint('company_id')
+    )
+    with op.batch_alter_table('compliance_rollups', schema=None) as batch_op:
+        batch_op.create_index(batch_op.f('ix_compliance_rollups_average_compliance'), ['average_compliance'], unique=False)
+        batch_op.create_index('ix_compliance_rollups_industry_average', ['industry', 'average_compliance'], unique=False)
+        batch_op.create_index(batch_op.f('ix_compliance_rollups_name'), ['name'], unique=False)
+
+
+def downgrade():
+    with op.batch_alter_table('compliance_rollups', schema=None) as batch_op:
+        batch_op.drop_index(batch_op.f('ix_compliance_rollups_name'))
+        batch_op.drop_index('ix_compliance_rollups_industry_average')
+        batch_op.drop_index(batch_op.f('ix_compliance_rollups_average_compliance'))
+
+    op.drop_table('compliance_rollups')
@@ -0,0 +1,60 @@
+"""Add scrape_jobs and scrape_job_items tables
+
+Revision ID: 9d41c8e2f7b3
+Revises: 5b2e9c7d1a40
+Create Date: 2026-10-17 11:03:27.540912
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = '9d41c8e2f7b3'
+down_revision = '5b2e9c7d1a40'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    op.create_table('scrape_jobs',
+    sa.Column('id', sa.Integer(), nullable=False),
+    sa.Column('status', sa.String(length=20), nullable=False),
+    sa.Column('force_update', sa.Boolean(), nullable=False),
+    sa.Column('created_by', sa.Integer(), nullable=True),
+    sa.Column('worker', sa.String(length=100), nullable=True),
+    sa.Column('heartbeat_at', sa.DateTime(), nullable=True),
+    sa.Column('created_at', sa.DateTime(), nullable=True),
+    sa.Column('started_at', sa.DateTime(), nullable=True),
+    sa.Column('finished_at', sa.DateTime(), nullable=True),
+    sa.ForeignKeyConstraint(['created_by'], ['users.id'], ),
+    sa.PrimaryKeyConstraint('id')
+    )
+    with op.batch_alter_table('scrape_jobs', schema=None) as batch_op:
+        batch_op.create_index(batch_op.f('ix_scrape_jobs_status'), ['status'], unique=False)
+
+    op.create_table('scrape_job_items',
+    sa.Column('id', sa.Integer(), nullable=False),
+    sa.Column('job_id', sa.Integer(), nullable=False),
+    sa.Column('slug', sa.String(length=255), nullable=False),
+    sa.Column('status', sa.String(length=20), nullable=False),
+    sa.Column('company_id', sa.Integer(), nullable=True),
+    sa.Column('error', sa.String(length=500), nullable=True),
+    sa.Column('finished_at', sa.DateTime(), nullable=True),
+    sa.ForeignKeyConstraint(['company_id'], ['companies.id'], ondelete='SET NULL'),
+    sa.ForeignKeyConstraint(['job_id'], ['scrape_jobs.id'], ),
+    sa.PrimaryKeyConstraint('id')
+    )
+    with op.batch_alter_table('scrape_job_items', schema=None) as batch_op:
+        batch_op.create_index(batch_op.f('ix_scrape_job_items_job_id'), ['job_id'], unique=False)
+
+
+def downgrade():
+    with op.batch_alter_table('scrape_job_items', schema=None) as batch_op:
+        batch_op.drop_index(batch_op.f('ix_scrape_job_items_job_id'))
+
+    op.drop_table('scrape_job_items')
+    with op.batch_alter_table('scrape_jobs', schema=None) as batch_op:
+        batch_op.drop_index(batch_op.f('ix_scrape_jobs_status'))
+
+    op.drop_table('scrape_jobs')
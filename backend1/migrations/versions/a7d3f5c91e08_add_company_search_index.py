@@ -0,0 +1,70 @@
+"""Add company search index
+
+Revision ID: a7d3f5c91e08
+Revises: f4c1a8e93b57
+Create Date: 2026-10-17 23:58:04.112093
+
+"""
+from alembic import op
+
+
+# revision identifiers, used by Alembic.
+revision = 'a7d3f5c91e08'
+down_revision = 'f4c1a8e93b57'
+branch_labels = None
+depends_on = None
+
+
+SQLITE_UPGRADE = [
+    """CREATE VIRTUAL TABLE companies_fts USING fts5(
+        name, ticker,
+        content='companies', content_rowid='id',
+        tokenize='unicode61 remove_diacritics 2', prefix='2 3'
+    )""",
+    """CREATE TRIGGER companies_fts_ai AFTER INSERT ON companies BEGIN
+        INSERT INTO companies_fts(rowid, name, ticker) VALUES (new.id, new.name, new.ticker);
+    END""",
+    """CREATE TRIGGER companies_fts_ad AFTER DELETE ON companies BEGIN
+        INSERT INTO companies_fts(companies_fts, rowid, name, ticker) VALUES ('delete', old.id, old.name, old.ticker);
+    END""",
+    """CREATE TRIGGER companies_fts_au AFTER UPDATE OF name, ticker ON companies BEGIN
+        INSERT INTO companies_fts(companies_fts, rowid, name, ticker) VALUES ('delete', old.id, old.name, old.ticker);
+        INSERT INTO companies_fts(rowid, name, ticker) VALUES (new.id, new.name, new.ticker);
+    END""",
+    "INSERT INTO companies_fts(companies_fts) VALUES ('rebuild')",
+]
+
+SQLITE_DOWNGRADE = [
+    "DROP TRIGGER IF EXISTS companies_fts_au",
+    "DROP TRIGGER IF EXISTS companies_fts_ad",
+    "DROP TRIGGER IF EXISTS companies_fts_ai",
+    "DROP TABLE IF EXISTS companies_fts",
+]
+
+POSTGRES_UPGRADE = [
+    "CREATE EXTENSION IF NOT EXISTS pg_trgm",
+    "CREATE INDEX ix_companies_name_trgm ON companies USING gin (lower(name) gin_trgm_ops)",
+    "CREATE INDEX ix_companies_ticker_trgm ON companies USING gin (lower(ticker) gin_trgm_ops)",
+    "CREATE INDEX ix_companies_search_tsv ON companies "
+    "USING gin (to_tsvector('simple', name || ' ' || coalesce(ticker, '')))",
+]
+
+POSTGRES_DOWNGRADE = [
+    "DROP INDEX IF EXISTS ix_companies_search_tsv",
+    "DROP INDEX IF EXISTS ix_companies_ticker_trgm",
+    "DROP INDEX IF EXISTS ix_companies_name_trgm",
+]
+
+
+def _run(statements):
+    for statement in statements.get(op.get_bind().dialect.name, []):
+        op.execute(statement)
+
+
+def upgrade():
+    # SQLite: FTS5 table kept current by triggers; PostgreSQL: pg_trgm / tsvector indexes
+    _run({'sqlite': SQLITE_UPGRADE, 'postgresql': POSTGRES_UPGRADE})
+
+
+def downgrade():
+    _run({'sqlite': SQLITE_DOWNGRADE, 'postgresql': POSTGRES_DOWNGRADE})
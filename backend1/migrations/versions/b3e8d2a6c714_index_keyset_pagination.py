@@ -0,0 +1,32 @@
+"""Index keyset pagination orders
+
+Revision ID: b3e8d2a6c714
+Revises: a7d3f5c91e08
+Create Date: 2026-10-18 00:41:19.508613
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = 'b3e8d2a6c714'
+down_revision = 'a7d3f5c91e08'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    with op.batch_alter_table('companies', schema=None) as batch_op:
+        batch_op.create_index('ix_companies_name_id', ['name', 'id'], unique=False)
+
+    with op.batch_alter_table('reports', schema=None) as batch_op:
+        batch_op.create_index('ix_reports_created_at_id', ['created_at', 'id'], unique=False)
+
+
+def downgrade():
+    with op.batch_alter_table('reports', schema=None) as batch_op:
+        batch_op.drop_index('ix_reports_created_at_id')
+
+    with op.batch_alter_table('companies', schema=None) as batch_op:
+        batch_op.drop_index('ix_companies_name_id')
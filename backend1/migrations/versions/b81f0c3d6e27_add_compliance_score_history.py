@@ -0,0 +1,40 @@
+"""Add compliance_score_history table
+
+Revision ID: b81f0c3d6e27
+Revises: 7e4b2d9a5c13
+Create Date: 2026-10-17 19:05:44.617020
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = 'b81f0c3d6e27'
+down_revision = '7e4b2d9a5c13'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    op.create_table('compliance_score_history',
+    sa.Column('id', sa.Integer(), nullable=False),
+    sa.Column('company_id', sa.Integer(), nullable=False),
+    sa.Column('seq', sa.Integer(), nullable=False),
+    sa.Column('recorded_at', sa.DateTime(), nullable=False),
+    sa.Column('keyframe', sa.Boolean(), nullable=False),
+    sa.Column('values', sa.LargeBinary(), nullable=False),
+    sa.Column('average_compliance', sa.SmallInteger(), nullable=False),
+    sa.ForeignKeyConstraint(['company_id'], ['companies.id'], ondelete='CASCADE'),
+    sa.PrimaryKeyConstraint('id'),
+    sa.UniqueConstraint('company_id', 'seq', name='uq_compliance_score_history_company_seq')
+    )
+    with op.batch_alter_table('compliance_score_history', schema=None) as batch_op:
+        batch_op.create_index(batch_op.f('ix_compliance_score_history_recorded_at'), ['recorded_at'], unique=False)
+
+
+def downgrade():
+    with op.batch_alter_table('compliance_score_history', schema=None) as batch_op:
+        batch_op.drop_index(batch_op.f('ix_compliance_score_history_recorded_at'))
+
+    op.drop_table('compliance_score_history')
@@ -0,0 +1,26 @@
+"""Index compliance_scores.computed_at
+
+Revision ID: c5d93e1a7f42
+Revises: b81f0c3d6e27
+Create Date: 2026-10-17 20:31:12.884503
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = 'c5d93e1a7f42'
+down_revision = 'b81f0c3d6e27'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    with op.batch_alter_table('compliance_scores', schema=None) as batch_op:
+        batch_op.create_index(batch_op.f('ix_compliance_scores_computed_at'), ['computed_at'], unique=False)
+
+
+def downgrade():
+    with op.batch_alter_table('compliance_scores', schema=None) as batch_op:
+        batch_op.drop_index(batch_op.f('ix_compliance_scores_computed_at'))
@@ -0,0 +1,48 @@
+"""Add company report counters
+
+Revision ID: d6a1c4f8e295
+Revises: b3e8d2a6c714
+Create Date: 2026-10-18 01:27:52.664310
+
+"""
+from datetime import datetime
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = 'd6a1c4f8e295'
+down_revision = 'b3e8d2a6c714'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    with op.batch_alter_table('companies', schema=None) as batch_op:
+        batch_op.add_column(sa.Column('report_count', sa.Integer(), server_default='0', nullable=False))
+        batch_op.add_column(sa.Column('latest_report_year', sa.Integer(), nullable=True))
+        batch_op.add_column(sa.Column('recent_report_count', sa.Integer(), server_default='0', nullable=False))
+        batch_op.create_index(batch_op.f('ix_companies_report_count'), ['report_count'], unique=False)
+        batch_op.create_index(batch_op.f('ix_companies_latest_report_year'), ['latest_report_year'], unique=False)
+        batch_op.create_index(batch_op.f('ix_companies_recent_report_count'), ['recent_report_count'], unique=False)
+
+    # Backfill (recent: this year and the two before, as in services/report_counts.py)
+    op.execute(sa.text("""
+        UPDATE companies SET
+            report_count = (SELECT count(*) FROM annual_reports r WHERE r.company_id = companies.id),
+            latest_report_year = (SELECT max(r.year) FROM annual_reports r WHERE r.company_id = companies.id),
+            recent_report_count = (SELECT count(*) FROM annual_reports r
+                                   WHERE r.company_id = companies.id AND r.year >= :since)
+    """).bindparams(since=datetime.now().year - 2))
+
+
+def downgrade():
+    # ALTER TABLE ... DROP COLUMN (SQLite 3.35+): rebuilding the table would drop the search index triggers
+    with op.batch_alter_table('companies', schema=None, recreate='never') as batch_op:
+        batch_op.drop_index(batch_op.f('ix_companies_recent_report_count'))
+        batch_op.drop_index(batch_op.f('ix_companies_latest_report_year'))
+        batch_op.drop_index(batch_op.f('ix_companies_report_count'))
+        batch_op.drop_column('recent_report_count')
+        batch_op.drop_column('latest_report_year')
+        batch_op.drop_column('report_count')
@@ -0,0 +1,26 @@
+"""Index annual_reports.company_id
+
+Revision ID: e2a6f08b4d19
+Revises: c5d93e1a7f42
+Create Date: 2026-10-17 21:48:05.317240
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = 'e2a6f08b4d19'
+down_revision = 'c5d93e1a7f42'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    with op.batch_alter_table('annual_reports', schema=None) as batch_op:
+        batch_op.create_index(batch_op.f('ix_annual_reports_company_id'), ['company_id'], unique=False)
+
+
+def downgrade():
+    with op.batch_alter_table('annual_reports', schema=None) as batch_op:
+        batch_op.drop_index(batch_op.f('ix_annual_reports_company_id'))
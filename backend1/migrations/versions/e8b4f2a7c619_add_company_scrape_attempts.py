@@ -0,0 +1,35 @@
+"""Add scrape attempt tracking to companies
+
+Revision ID: e8b4f2a7c619
+Revises: d6a1c4f8e295
+Create Date: 2026-10-17 02:05:41.218734
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = 'e8b4f2a7c619'
+down_revision = 'd6a1c4f8e295'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    with op.batch_alter_table('companies', schema=None, recreate='never') as batch_op:
+        batch_op.add_column(sa.Column('last_scrape_attempt_at', sa.DateTime(), nullable=True))
+        batch_op.add_column(sa.Column('scrape_failures', sa.Integer(), server_default='0', nullable=False))
+        batch_op.create_index(batch_op.f('ix_companies_last_scrape_attempt_at'), ['last_scrape_attempt_at'],
+                              unique=False)
+
+    # Every stored scrape so far was a successful attempt
+    op.execute("UPDATE companies SET last_scrape_attempt_at = last_scraped_at")
+
+
+def downgrade():
+    # ALTER TABLE ... DROP COLUMN (SQLite 3.35+): rebuilding the table would drop the search index triggers
+    with op.batch_alter_table('companies', schema=None, recreate='never') as batch_op:
+        batch_op.drop_index(batch_op.f('ix_companies_last_scrape_attempt_at'))
+        batch_op.drop_column('scrape_failures')
+        batch_op.drop_column('last_scrape_attempt_at')
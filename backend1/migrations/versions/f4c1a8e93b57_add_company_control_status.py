@@ -0,0 +1,39 @@
+"""Add company_control_status table
+
+Revision ID: f4c1a8e93b57
+Revises: e2a6f08b4d19
+Create Date: 2026-10-17 23:12:37.940815
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = 'f4c1a8e93b57'
+down_revision = 'e2a6f08b4d19'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    op.create_table('company_control_status',
+    sa.Column('company_id', sa.Integer(), nullable=False),
+    sa.Column('industry', sa.String(length=50), nullable=False),
+    sa.Column('implemented', sa.LargeBinary(), nullable=False),
+    sa.Column('in_progress', sa.LargeBinary(), nullable=False),
+    sa.Column('catalog_version', sa.String(length=20), nullable=False),
+    sa.Column('scored_at', sa.DateTime(), nullable=True),
+    sa.Column('updated_at', sa.DateTime(), nullable=True),
+    sa.ForeignKeyConstraint(['company_id'], ['companies.id'], ondelete='CASCADE'),
+    sa.PrimaryKeyConstraint('company_id')
+    )
+    with op.batch_alter_table('company_control_status', schema=None) as batch_op:
+        batch_op.create_index(batch_op.f('ix_company_control_status_industry'), ['industry'], unique=False)
+
+
+def downgrade():
+    with op.batch_alter_table('company_control_status', schema=None) as batch_op:
+        batch_op.drop_index(batch_op.f('ix_company_control_status_industry'))
+
+    op.drop_table('company_control_status')
@@ -4,6 +4,7 @@ Unified script - scrapes real company data with 3 most recent reports each
 
 Author: Data Governance Platform
 Usage: python seed_companies.py
+       python seed_companies.py --pipeline --slugs-file slugs.txt --count 1000
 """
 import sys
 sys.path.insert(0, '.')
@@ -11,10 +12,49 @@ sys.path.insert(0, '.')
 from backend1.app import create_app, db
 from backend1.app.models.company import Company
 from backend1.app.models.annual_report import AnnualReport
-from backend1.app.services.scraper import AnnualReportsScraper
+from backend1.app.services.scraper import AnnualReportsScraper, get_scraper
+from backend1.app.services.seed_pipeline import SeedPipeline
 from datetime import datetime
 
 
+# Comprehensive list of major companies (verified to have data)
+DEFAULT_COMPANIES = [
+    # Tech Giants
+    'apple-inc',
+    'tesla-inc',
+    'meta-platforms-inc',
+    'cisco-systems-inc',
+    
+    # Financial Services
+    'paypal-holdings-inc',
+    'visa-inc',
+    'goldman-sachs-group-inc',
+    
+    # Retail & Consumer
+    'walmart-inc',
+    'target-corp',
+    'starbucks-corp',
+    'lowes-companies-inc',
+    
+    # Consumer Goods
+    'pepsico-inc',
+    'procter-gamble-co',
+    'johnson-johnson',
+    
+    # Pharmaceuticals
+    'pfizer-inc',
+    'merck-co-inc',
+    'abbvie-inc',
+    
+    # Industrial
+    'caterpillar-inc',
+    'deere-co',
+    
+    # Technology Hardware
+    'dell-technologies-inc',
+]
+
+
 def clean_existing_bad_companies():
     """Remove any placeholder companies with no real data"""
     bad_companies = Company.query.filter_by(
@@ -44,42 +84,7 @@ def populate_companies(target_count=20):
     
     scraper = AnnualReportsScraper(rate_limit_delay=0.5)
     
-    # Comprehensive list of major companies (verified to have data)
-    companies_to_scrape = [
-        # Tech Giants
-        'apple-inc',
-        'tesla-inc',
-        'meta-platforms-inc',
-        'cisco-systems-inc',
-        
-        # Financial Services
-        'paypal-holdings-inc',
-        'visa-inc',
-        'goldman-sachs-group-inc',
-        
-        # Retail & Consumer
-        'walmart-inc',
-        'target-corp',
-        'starbucks-corp',
-        'lowes-companies-inc',
-        
-        # Consumer Goods
-        'pepsico-inc',
-        'procter-gamble-co',
-        'johnson-johnson',
-        
-        # Pharmaceuticals
-        'pfizer-inc',
-        'merck-co-inc',
-        'abbvie-inc',
-        
-        # Industrial
-        'caterpillar-inc',
-        'deere-co',
-        
-        # Technology Hardware
-        'dell-technologies-inc',
-    ]
+    companies_to_scrape = DEFAULT_COMPANIES
     
     current_count = Company.query.count()
     print("=" * 80)
@@ -100,9 +105,8 @@ def populate_companies(target_count=20):
     skip_count = 0
     error_count = 0
     
+    current_total = current_count
     for slug in companies_to_scrape:
-        current_total = Company.query.count()
-        
         if current_total >= target_count:
             print(f"\n[TARGET REACHED] {current_total} companies")
             break
@@ -176,6 +180,7 @@ def populate_companies(target_count=20):
             
             db.session.commit()
             success_count += 1
+            current_total += 1
             
             print(f"  [SUCCESS] {company_data['name']}")
             print(f"     Reports: {reports_added} (of {len(all_reports)} available)")
@@ -200,6 +205,58 @@ def populate_companies(target_count=20):
     ctx.pop()
 
 
+def populate_companies_pipelined(target_count=20, slugs=None, parse_workers=None, batch_size=100):
+    """
+    Populate database using the pipelined fetch -> parse -> write mode
+    
+    Pages are fetched concurrently, parsed on a process pool and written by
+    a single writer in batched bulk inserts. Use this for large seeds.
+    
+    Args:
+        target_count: Number of companies to reach (default: 20)
+        slugs: Company slugs to try (default: the built-in list)
+        parse_workers: Parser processes (default: CPU count)
+        batch_size: Companies per insert transaction
+    """
+    app = create_app()
+    ctx = app.app_context()
+    ctx.push()
+    
+    clean_existing_bad_companies()
+    
+    current_count = Company.query.count()
+    print("=" * 80)
+    print(f"Company Database Population (pipelined)")
+    print(f"Current: {current_count} companies")
+    print(f"Target: {target_count} companies")
+    print("=" * 80)
+    
+    if current_count >= target_count:
+        print(f"\n[INFO] Already have {current_count} companies (target: {target_count})")
+        print_summary()
+        ctx.pop()
+        return
+    
+    def report_progress(stats):
+        print(f"  [BATCH] added {stats['companies_added']} companies, "
+              f"{stats['reports_added']} reports ({stats['fetched']} pages fetched)")
+    
+    pipeline = SeedPipeline(get_scraper(), parse_workers=parse_workers, batch_size=batch_size)
+    stats = pipeline.run(slugs or DEFAULT_COMPANIES, limit=target_count - current_count,
+                         progress=report_progress)
+    
+    print("\n" + "=" * 80)
+    print_summary()
+    print(f"\nThis Run:")
+    print(f"  Added: {stats['companies_added']} companies, {stats['reports_added']} reports")
+    print(f"  Skipped: {stats['skipped']}")
+    print(f"  Errors: {stats['errors'] + stats['fetch_failed']}")
+    print(f"  Time: {stats['elapsed_seconds']}s ({stats['companies_per_second']} companies/s)")
+    print("=" * 80)
+    
+    ctx.pop()
+
+
 def print_summary():
     """Print current database statistics"""
     total_companies = Company.query.count()
@@ -240,10 +297,21 @@ if __name__ == '__main__':
     parser = argparse.ArgumentParser(description='Populate companies database')
     parser.add_argument('--list', action='store_true', help='List existing companies')
     parser.add_argument('--count', type=int, default=20, help='Target number of companies (default: 20)')
+    parser.add_argument('--pipeline', action='store_true', help='Concurrent fetch/parse with batched writes')
+    parser.add_argument('--slugs-file', help='File with one company slug per line (pipeline mode)')
+    parser.add_argument('--workers', type=int, default=None, help='Parser processes (pipeline mode)')
+    parser.add_argument('--batch-size', type=int, default=100, help='Companies per transaction (pipeline mode)')
     
     args = parser.parse_args()
     
     if args.list:
         list_companies()
+    elif args.pipeline:
+        slugs = None
+        if args.slugs_file:
+            with open(args.slugs_file) as f:
+                slugs = [line.strip() for line in f if line.strip() and not line.startswith('#')]
+        populate_companies_pipelined(target_count=args.count, slugs=slugs,
+                                     parse_workers=args.workers, batch_size=args.batch_size)
     else:
         populate_companies(target_count=args.count)
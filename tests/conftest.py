@@ -0,0 +1,85 @@
+"""
+Shared test fixtures
+
+Author: Osman Yildiz
+"""
+import sys
+import os
+import threading
+
+import pytest
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from backend1.benchmarks.replay_server import ReplayServer as FixtureServer
+
+
+@pytest.fixture
+def fixture_server():
+    """Start a local fixture HTTP server for the duration of a test"""
+    server = FixtureServer().start()
+    yield server
+    server.stop()
+
+
+@pytest.fixture
+def app(tmp_path):
+    """Application bound to a fresh SQLite database file"""
+    from backend1.app import create_app, db
+    from backend1.config import TestingConfig
+
+    class TmpConfig(TestingConfig):
+        SQLALCHEMY_DATABASE_URI = f"sqlite:///{tmp_path / 'test.db'}"
+
+    app = create_app(TmpConfig)
+    with app.app_context():
+        db.create_all()
+        yield app
+        app.extensions['scrape_jobs'].shutdown()
+        db.session.remove()
+        db.drop_all()
+
+
+class QueryCounter:
+    """SQL statements executed by the creating thread while active"""
+
+    def __init__(self):
+        self.statements = []
+        self.thread = threading.get_ident()
+
+    def __len__(self):
+        return len(self.statements)
+
+    def record(self, conn, cursor, statement, parameters, context, executemany):
+        # Background workers (scrape jobs) share the engine
+        if threading.get_ident() == self.thread:
+            self.statements.append(statement)
+
+
+@pytest.fixture
+def count_queries(app):
+    """
+    Context manager factory counting the SQL statements run inside it
+
+        with count_queries() as queries:
+            client.get('/api/reports/', headers=headers)
+        assert len(queries) <= 3, queries.statements
+
+    Loaded objects are expired first, so lazy loads show up as queries
+    instead of identity-map hits.
+    """
+    from contextlib import contextmanager
+    from sqlalchemy import event
+    from backend1.app import db
+
+    @contextmanager
+    def counting():
+        db.session.expire_all()
+        counter = QueryCounter()
+        event.listen(db.engine, 'before_cursor_execute', counter.record)
+        try:
+            yield counter
+        finally:
+            event.remove(db.engine, 'before_cursor_execute', counter.record)
+
+    return counting
@@ -0,0 +1,26 @@
+"""
+Benchmark suite smoke tests
+
+Author: Osman Yildiz
+"""
+from backend1.benchmarks.bench_scraper import bench_many_reports, compare
+
+
+def test_many_report_pages_extract_identically():
+    result = bench_many_reports((150,), repeat=1)['150']
+
+    assert result['report_links'] == 150
+    assert result['reports_found'] == 120  # One per distinct year
+    assert result['identical']
+
+
+def test_compare_flags_regressions_by_direction():
+    baseline = {'meta': {'commit': 'a'}, 'parse': {'p': {'lxml': {'median_ms': 2.0}}},
+                'throughput': {'lxml': {'pages_per_second': 100.0, 'pages': 40}}}
+    current = {'meta': {'commit': 'b'}, 'parse': {'p': {'lxml': {'median_ms': 3.0}}},
+               'throughput': {'lxml': {'pages_per_second': 120.0, 'pages': 40}}}
+
+    rows = {metric: (change, regressed) for metric, _, _, change, regressed in compare(current, baseline)}
+
+    assert rows == {'parse.p.lxml.median_ms': (50.0, True),
+                    'throughput.lxml.pages_per_second': (20.0, False)}
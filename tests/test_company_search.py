@@ -0,0 +1,61 @@
+"""
+Company search index tests
+
+Author: Osman Yildiz
+"""
+from flask_jwt_extended import create_access_token
+
+from backend1.app import db
+from backend1.app.models.company import Company
+from backend1.app.models.user import User
+
+
+def search(client, headers, text, **params):
+    params = ''.join(f'&{key}={value}' for key, value in params.items())
+    data = client.get(f'/api/companies/?search={text}{params}', headers=headers).json
+    return [company['name'] for company in data['companies']], data['total']
+
+
+def test_search_ranks_prefix_matches_and_follows_writes(app):
+    for i, (name, ticker, industry) in enumerate([
+            ('Microsoft Corporation', 'MSFT', 'Software'),
+            ('Micron Technology', 'MU', 'Semiconductors'),
+            ('Soft Micro Systems', None, 'Software'),
+            ('Apple Inc', 'AAPL', 'Hardware'),
+            ('Société Générale', 'GLE', 'Banking'),
+            ('Pineapple Holdings', 'PINE', 'Food')]):
+        db.session.add(Company(name=name, ticker=ticker, industry=industry, source_url=f'https://x/{i}'))
+    user = User(username='viewer', email='viewer@example.com', role='viewer')
+    user.set_password('Secret123!')
+    db.session.add(user)
+    db.session.commit()
+    headers = {'Authorization': f'Bearer {create_access_token(identity=str(user.id))}'}
+    client = app.test_client()
+
+    # Word prefixes, every term required, accents folded
+    assert search(client, headers, 'micr') == (['Micron Technology', 'Microsoft Corporation',
+                                                'Soft Micro Systems'], 3)
+    assert search(client, headers, 'micro%20soft') == (['Soft Micro Systems'], 1)
+    assert search(client, headers, 'societe') == (['Société Générale'], 1)
+    assert search(client, headers, 'apple') == (['Apple Inc'], 1)
+    # Ticker hits outrank name hits; punctuation is not query syntax
+    assert search(client, headers, 'mu')[0][0] == 'Micron Technology'
+    assert search(client, headers, '"aapl*') == (['Apple Inc'], 1)
+    assert search(client, headers, 'micr', industry='soft', per_page=1) == (['Microsoft Corporation'], 2)
+    assert search(client, headers, '%25%25') == (['Apple Inc', 'Micron Technology', 'Microsoft Corporation',
+                                                  'Pineapple Holdings', 'Société Générale',
+                                                  'Soft Micro Systems'], 6)
+
+    # The index follows inserts, renames and deletes
+    apple = Company.query.filter_by(ticker='AAPL').one()
+    apple.name, apple.ticker = 'Orchard Computers', 'ORCH'
+    db.session.delete(Company.query.filter_by(ticker='MU').one())
+    db.session.add(Company(name='Microchip Technology', ticker='MCHP', source_url='https://x/9'))
+    db.session.commit()
+    assert search(client, headers, 'apple') == ([], 0)
+    assert search(client, headers, 'orch') == (['Orchard Computers'], 1)
+    assert search(client, headers, 'micr')[0] == ['Microchip Technology', 'Microsoft Corporation',
+                                                  'Soft Micro Systems']
+    db.session.execute(db.update(Company).where(Company.ticker == 'PINE').values(name='Pine Foods'))
+    db.session.commit()
+    assert search(client, headers, 'pine') == (['Pine Foods'], 1)
@@ -0,0 +1,53 @@
+"""
+Batch compliance scoring tests
+
+Author: Osman Yildiz
+"""
+from datetime import datetime
+
+from backend1.app.services.compliance_analyzer import ComplianceAnalyzer
+from backend1.benchmarks.bench_compliance import synthetic_portfolio
+
+THIS_YEAR = datetime.now().year
+
+
+def report(year, pdf=True):
+    return {'year': year, 'pdf_url': f'https://example.com/{year}.pdf' if pdf else None, 'title': 'Annual Report'}
+
+
+EDGE_CASES = [
+    ({'id': 1, 'name': 'No Reports Inc', 'ticker': None, 'industry': None, 'sector': None, 'description': None}, []),
+    ({'id': 2, 'name': 'Single Report', 'ticker': 'SR', 'industry': 'Software', 'description': ''},
+     [report(THIS_YEAR)]),
+    ({'id': 3, 'name': 'Old Bank', 'ticker': 'OB', 'industry': 'Regional Banking', 'description': 'x' * 300},
+     [report(THIS_YEAR - 10, pdf=False), report(THIS_YEAR - 9, pdf=False)]),
+    ({'id': 4, 'name': 'Same Year Twice', 'industry': None, 'sector': 'Oil & Gas'},
+     [report(THIS_YEAR - 1), report(THIS_YEAR - 1)]),
+    ({'id': 5, 'name': 'Busy Retailer', 'ticker': 'BR', 'industry': 'RETAIL', 'description': 'y' * 201},
+     [report(y) for y in range(THIS_YEAR - 4, THIS_YEAR + 1)]),
+    ({'id': 6, 'name': '', 'industry': 'Wireless Telecom'}, [{'pdf_url': None}]),
+]
+
+
+def test_batch_matches_per_company_scores_on_edge_cases():
+    expected = [ComplianceAnalyzer().analyze_company(company, reports) for company, reports in EDGE_CASES]
+
+    assert ComplianceAnalyzer().analyze_companies(EDGE_CASES) == expected
+
+
+def test_batch_matches_per_company_scores_on_random_portfolio():
+    batch = synthetic_portfolio(3000, seed=7)
+    expected = [ComplianceAnalyzer().analyze_company(company, reports) for company, reports in batch]
+
+    assert ComplianceAnalyzer().analyze_companies(iter(batch)) == expected
+
+
+def test_columnar_output_and_empty_batch():
+    analyzer = ComplianceAnalyzer()
+    columnar = analyzer.analyze_companies(EDGE_CASES, columnar=True)
+
+    assert set(columnar) == {'iso27001', 'iso27017', 'soc2', 'policies'}
+    assert columnar['soc2']['privacy'].tolist() == [
+        analyzer.analyze_company(company, reports)['soc2']['privacy'] for company, reports in EDGE_CASES
+    ]
+    assert analyzer.analyze_companies([]) == []
@@ -0,0 +1,105 @@
+"""
+Compliance score history tests
+
+Author: Osman Yildiz
+"""
+import random
+from datetime import datetime
+
+from flask_jwt_extended import create_access_token
+
+from backend1.app import db
+from backend1.app.models.annual_report import AnnualReport
+from backend1.app.models.company import Company
+from backend1.app.models.compliance_history import ComplianceScoreHistory
+from backend1.app.models.user import User
+from backend1.app.services import compliance_history
+from backend1.app.services.compliance_history import SCORE_FIELDS, unflatten
+
+
+def random_scores(rng):
+    return unflatten(rng.randint(50, 99) for _ in SCORE_FIELDS)
+
+
+def add_company(name='acme', industry='Software'):
+    company = Company(name=name, industry=industry, source_url=f'https://x/{name}')
+    company.annual_reports = [AnnualReport(year=2023, title='2023 Annual Report')]
+    db.session.add(company)
+    db.session.commit()
+    return company
+
+
+def test_delta_rows_rebuild_scores_across_keyframes(app, monkeypatch):
+    monkeypatch.setattr(compliance_history, 'KEYFRAME_INTERVAL', 4)
+    company_id = db.session.execute(db.insert(Company).returning(Company.id),
+                                    [{'name': 'raw', 'source_url': 'https://x/raw'}]).scalar()
+    rng = random.Random(3)
+    previous, timeline = None, []
+    for month in range(1, 11):
+        scores = random_scores(rng)
+        assert compliance_history.record_changes([(company_id, previous, scores, 70)],
+                                                 recorded_at=datetime(2024, month, 10)) == 1
+        timeline.append(scores)
+        previous = scores
+    # Unchanged scores write nothing
+    assert compliance_history.record_changes([(company_id, previous, dict(previous), 70)]) == 0
+    db.session.commit()
+
+    rows = ComplianceScoreHistory.query.order_by(ComplianceScoreHistory.seq).all()
+    assert [row.keyframe for row in rows] == [True, False, False, False] * 2 + [True, False]
+    assert {len(row.values) for row in rows} == {len(SCORE_FIELDS)}
+
+    points = compliance_history.company_history(company_id, datetime(2023, 12, 1), datetime(2024, 12, 31))
+    assert [p['period'] for p in points][:3] == ['2023-12', '2024-01', '2024-02']
+    assert points[0]['compliance_scores'] is None
+    assert [p['compliance_scores'] for p in points[1:11]] == timeline
+    assert points[-1]['compliance_scores'] == timeline[-1]  # Carried forward
+    assert [p['changes'] for p in points] == [0] + [1] * 10 + [0, 0]
+
+    # Windows starting mid-stream decode from the preceding keyframe
+    points = compliance_history.company_history(company_id, datetime(2024, 7, 20), datetime(2024, 8, 31))
+    assert [p['compliance_scores'] for p in points] == timeline[6:8]
+
+    weeks = compliance_history.company_history(company_id, datetime(2024, 3, 1), datetime(2024, 3, 15), 'week')
+    assert [p['period'] for p in weeks] == ['2024-W09', '2024-W10', '2024-W11']
+    assert [p['changes'] for p in weeks] == [0, 1, 0]
+
+
+def test_writes_append_history_only_on_change_and_endpoints_serve_it(app):
+    acme = add_company('acme')
+    add_company('bank', industry='Banking')
+    acme.description = 'Same scores: description is short either way'
+    db.session.commit()
+    assert ComplianceScoreHistory.query.count() == 2
+
+    acme.industry = 'Oil & Gas'
+    db.session.commit()
+    assert ComplianceScoreHistory.query.filter_by(company_id=acme.id).count() == 2
+
+    user = User(username='viewer', email='viewer@example.com', role='viewer')
+    user.set_password('Secret123!')
+    db.session.add(user)
+    db.session.commit()
+    headers = {'Authorization': f'Bearer {create_access_token(identity=str(user.id))}'}
+    client = app.test_client()
+
+    response = client.get(f'/api/companies/{acme.id}/compliance/history?bucket=day', headers=headers)
+    assert response.status_code == 200
+    today = response.json['points'][-1]
+    assert today['changes'] == 2
+    assert today['compliance_scores'] == client.get(f'/api/companies/{acme.id}/compliance',
+                                                    headers=headers).json['compliance_scores']
+    assert client.get(f'/api/companies/{acme.id}/compliance/history?bucket=year',
+                      headers=headers).status_code == 400
+    assert client.get(f'/api/companies/{acme.id}/compliance/history?from=2020-01-01&bucket=day',
+                      headers=headers).status_code == 400
+    assert client.get('/api/companies/999/compliance/history', headers=headers).status_code == 404
+
+    trend = client.get('/api/dashboard/overview', headers=headers).json['charts']['compliance_trend']
+    assert len(trend['labels']) == 6
+    assert trend['score'][:5] == [None] * 5
+    assert trend['score'][5] is not None
+
+    db.session.delete(acme)
+    db.session.commit()
+    assert ComplianceScoreHistory.query.filter_by(company_id=acme.id).count() == 0
@@ -0,0 +1,84 @@
+"""
+Full-catalog compliance rescoring tests
+
+Author: Osman Yildiz
+"""
+from backend1.app import db
+from backend1.app.models.annual_report import AnnualReport
+from backend1.app.models.company import Company
+from backend1.app.models.compliance_history import ComplianceScoreHistory
+from backend1.app.models.compliance_rollup import ComplianceRollup
+from backend1.app.models.compliance_score import ComplianceScore
+from backend1.app.services import compliance_scores
+from backend1.app.services.compliance_analyzer import ComplianceAnalyzer
+from backend1.app.services.compliance_rescore import CatalogRescorer
+from backend1.app.services.scoring_plan import ScoringPlan, load_spec
+
+INDUSTRIES = ('Software', 'Banking', 'Retail', None)
+
+
+def insert_catalog(count=30):
+    """Insert companies with Core statements, so no scores get stored on commit"""
+    ids = db.session.execute(db.insert(Company).returning(Company.id), [{
+        'name': f'Company {i}', 'ticker': f'C{i}' if i % 3 else None,
+        'industry': INDUSTRIES[i % len(INDUSTRIES)], 'source_url': f'https://x/{i}'
+    } for i in range(count)]).scalars().all()
+    db.session.execute(db.insert(AnnualReport), [
+        {'company_id': company_id, 'year': 2024 - y, 'title': 'Annual Report',
+         'pdf_url': 'https://x.pdf' if y % 2 else None}
+        for n, company_id in enumerate(ids) for y in range(n % 4)
+    ])
+    db.session.commit()
+    return ids
+
+
+def test_dry_run_counts_without_writing_and_run_matches_read_path(app):
+    ids = insert_catalog()
+
+    result = CatalogRescorer(chunk_size=7, workers=0, dry_run=True).run()
+    assert (result['companies'], result['new'], result['changed'], result['written']) == (30, 30, 0, 0)
+    assert ComplianceScore.query.count() == 0
+
+    chunks = []
+    result = CatalogRescorer(chunk_size=7, workers=0).run(progress=lambda done, stats: chunks.append(done))
+    assert chunks == [7, 7, 7, 7, 2]
+    assert (result['new'], result['written']) == (30, 30)
+    assert ComplianceRollup.query.count() == 30
+    assert ComplianceScoreHistory.query.count() == 30
+
+    stored = {row.company_id: (row.scores, row.computed_at) for row in ComplianceScore.query}
+    # The read path agrees and has nothing left to recompute
+    scores = compliance_scores.get_scores(Company.query.filter(Company.id.in_(ids)).all())
+    assert scores == {company_id: row[0] for company_id, row in stored.items()}
+    assert {row.company_id: (row.scores, row.computed_at) for row in ComplianceScore.query} == stored
+
+    result = CatalogRescorer(workers=0, dry_run=True).run()
+    assert (result['unchanged'], result['changed'], result['new']) == (30, 0, 0)
+
+
+def test_changed_constants_rescore_in_worker_processes(app, monkeypatch):
+    insert_catalog()
+    CatalogRescorer(workers=0).run()
+
+    spec = load_spec()
+    for industry in spec['industries']:
+        if industry['name'] == 'Financial Services':
+            industry['baselines'] = {'iso27001': 60, 'iso27017': 60, 'soc2': 60}
+    monkeypatch.setattr(ComplianceAnalyzer, 'plan', ScoringPlan(spec))
+    banks = {c.id for c in Company.query.filter_by(industry='Banking')}
+    before = {row.company_id: row.average_compliance for row in ComplianceRollup.query}
+
+    result = CatalogRescorer(chunk_size=4, workers=0, dry_run=True).run()
+    assert (result['changed'], result['unchanged']) == (len(banks), 30 - len(banks))
+
+    result = CatalogRescorer(chunk_size=4, workers=2).run()
+    assert (result['changed'], result['written']) == (len(banks), len(banks))
+    after = {row.company_id: row.average_compliance for row in ComplianceRollup.query}
+    assert {company_id for company_id in after if after[company_id] != before[company_id]} == banks
+    assert ComplianceScoreHistory.query.count() == 30 + len(banks)
+
+    # Fresh companies score the same through the session events
+    company = Company(name='New Bank', industry='Banking', source_url='https://x/new')
+    db.session.add(company)
+    db.session.commit()
+    assert CatalogRescorer(workers=0, dry_run=True).run()['changed'] == 0
@@ -0,0 +1,159 @@
+"""
+Persisted compliance score tests
+
+Author: Osman Yildiz
+"""
+import pytest
+from flask_jwt_extended import create_access_token
+
+from backend1.app import db
+from backend1.app.models.annual_report import AnnualReport
+from backend1.app.models.company import Company
+from backend1.app.models.compliance_rollup import ComplianceRollup
+from backend1.app.models.compliance_score import ComplianceScore
+from backend1.app.models.user import User
+from backend1.app.services import compliance_scores
+from backend1.app.services.compliance_analyzer import ComplianceAnalyzer
+from backend1.app.services.compliance_rescore import CatalogRescorer
+
+
+@pytest.fixture
+def scored_calls(monkeypatch):
+    """Record the company ids of every batch the analyzer scores"""
+    calls = []
+    original = ComplianceAnalyzer.analyze_companies
+
+    def recording(self, batch, columnar=False):
+        batch = list(batch)
+        calls.append(sorted(company['id'] for company, _ in batch))
+        return original(self, batch, columnar)
+
+    monkeypatch.setattr(ComplianceAnalyzer, 'analyze_companies', recording)
+    return calls
+
+
+def add_company(name, industry='Software', years=(2022, 2023)):
+    company = Company(name=name, ticker=name[:10].upper(), industry=industry, source_url=f'https://x/{name}')
+    company.annual_reports = [AnnualReport(year=y, title=f'{y} Annual Report', pdf_url=f'https://x/{name}/{y}.pdf')
+                              for y in years]
+    db.session.add(company)
+    db.session.commit()
+    return company
+
+
+def auth_headers():
+    user = User(username='viewer', email='viewer@example.com', role='viewer')
+    user.set_password('Secret123!')
+    db.session.add(user)
+    db.session.commit()
+    return {'Authorization': f'Bearer {create_access_token(identity=str(user.id))}'}
+
+
+def test_scores_are_stored_and_recomputed_only_when_inputs_change(app, scored_calls, monkeypatch):
+    acme = add_company('acme')
+    beta = add_company('beta', industry='Banking')
+
+    # Written companies are scored when the session commits
+    assert scored_calls == [[acme.id], [beta.id]]
+    assert ComplianceScore.query.count() == 2
+
+    first = compliance_scores.get_scores([acme, beta])
+    assert len(scored_calls) == 2
+    company_data, report_data = compliance_scores.scoring_inputs(acme, acme.annual_reports)
+    assert first[acme.id] == ComplianceAnalyzer().analyze_company(company_data, report_data)
+
+    # Only changed companies are rescored; unrelated writes rescore nothing
+    acme.industry = 'Oil & Gas'
+    db.session.commit()
+    db.session.add(AnnualReport(company=beta, year=2024, title='2024 Annual Report'))
+    db.session.commit()
+    acme.last_scraped_at = None
+    db.session.commit()
+    assert scored_calls[2:] == [[acme.id], [beta.id]]
+    assert compliance_scores.get_scores([acme, beta])[acme.id] != first[acme.id]
+    assert len(scored_calls) == 4
+
+    monkeypatch.setattr(ComplianceAnalyzer, 'ALGORITHM_VERSION', 'test-2')
+    compliance_scores.get_scores([acme, beta])
+    assert scored_calls[-1] == [acme.id, beta.id]
+    assert {row.algorithm_version for row in ComplianceScore.query} == {'test-2'}
+
+
+def test_endpoints_read_stored_scores(app, scored_calls, monkeypatch):
+    acme = add_company('acme')
+    add_company('beta', industry='Retail', years=())
+    client = app.test_client()
+    headers = auth_headers()
+
+    overview = client.get('/api/companies/compliance-overview', headers=headers)
+    assert overview.status_code == 200
+    assert overview.json['total_companies'] == 2
+    detail = client.get(f'/api/companies/{acme.id}/compliance', headers=headers)
+    assert detail.status_code == 200
+    assert detail.json['compliance_scores'] == db.session.get(ComplianceScore, acme.id).scores
+    assert len(scored_calls) == 2  # Once per company, when it was added
+
+    # A scoring spec change is left to the catalog rescore
+    monkeypatch.setattr(ComplianceAnalyzer, 'ALGORITHM_VERSION', 'test-2')
+    assert client.get('/api/companies/compliance-overview', headers=headers).json['total_companies'] == 2
+    assert len(scored_calls) == 2
+
+    db.session.delete(acme)
+    db.session.commit()
+    assert db.session.get(ComplianceScore, acme.id) is None
+
+
+def test_rollups_follow_writes_and_overview_pages_in_sql(app):
+    companies = [add_company(f'tech{i}', years=range(2024 - i, 2025)) for i in range(4)]
+    bank = add_company('bank', industry='Banking', years=())
+    # Inserted outside the ORM, so only picked up by the catalog rescore; the overview only reads
+    db.session.execute(db.insert(Company), [{'name': 'bulk', 'source_url': 'https://x/bulk'}])
+    db.session.commit()
+    client = app.test_client()
+    headers = auth_headers()
+    assert client.get('/api/companies/compliance-overview', headers=headers).json['total_companies'] == 5
+    assert ComplianceRollup.query.count() == 5
+    CatalogRescorer(workers=0).run()
+
+    response = client.get('/api/companies/compliance-overview?per_page=2&sort=-average_compliance', headers=headers)
+    assert response.status_code == 200
+    data = response.json
+    assert data['total_companies'] == 6
+    assert data['pages'] == 3
+    assert ComplianceRollup.query.count() == 6
+    rollups = ComplianceRollup.query.order_by(ComplianceRollup.average_compliance.desc(),
+                                              ComplianceRollup.company_id.desc()).all()
+    assert [c['id'] for c in data['companies']] == [r.company_id for r in rollups[:2]]
+    assert data['companies'][0]['compliance_scores'] == db.session.get(ComplianceScore, rollups[0].company_id).scores
+    assert data['summary']['highest_compliance'] == rollups[0].average_compliance
+    assert data['summary']['total_reports'] == 1 + 2 + 3 + 4
+
+    page = client.get('/api/companies/compliance-overview?industry=Banking', headers=headers).json
+    assert [c['name'] for c in page['companies']] == ['bank']
+    page = client.get('/api/companies/compliance-overview?industry=Unknown&sort=name', headers=headers).json
+    assert [c['name'] for c in page['companies']] == ['bulk']
+    assert client.get('/api/companies/compliance-overview?sort=ticker', headers=headers).status_code == 400
+
+    # Report added, company edited and company deleted: rollups follow each commit
+    db.session.add(AnnualReport(company=bank, year=2023, title='2023 Annual Report'))
+    companies[0].industry = 'Oil & Gas'
+    db.session.delete(companies[1])
+    db.session.commit()
+    assert db.session.get(ComplianceRollup, bank.id).report_count == 1
+    assert db.session.get(ComplianceRollup, companies[0].id).industry == 'Oil & Gas'
+    assert db.session.get(ComplianceRollup, companies[1].id) is None
+
+    names = [c['name'] for c in client.get('/api/companies/compliance-overview?sort=name',
+                                           headers=headers).json['companies']]
+    assert names == ['bank', 'bulk', 'tech0', 'tech2', 'tech3']
+
+
+def test_rolled_back_writes_are_not_rescored(app, scored_calls):
+    acme = add_company('acme')
+    acme.industry = 'Retail'
+    db.session.flush()
+    db.session.rollback()
+    db.session.commit()
+
+    assert scored_calls == [[acme.id]]
+    assert db.session.get(ComplianceRollup, acme.id).industry == 'Software'
@@ -0,0 +1,110 @@
+"""
+What-if compliance simulation tests
+
+Author: Osman Yildiz
+"""
+import random
+import time
+from datetime import datetime
+
+from flask_jwt_extended import create_access_token
+
+from backend1.app import db
+from backend1.app.models.annual_report import AnnualReport
+from backend1.app.models.company import Company
+from backend1.app.models.user import User
+from backend1.app.services.compliance_analyzer import ComplianceAnalyzer
+from backend1.app.services.compliance_scores import average_compliance, scoring_inputs
+from backend1.app.services.compliance_simulation import apply_scenario
+
+
+def auth_headers():
+    user = User(username='officer', email='officer@example.com', role='viewer')
+    user.set_password('Secret123!')
+    db.session.add(user)
+    db.session.commit()
+    return {'Authorization': f'Bearer {create_access_token(identity=str(user.id))}'}
+
+
+def random_scenario(rng, year):
+    scenario = {}
+    if rng.random() < 0.5:
+        scenario['industry'] = rng.choice(['Financial Services', 'Retail', 'Oil & Gas', None])
+    if rng.random() < 0.3:
+        scenario['ticker'] = rng.choice(['NEW', None])
+    choice = rng.random()
+    if choice < 0.3:
+        scenario['report_years'] = rng.sample(range(year - 8, year + 1), rng.randint(0, 5))
+    elif choice < 0.6:
+        scenario['add_report_years'] = [year - rng.randint(0, 3) for _ in range(rng.randint(1, 2))]
+        scenario['remove_report_years'] = [year - 4]
+    if rng.random() < 0.4:
+        scenario['pdf_available'] = rng.random() < 0.5
+    return scenario
+
+
+def test_scenario_deltas_match_scoring_each_perturbed_company(app):
+    year = datetime.now().year
+    company = Company(name='Acme Cloud', industry='Software', source_url='https://x/acme')
+    company.annual_reports = [AnnualReport(year=year - y, title='Annual Report',
+                                           pdf_url='https://x.pdf' if y else None) for y in (1, 4)]
+    db.session.add(company)
+    db.session.commit()
+    headers = auth_headers()
+    client = app.test_client()
+
+    rng = random.Random(5)
+    scenarios = [random_scenario(rng, year) for _ in range(200)]
+    scenarios[0] = {'label': 'two more reports', 'add_report_years': [year, year - 2]}
+    response = client.post('/api/compliance/simulate', headers=headers,
+                           json={'company_id': company.id, 'scenarios': scenarios})
+    assert response.status_code == 200
+    data = response.json
+
+    analyzer = ComplianceAnalyzer()
+    company_data, report_data = scoring_inputs(company, company.annual_reports)
+    base = analyzer.analyze_company(company_data, report_data)
+    assert data['base'] == {'compliance_scores': base, 'average_compliance': average_compliance(base)}
+    assert data['scenarios'][0]['label'] == 'two more reports'
+
+    for index, (scenario, result) in enumerate(zip(scenarios, data['scenarios'])):
+        expected = analyzer.analyze_company(*apply_scenario(company_data, report_data, scenario))
+        deltas = {framework: {control: value - base[framework][control] for control, value in controls.items()}
+                  for framework, controls in expected.items()}
+        assert result['index'] == index
+        assert result['deltas'] == deltas
+        assert result['average_compliance'] == average_compliance(expected)
+        assert result['average_delta'] == average_compliance(expected) - average_compliance(base)
+
+
+def test_simulation_validates_input_and_handles_ten_thousand_scenarios(app):
+    headers = auth_headers()
+    client = app.test_client()
+    company = {'name': 'Hypothetical', 'industry': 'Retail',
+               'reports': [{'year': 2020, 'pdf_url': None}]}
+
+    def post(body):
+        return client.post('/api/compliance/simulate', headers=headers, json=body)
+
+    assert post({'scenarios': [{}]}).status_code == 400
+    assert post({'company_id': 999, 'scenarios': [{}]}).status_code == 404
+    assert post({'company': company, 'scenarios': []}).status_code == 400
+    assert post({'company': company, 'scenarios': [{'revenue': 1}]}).status_code == 400
+    assert post({'company': company, 'scenarios': [{'report_years': '2024'}]}).status_code == 400
+    assert post({'company': company, 'scenarios': [{}] * 10001}).status_code == 400
+    for bad in ({'name': ''}, {'name': 7}, {'industry': ['Retail']}, {'reports': [{'year': '2020'}]},
+                {'reports': [{'year': None}]}, {'reports': [{'year': 2020, 'pdf_url': True}]},
+                {'reports': [2020]}):
+        response = post({'company': dict(company, **bad), 'scenarios': [{}]})
+        assert response.status_code == 400 and 'company.' in response.json['error'], bad
+
+    rng = random.Random(8)
+    year = datetime.now().year
+    scenarios = [random_scenario(rng, year) for _ in range(10000)]
+    started = time.perf_counter()
+    response = post({'company': company, 'scenarios': scenarios})
+    elapsed = time.perf_counter() - started
+    assert response.status_code == 200
+    assert len(response.json['scenarios']) == 10000
+    assert response.json['company_id'] is None
+    assert elapsed < 2.0  # Generous bound for slow CI machines
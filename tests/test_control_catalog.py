@@ -0,0 +1,109 @@
+"""
+Control catalog and gap analysis tests
+
+Author: Osman Yildiz
+"""
+import numpy as np
+from flask_jwt_extended import create_access_token
+
+from backend1.app import db
+from backend1.app.models.annual_report import AnnualReport
+from backend1.app.models.company import Company
+from backend1.app.models.compliance_score import ComplianceScore
+from backend1.app.models.control_status import CompanyControlStatus
+from backend1.app.models.user import User
+from backend1.app.services.compliance_history import SCORE_FIELDS, flatten
+from backend1.app.services.control_catalog import ControlMatrix, default_catalog
+
+
+def brute_status(catalog, values, j):
+    control = catalog.controls[j]
+    score = values[SCORE_FIELDS.index(tuple(control['score'].split('.')))]
+    if score >= control['threshold']:
+        return 'implemented'
+    if score >= control['threshold'] - catalog.margin:
+        return 'in_progress'
+    return 'not_started'
+
+
+def test_catalog_bitsets_match_per_control_thresholds():
+    catalog = default_catalog()
+    assert sum(1 for control in catalog.controls if control['framework'] == 'iso27001') == 93
+    assert [c['id'] for c in catalog.controls if c['framework'] == 'iso27017'][0] == 'CLD.6.3.1'
+    assert catalog.width == 13
+
+    rng = np.random.default_rng(2)
+    scores = rng.integers(50, 100, size=(300, len(SCORE_FIELDS)))
+    industries = rng.choice(['Technology', 'Energy'], size=300).astype(object)
+    implemented, in_progress = catalog.statuses(scores)
+    matrix = ControlMatrix(np.arange(300), industries, implemented, in_progress, catalog)
+
+    expected = [[brute_status(catalog, row, j) for j in range(len(catalog.ids))] for row in scores.tolist()]
+    for status in ('implemented', 'in_progress', 'not_started'):
+        assert (matrix.status_mask('A.8.12', status)
+                == [row[catalog.index['A.8.12']] == status for row in expected]).all()
+        assert matrix.counts()[status].tolist() == [sum(row[j] == status for row in expected)
+                                                    for j in range(len(catalog.ids))]
+
+    baseline, rate, peers = matrix.industry_baseline('Energy')
+    energy = [row for row, industry in zip(expected, industries) if industry == 'Energy']
+    assert peers == len(energy)
+    assert catalog.unpack(baseline).tolist() == [
+        sum(row[j] == 'implemented' for row in energy) / len(energy) >= 0.5 for j in range(len(catalog.ids))]
+
+
+def test_control_endpoints_follow_score_changes(app):
+    companies = []
+    for i, (industry, years) in enumerate([('Software', 4), ('Internet', 0), ('Banking', 3), ('Software', 1)]):
+        company = Company(name=f'Company {i}', industry=industry, source_url=f'https://x/{i}',
+                          ticker=f'C{i}' if i % 2 == 0 else None, description='x' * 250 * (i % 2))
+        company.annual_reports = [AnnualReport(year=2025 - y, title='Annual Report', pdf_url='https://x.pdf')
+                                  for y in range(years)]
+        db.session.add(company)
+        companies.append(company)
+    db.session.commit()
+    # Statuses are written with the scores, before any request reads them
+    assert CompanyControlStatus.query.count() == 4
+
+    user = User(username='viewer', email='viewer@example.com', role='viewer')
+    user.set_password('Secret123!')
+    db.session.add(user)
+    db.session.commit()
+    headers = {'Authorization': f'Bearer {create_access_token(identity=str(user.id))}'}
+    client = app.test_client()
+    catalog = default_catalog()
+
+    data = client.get('/api/compliance/controls', headers=headers).json
+    assert data['total'] == 100 and data['companies'] == 4
+    assert all(c['implemented'] + c['in_progress'] + c['not_started'] == 4 for c in data['controls'])
+    assert sum(data['summary'].values()) == 100
+    assert client.get('/api/compliance/controls?framework=iso27017', headers=headers).json['total'] == 7
+    assert client.get('/api/dashboard/overview', headers=headers).json['charts']['iso_controls'] == data['summary']
+
+    def expected_missing(control_id, candidates=companies):
+        j = catalog.index[control_id]
+        return sorted(c.id for c in candidates
+                      if brute_status(catalog, flatten(db.session.get(ComplianceScore, c.id).scores), j) != 'implemented')
+
+    response = client.get('/api/compliance/controls/A.8.12/companies', headers=headers).json
+    assert [c['id'] for c in response['companies']] == expected_missing('A.8.12')
+    assert response['total'] == len(expected_missing('A.8.12'))
+    assert client.get('/api/compliance/controls/A.9.99/companies', headers=headers).status_code == 404
+    assert client.get('/api/compliance/controls/A.8.12/companies?status=done', headers=headers).status_code == 400
+
+    gaps = client.get(f'/api/compliance/controls/companies/{companies[1].id}', headers=headers).json
+    assert gaps['industry'] == 'Technology' and gaps['peer_count'] == 3
+    assert sum(gaps['counts'].values()) == 100
+    assert all(gaps['controls'][gap['id']] != 'implemented' and gap['peer_implemented_rate'] >= 0.5
+               for gap in gaps['gaps'])
+
+    # Rescored companies get their bits re-derived; deleted ones drop out
+    companies[1].industry = 'Oil & Gas'
+    db.session.delete(companies[3])
+    db.session.commit()
+    gaps = client.get(f'/api/compliance/controls/companies/{companies[1].id}', headers=headers).json
+    assert gaps['industry'] == 'Energy' and gaps['peer_count'] == 1 and gaps['gaps'] == []
+    assert client.get('/api/compliance/controls', headers=headers).json['companies'] == 3
+    assert CompanyControlStatus.query.count() == 3
+    response = client.get('/api/compliance/controls/A.8.12/companies?industry=Technology', headers=headers).json
+    assert [c['id'] for c in response['companies']] == expected_missing('A.8.12', companies[:1])
@@ -0,0 +1,97 @@
+"""
+Directory crawler and frontier tests (run against a local fixture server)
+
+Author: Osman Yildiz
+"""
+from backend1.app.services.crawl_frontier import CrawlFrontier
+from backend1.app.services.crawler import DirectoryCrawler, extract_links
+from backend1.app.services.scraper import AnnualReportsScraper
+
+
+def listing(*hrefs):
+    links = ''.join(f'<li><a href="{href}">{href}</a></li>' for href in hrefs)
+    return f'<html><body><ul>{links}</ul></body></html>'
+
+
+def company_page(name):
+    return (f'<html><body><h1>{name}</h1><div>'
+            f'<a href="/HostedData/AnnualReportArchive/x/{name}_2023.pdf">2023 Annual Report</a>'
+            f'</div></body></html>')
+
+
+def build_directory(server):
+    server.add('/Companies?a=A', listing('/Company/acme-inc', '/Company/alpha-co',
+                                         '/Companies?a=A&page=2', '/Companies?search=acme',
+                                         'https://elsewhere.example/Company/other'))
+    server.add('/Companies?a=A&page=2', listing('/Company/alpha-co', '/Company/apex-corp#reports',
+                                                '/Companies?a=A'))
+    server.add('/Companies?a=B', listing('/Company/beta-inc', 'Company/bravo-ltd'))
+    for slug in ('acme-inc', 'alpha-co', 'apex-corp', 'beta-inc', 'bravo-ltd'):
+        server.add(f'/Company/{slug}', company_page(slug))
+
+
+def make_crawler(server, path, **kwargs):
+    scraper = AnnualReportsScraper(rate_limit_delay=0, max_concurrency=2)
+    scraper.BASE_URL = server.url
+    crawler = DirectoryCrawler(scraper, CrawlFrontier(str(path)), **kwargs)
+    crawler.seed([f'{server.url}/Companies?a=A', f'{server.url}/Companies?a=B'])
+    return crawler
+
+
+def test_extract_links_filters_and_normalizes():
+    base = 'http://host'
+    pages, slugs = extract_links(
+        listing('/Company/a-co', '/Company/b-co/', '/Companies?a=C', '/Companies?search=x',
+                'http://other/Company/c-co', '/About'),
+        f'{base}/Companies?a=A', base
+    )
+
+    assert slugs == {'a-co', 'b-co'}
+    assert pages == {f'{base}/Companies?a=C'}
+
+
+def test_crawl_discovers_every_slug_once(fixture_server, tmp_path):
+    build_directory(fixture_server)
+    crawler = make_crawler(fixture_server, tmp_path / 'frontier.sqlite3')
+
+    result = crawler.crawl_pages()
+
+    assert result == {'pages_fetched': 3, 'pages_failed': 0, 'slugs_discovered': 5}
+    assert fixture_server.hit_count('/Companies?a=A') == 1
+    assert fixture_server.hit_count('/Companies?search=acme') == 0
+    assert crawler.frontier.stats()['slugs']['pending'] == 5
+
+
+def test_crawl_resumes_without_refetching(fixture_server, tmp_path):
+    build_directory(fixture_server)
+    path = tmp_path / 'frontier.sqlite3'
+
+    first = make_crawler(fixture_server, path, batch_size=1)
+    assert first.crawl_pages(max_pages=1)['pages_fetched'] == 1
+    first.frontier.close()
+
+    # A fresh process picks up the same frontier file
+    second = make_crawler(fixture_server, path, batch_size=1)
+    assert second.crawl_pages()['pages_fetched'] == 2
+
+    for page in ('/Companies?a=A', '/Companies?a=A&page=2', '/Companies?a=B'):
+        assert fixture_server.hit_count(page) == 1
+    assert second.frontier.stats()['slugs']['pending'] == 5
+
+
+def test_scrape_discovered_feeds_batches(fixture_server, tmp_path):
+    build_directory(fixture_server)
+    del fixture_server.routes['/Company/bravo-ltd']
+    crawler = make_crawler(fixture_server, tmp_path / 'frontier.sqlite3', batch_size=2)
+    stored = {}
+
+    result = crawler.run(lambda slug, data: stored.setdefault(slug, data['name']))
+
+    assert result['companies_scraped'] == 4
+    assert result['companies_failed'] == 1
+    assert stored['apex-corp'] == 'apex-corp'
+    assert result['frontier']['slugs'] == {'pending': 0, 'done': 4, 'failed': 1}
+
+    # Nothing left to do on the next run
+    assert crawler.run(lambda slug, data: None)['companies_scraped'] == 0
+    assert fixture_server.hit_count('/Company/acme-inc') == 1
@@ -0,0 +1,58 @@
+import glob
+import json
+import os
+
+import pytest
+
+from backend1.app.services.scraper import AnnualReportsScraper
+
+BACKEND_DIR = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), 'backend1')
+FIXTURES_DIR = os.path.join(BACKEND_DIR, 'benchmarks', 'fixtures')
+
+TRICKY_PAGES = [
+    b'',
+    b'<html><body></body></html>',
+    b'<span>Ticker:</span><!---->',
+    b'<pre><span>Ticker:</span><!----></pre>',
+    b'<span>Ticker: <b>x</b></span> AAPL<span>Sector:</span><?php echo 1 ?>',
+    b'<h1> Acme <script>var x;</script> Corp </h1><div class="Overview"><p>One</p><p> Two </p></div>',
+    b'<meta name="description" content="From meta"><a href="http://acme.com"><b>Visit Website</b></a>',
+    b'<div>2021 <a href="/HostedData/AnnualReportArchive/a/2021.pdf">Report</a>'
+    b'<a href="x.pdf">Download</a><a href="/HostedData/AnnualReportArchive/a/b">Other</a></div>',
+    b'<a href="HostedData/annualreportarchive/c">2019 Annual</a><a href="HostedData/AnnualReportArchive/d">2019</a>',
+    '<h1>Société Générale</h1>'.encode('latin-1'),
+    '<h1>Årsredovisning</h1>'.encode('utf-16'),
+    b'<h1>Bad \xff\xfe utf-8</h1><span>Exchange:</span>\xe9NYSE',
+]
+
+
+def parsers():
+    return (AnnualReportsScraper(rate_limit_delay=0, parser='soup'),
+            AnnualReportsScraper(rate_limit_delay=0, parser='lxml'))
+
+
+def test_apple_page_matches_recorded_output():
+    with open(os.path.join(FIXTURES_DIR, 'apple-inc.html'), 'rb') as f:
+        content = f.read()
+    with open(os.path.join(BACKEND_DIR, 'apple_scraped_data.json'), encoding='utf-8') as f:
+        expected = json.load(f)
+
+    soup, fast = parsers()
+    assert fast.parse_company(content, 'apple-inc') == expected
+    assert soup.parse_company(content, 'apple-inc') == expected
+
+
+@pytest.mark.parametrize('path', sorted(glob.glob(os.path.join(FIXTURES_DIR, '*.html'))))
+def test_fixture_pages_identical(path):
+    with open(path, 'rb') as f:
+        content = f.read()
+    slug = os.path.splitext(os.path.basename(path))[0]
+
+    soup, fast = parsers()
+    assert fast.parse_company(content, slug) == soup.parse_company(content, slug)
+
+
+@pytest.mark.parametrize('content', TRICKY_PAGES)
+def test_tricky_markup_identical(content):
+    soup, fast = parsers()
+    assert fast.parse_company(content, 'acme') == soup.parse_company(content, 'acme')
@@ -0,0 +1,80 @@
+"""
+Sparse fieldset tests
+
+Author: Osman Yildiz
+"""
+from flask_jwt_extended import create_access_token
+
+from backend1.app import db
+from backend1.app.models.annual_report import AnnualReport
+from backend1.app.models.company import Company
+from backend1.app.models.report import Report
+from backend1.app.models.user import User
+
+
+def test_fields_limit_keys_and_selected_columns(app, count_queries):
+    admin = User(username='admin', email='admin@example.com', role='admin')
+    admin.set_password('Secret123!')
+    db.session.add(admin)
+    for i in range(12):
+        company = Company(name=f'Company {i:02}', ticker=f'C{i}', source_url=f'https://x/{i}',
+                          description='Long description. ' * 200)
+        company.annual_reports = [AnnualReport(year=2020 + y, title='Annual Report', pdf_url='https://x.pdf')
+                                  for y in range(i % 3)]
+        db.session.add(company)
+    db.session.commit()
+    for company in Company.query.limit(5):
+        db.session.add(Report(title=f'Review {company.name}', report_type='audit', created_by=admin.id,
+                              description='Notes. ' * 100, company_id=company.id,
+                              source_annual_report_id=company.annual_reports[0].id
+                              if company.annual_reports else None))
+    db.session.commit()
+    headers = {'Authorization': f'Bearer {create_access_token(identity=str(admin.id))}'}
+    client = app.test_client()
+    client.get('/api/auth/me', headers=headers)  # Scrape job resume on the first request
+
+    def get(url):
+        with count_queries() as queries:
+            response = client.get(url, headers=headers)
+        assert response.status_code == 200, response.json
+        return response.json, queries
+
+    # Lists: only the requested keys and columns, no per-row loads
+    for url in ('/api/companies/?per_page=100&fields=id,name,ticker',
+                '/api/companies/?limit=5&fields=ticker,name,id',
+                '/api/companies/?sort=-report_count&limit=5&fields=id,name,ticker',
+                '/api/companies/?search=company&limit=5&fields=id,name,ticker'):
+        data, queries = get(url)
+        assert all(set(c) == {'id', 'name', 'ticker'} for c in data['companies']), url
+        # (paginate's COUNT(*) wraps the entity; unused subquery columns are not read)
+        assert not any('description' in statement for statement in queries.statements
+                       if not statement.startswith('SELECT count')), url
+        assert len(queries) <= 2, url
+    full, _ = get('/api/companies/?per_page=100')
+    sparse, _ = get('/api/companies/?per_page=100&fields=id,name,ticker')
+    assert [(c['id'], c['name'], c['ticker']) for c in full['companies']] == \
+        [(c['id'], c['name'], c['ticker']) for c in sparse['companies']]
+    page, _ = get('/api/companies/?limit=5&fields=id')
+    assert len(get(f"/api/companies/?limit=5&fields=id&after={page['next_cursor']}")[0]['companies']) == 5
+
+    # Details: relationship keys only when asked for
+    company_id = full['companies'][-1]['id']
+    data, queries = get(f'/api/companies/{company_id}?fields=name,report_count')
+    assert data == {'name': 'Company 11', 'report_count': 2} and len(queries) == 1
+    data, _ = get(f'/api/companies/{company_id}?fields=name,annual_reports')
+    assert set(data) == {'name', 'annual_reports'} and len(data['annual_reports']) == 2
+    data, _ = get(f'/api/companies/{company_id}/reports?fields=year')
+    assert data['reports'] == [{'year': 2021}, {'year': 2020}]
+
+    data, queries = get('/api/reports/?fields=id,title')
+    assert len(data['reports']) == 5 and all(set(r) == {'id', 'title'} for r in data['reports'])
+    assert len(queries) == 2 and not any('annual_reports' in statement for statement in queries.statements)
+    data, _ = get('/api/reports/?limit=2&fields=title,source_annual_report')
+    assert all(set(r) <= {'title', 'source_annual_report'} for r in data['reports'])
+    assert any('source_annual_report' in r for r in data['reports'])
+    data, _ = get(f"/api/reports/{Report.query.first().id}?fields=status,creator")
+    assert data['status'] == 'draft' and data['creator']['username'] == 'admin' and set(data) == {'status', 'creator'}
+
+    assert client.get('/api/companies/?fields=id,secret', headers=headers).status_code == 400
+    assert client.get('/api/companies/?fields=', headers=headers).status_code == 400
+    assert client.get('/api/reports/?fields=annual_reports', headers=headers).status_code == 400
@@ -0,0 +1,87 @@
+"""
+Cursor pagination tests
+
+Author: Osman Yildiz
+"""
+from datetime import datetime, timedelta
+
+from flask_jwt_extended import create_access_token
+
+from backend1.app import db
+from backend1.app.models.company import Company
+from backend1.app.models.report import Report
+from backend1.app.models.user import User
+from backend1.app.services.pagination import count_cache
+
+
+def walk(client, headers, url, key, limit):
+    """Every item of a cursor-paginated list, and the number of pages"""
+    items, pages, after = [], 0, None
+    while True:
+        data = client.get(f'{url}{"&" if "?" in url else "?"}limit={limit}'
+                          + (f'&after={after}' if after else ''), headers=headers).json
+        assert len(data[key]) <= limit and data['limit'] == limit
+        items += data[key]
+        pages += 1
+        after = data['next_cursor']
+        if after is None:
+            return items, pages
+
+
+def test_cursor_pages_match_numbered_pages(app):
+    count_cache.clear()
+    # Repeated names exercise the id tie-break
+    for i in range(23):
+        db.session.add(Company(name=f'Company {i % 7}', ticker=f'C{i}', source_url=f'https://x/{i}',
+                               industry='Software' if i % 3 else 'Energy'))
+    admin = User(username='admin', email='admin@example.com', role='admin')
+    viewer = User(username='viewer', email='viewer@example.com', role='viewer')
+    for user in (admin, viewer):
+        user.set_password('Secret123!')
+        db.session.add(user)
+    db.session.commit()
+    headers = {'Authorization': f'Bearer {create_access_token(identity=str(admin.id))}'}
+    viewer_headers = {'Authorization': f'Bearer {create_access_token(identity=str(viewer.id))}'}
+    client = app.test_client()
+
+    expected = [(c.name, c.id) for c in Company.query.order_by(Company.name, Company.id)]
+    companies, pages = walk(client, headers, '/api/companies/', 'companies', 5)
+    assert [(c['name'], c['id']) for c in companies] == expected and pages == 5
+    legacy = client.get('/api/companies/?page=2&per_page=5', headers=headers).json
+    assert legacy['total'] == 23 and legacy['pages'] == 5 and len(legacy['companies']) == 5
+
+    # Filters and ranked search page too; totals only on request, then cached
+    energy, _ = walk(client, headers, '/api/companies/?industry=energy', 'companies', 3)
+    assert sorted(c['id'] for c in energy) == sorted(c.id for c in Company.query.filter_by(industry='Energy'))
+    searched, _ = walk(client, headers, '/api/companies/?search=company%203', 'companies', 2)
+    assert sorted(c['id'] for c in searched) == sorted(c.id for c in Company.query.filter_by(name='Company 3'))
+    assert 'total' not in client.get('/api/companies/?limit=5', headers=headers).json
+    assert client.get('/api/companies/?limit=5&count=true', headers=headers).json['total'] == 23
+    db.session.add(Company(name='Company new', source_url='https://x/new'))
+    db.session.commit()
+    assert client.get('/api/companies/?limit=5&count=true', headers=headers).json['total'] == 23
+    count_cache.clear()
+    assert client.get('/api/companies/?limit=5&count=true', headers=headers).json['total'] == 24
+
+    assert client.get('/api/companies/?after=not-a-cursor', headers=headers).status_code == 400
+    assert client.get('/api/companies/?after=WzFd', headers=headers).status_code == 400  # [1]
+    assert client.get('/api/companies/?limit=1000', headers=headers).json['limit'] == 100
+
+    # Reports: newest first, viewers only see their own
+    start = datetime(2026, 1, 1)
+    for i in range(9):
+        db.session.add(Report(title=f'Report {i}', report_type='audit', created_at=start + timedelta(days=i % 4),
+                              created_by=admin.id if i % 2 else viewer.id))
+    db.session.commit()
+    reports, pages = walk(client, headers, '/api/reports/', 'reports', 4)
+    assert [r['id'] for r in reports] == [r.id for r in Report.query.order_by(Report.created_at.desc(),
+                                                                             Report.id.desc())]
+    assert pages == 3
+    own, _ = walk(client, viewer_headers, '/api/reports/', 'reports', 2)
+    assert len(own) == 5 and {r['created_by'] for r in own} == {viewer.id}
+    assert client.get('/api/reports/', headers=headers).json['total'] == 9
+
+    users, pages = walk(client, headers, '/api/admin/users', 'users', 1)
+    assert [u['username'] for u in users] == ['admin', 'viewer'] and pages == 2
+    assert client.get('/api/admin/users?limit=1&count=1', headers=headers).json['total'] == 2
+    assert client.get('/api/admin/users', headers=headers).json['total'] == 2
@@ -0,0 +1,89 @@
+"""
+Industry peer percentile tests
+
+Author: Osman Yildiz
+"""
+import random
+
+from flask_jwt_extended import create_access_token
+
+from backend1.app import db
+from backend1.app.models.annual_report import AnnualReport
+from backend1.app.models.company import Company
+from backend1.app.models.compliance_score import ComplianceScore
+from backend1.app.models.user import User
+from backend1.app.services.compliance_history import SCORE_FIELDS, flatten, unflatten
+from backend1.app.services.peer_percentiles import PeerIndex, get_peer_index
+
+
+def brute_force_percentile(peer_values, value):
+    below = sum(1 for v in peer_values if v < value)
+    equal = sum(1 for v in peer_values if v == value)
+    return round(100.0 * (below + 0.5 * equal) / len(peer_values), 1)
+
+
+def test_incremental_updates_match_brute_force_ranks():
+    rng = random.Random(11)
+    index = PeerIndex()
+    current = {}
+    for step in range(600):
+        company_id = rng.randrange(80)
+        if step % 7 == 0 and company_id in current:
+            index.remove(company_id)
+            del current[company_id]
+            continue
+        industry = rng.choice(('Technology', 'Energy'))
+        values = tuple(rng.randint(50, 99) for _ in SCORE_FIELDS)
+        index.update(company_id, industry, values)
+        current[company_id] = (industry, values)
+
+    probe = tuple(rng.randint(50, 99) for _ in SCORE_FIELDS)
+    for industry in ('Technology', 'Energy'):
+        peers = [values for ind, values in current.values() if ind == industry]
+        count, ranks = index.percentiles(industry, probe)
+        assert count == len(peers)
+        expected = [brute_force_percentile([p[i] for p in peers], probe[i]) for i in range(len(SCORE_FIELDS))]
+        assert flatten(ranks) == tuple(expected)
+
+    assert index.percentiles('Healthcare', probe)[0] == 0
+
+
+def test_compliance_endpoint_ranks_within_industry_and_follows_changes(app):
+    companies = []
+    for i, (industry, years) in enumerate([('Software', 3), ('Internet', 1), ('Software', 0),
+                                           ('Banking', 2)]):
+        company = Company(name=f'Company {i}', industry=industry, source_url=f'https://x/{i}',
+                          ticker=f'C{i}' if i % 2 else None)
+        company.annual_reports = [AnnualReport(year=2024 - y, title='Annual Report', pdf_url='https://x.pdf')
+                                  for y in range(years)]
+        db.session.add(company)
+        companies.append(company)
+    db.session.commit()
+
+    user = User(username='viewer', email='viewer@example.com', role='viewer')
+    user.set_password('Secret123!')
+    db.session.add(user)
+    db.session.commit()
+    headers = {'Authorization': f'Bearer {create_access_token(identity=str(user.id))}'}
+    client = app.test_client()
+
+    data = client.get(f'/api/companies/{companies[0].id}/compliance', headers=headers).json
+    # Software and Internet both classify as Technology
+    assert data['peer_group'] == {'industry': 'Technology', 'peer_count': 3}
+    tech = [flatten(db.session.get(ComplianceScore, c.id).scores) for c in companies[:3]]
+    own = flatten(data['compliance_scores'])
+    expected = unflatten(brute_force_percentile([t[i] for t in tech], own[i]) for i in range(len(SCORE_FIELDS)))
+    assert data['peer_percentiles'] == expected
+
+    # A company moving industries leaves its old peer group
+    companies[1].industry = 'Banking'
+    db.session.commit()
+    data = client.get(f'/api/companies/{companies[0].id}/compliance', headers=headers).json
+    assert data['peer_group']['peer_count'] == 2
+
+    db.session.delete(companies[2])
+    db.session.commit()
+    data = client.get(f'/api/companies/{companies[0].id}/compliance', headers=headers).json
+    assert data['peer_group']['peer_count'] == 1
+    assert set(flatten(data['peer_percentiles'])) == {50.0}
+    assert get_peer_index().percentiles('Financial Services', own)[0] == 2
@@ -0,0 +1,87 @@
+"""
+Per-endpoint SQL query budgets
+
+Every endpoint must run a constant number of queries however many rows
+it returns. Each budget is checked at two data sizes.
+
+Author: Osman Yildiz
+"""
+import pytest
+from flask_jwt_extended import create_access_token
+
+from backend1.app import db
+from backend1.app.models.annual_report import AnnualReport
+from backend1.app.models.company import Company
+from backend1.app.models.report import Report
+from backend1.app.models.user import User
+
+BUDGETS = {
+    '/api/admin/users': 3,
+    '/api/admin/users?limit=50': 3,
+    '/api/admin/stats': 5,
+    '/api/companies/?per_page=100': 2,
+    '/api/companies/?limit=100': 1,
+    '/api/companies/?search=company&limit=100': 1,
+    '/api/companies/{company}': 2,
+    '/api/companies/{company}/reports': 2,
+    '/api/companies/{company}/compliance': 10,
+    '/api/companies/{company}/compliance/history': 3,
+    '/api/companies/compliance-overview?per_page=100': 2,
+    '/api/compliance/controls': 1,
+    '/api/compliance/controls/A.8.12/companies': 2,
+    '/api/compliance/controls/companies/{company}': 2,
+    '/api/dashboard/overview': 4,
+    '/api/reports/': 3,
+    '/api/reports/?limit=50': 3,
+    '/api/reports/{report}': 3,
+    '/api/reports/stats': 8,
+}
+
+
+def add_rows(count, offset, admin):
+    for i in range(offset, offset + count):
+        company = Company(name=f'Company {i}', ticker=f'C{i}', source_url=f'https://x/{i}',
+                          industry=('Software', 'Banking', 'Energy')[i % 3])
+        company.annual_reports = [AnnualReport(year=2022 + y, title='Annual Report', pdf_url='https://x.pdf')
+                                  for y in range(3)]
+        db.session.add(company)
+        db.session.flush()
+        db.session.add(Report(title=f'Report {i}', report_type='audit', created_by=admin.id,
+                              reviewed_by=admin.id, company_id=company.id,
+                              source_annual_report_id=company.annual_reports[0].id))
+        user = User(username=f'user{i}', email=f'user{i}@example.com', role='viewer')
+        user.set_password('Secret123!')
+        db.session.add(user)
+    db.session.commit()
+
+
+def measure(client, headers, count_queries, ids):
+    counts = {}
+    for url in BUDGETS:
+        path = url.format(**ids)
+        client.get(path, headers=headers)  # Warm per-process caches
+        with count_queries() as queries:
+            response = client.get(path, headers=headers)
+        assert response.status_code == 200, path
+        counts[url] = len(queries)
+    return counts
+
+
+@pytest.mark.filterwarnings('ignore::sqlalchemy.exc.LegacyAPIWarning')
+def test_endpoint_query_counts_do_not_grow_with_rows(app, count_queries):
+    admin = User(username='admin', email='admin@example.com', role='admin')
+    admin.set_password('Secret123!')
+    db.session.add(admin)
+    db.session.commit()
+    headers = {'Authorization': f'Bearer {create_access_token(identity=str(admin.id))}'}
+    client = app.test_client()
+
+    add_rows(3, 0, admin)
+    ids = {'company': Company.query.first().id, 'report': Report.query.first().id}
+    small = measure(client, headers, count_queries, ids)
+    add_rows(30, 3, admin)
+    large = measure(client, headers, count_queries, ids)
+
+    assert large == small
+    over = {url: count for url, count in large.items() if count > BUDGETS[url]}
+    assert not over, f'Over query budget: {over}'
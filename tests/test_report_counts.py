@@ -0,0 +1,93 @@
+"""
+Company annual report counter tests
+
+Author: Osman Yildiz
+"""
+from datetime import datetime
+
+from flask_jwt_extended import create_access_token
+
+from backend1.app import db
+from backend1.app.models.annual_report import AnnualReport
+from backend1.app.models.company import Company
+from backend1.app.models.user import User
+from backend1.app.services import compliance_scores
+from backend1.app.services.compliance_rescore import CatalogRescorer
+
+
+def counters(company_id):
+    db.session.expire_all()
+    company = db.session.get(Company, company_id)
+    return company.report_count, company.latest_report_year, company.recent_report_count
+
+
+def brute_counters(company_id):
+    years = [r.year for r in AnnualReport.query.filter_by(company_id=company_id)]
+    return len(years), max(years, default=None), sum(1 for y in years if y >= datetime.now().year - 2)
+
+
+def test_counters_follow_report_writes(app):
+    year = datetime.now().year
+    first = Company(name='First', ticker='FST', source_url='https://x/1')
+    first.annual_reports = [AnnualReport(year=y, title='Annual Report') for y in (year - 5, year - 2, year)]
+    second = Company(name='Second', source_url='https://x/2')
+    db.session.add_all([first, second])
+    db.session.commit()
+    updated_at = first.updated_at
+    assert counters(first.id) == (3, year, 2) == brute_counters(first.id)
+    assert counters(second.id) == (0, None, 0)
+
+    # Edits, moves between companies and deletes
+    report = AnnualReport.query.filter_by(company_id=first.id, year=year).one()
+    report.year = year - 10
+    db.session.commit()
+    assert counters(first.id) == (3, year - 2, 1) == brute_counters(first.id)
+    report.company_id = second.id
+    db.session.commit()
+    assert counters(first.id) == (2, year - 2, 1) and counters(second.id) == (1, year - 10, 0)
+    db.session.delete(AnnualReport.query.filter_by(company_id=first.id, year=year - 2).one())
+    db.session.commit()
+    assert counters(first.id) == (1, year - 5, 0) == brute_counters(first.id)
+    # A report is not a change to the company itself
+    assert db.session.get(Company, first.id).updated_at == updated_at
+
+    # Core inserts are picked up by a refresh (as the seed pipeline does)
+    db.session.execute(db.insert(AnnualReport), [{'company_id': second.id, 'year': year - 1, 'title': 'AR'}])
+    compliance_scores.refresh([second.id])
+    db.session.commit()
+    assert counters(second.id) == (2, year - 1, 1) == brute_counters(second.id)
+
+    # The yearly catalog rescore moves the recent window along
+    db.session.execute(db.update(Company).where(Company.id == second.id).values(recent_report_count=2))
+    db.session.commit()
+    CatalogRescorer(workers=0).run()
+    assert counters(second.id) == brute_counters(second.id)
+
+
+def test_company_list_filters_and_sorts_on_counters(app):
+    year = datetime.now().year
+    for i, years in enumerate([(year,), (year - 8, year - 7, year - 6), (), (year - 1, year)]):
+        company = Company(name=f'Company {i}', source_url=f'https://x/{i}')
+        company.annual_reports = [AnnualReport(year=y, title='Annual Report') for y in years]
+        db.session.add(company)
+    user = User(username='viewer', email='viewer@example.com', role='viewer')
+    user.set_password('Secret123!')
+    db.session.add(user)
+    db.session.commit()
+    headers = {'Authorization': f'Bearer {create_access_token(identity=str(user.id))}'}
+    client = app.test_client()
+
+    def names(query):
+        response = client.get(f'/api/companies/?{query}', headers=headers)
+        assert response.status_code == 200, response.json
+        return [c['name'] for c in response.json['companies']]
+
+    assert names('sort=-report_count') == ['Company 1', 'Company 3', 'Company 0', 'Company 2']
+    assert names('sort=-latest_report_year&limit=2') == ['Company 0', 'Company 3']
+    assert names('sort=recent_report_count&min_reports=1') == ['Company 1', 'Company 0', 'Company 3']
+    assert names('min_recent_reports=2') == ['Company 3']
+    assert names(f'reported_since={year - 1}&sort=-name') == ['Company 3', 'Company 0']
+    assert names('search=company&sort=-report_count&limit=1') == ['Company 1']
+    data = client.get('/api/companies/?limit=1', headers=headers).json['companies'][0]
+    assert (data['report_count'], data['latest_report_year'], data['recent_report_count']) == (1, year, 1)
+    assert client.get('/api/companies/?sort=ticker', headers=headers).status_code == 400
@@ -0,0 +1,105 @@
+"""
+Re-scrape scheduler and change detection tests
+
+Author: Osman Yildiz
+"""
+from datetime import datetime, timedelta
+
+from backend1.app import db
+from backend1.app.models.company import Company
+from backend1.app.models.annual_report import AnnualReport
+from backend1.app.services.company_sync import content_hash, sync_company
+from backend1.app.services.rescrape_scheduler import RescrapeScheduler
+from backend1.app.services.scraper import AnnualReportsScraper
+
+
+def company_page(name, years):
+    links = ''.join(f'<div><a href="/HostedData/AnnualReportArchive/x/{year}.pdf">{year} Annual Report</a></div>'
+                    for year in years)
+    return f'<html><body><h1>{name}</h1><span>Ticker:</span> {name.upper()}{links}</body></html>'
+
+
+def store(server, slug, name, years, scraped_days_ago):
+    scraper = AnnualReportsScraper(rate_limit_delay=0)
+    scraper.BASE_URL = server.url
+    data = scraper.parse_company(company_page(name, years).encode(), slug)
+    company, _ = sync_company(data)
+    company.last_scraped_at = company.last_scrape_attempt_at = datetime.utcnow() - timedelta(days=scraped_days_ago)
+    company.updated_at = datetime(2020, 1, 1)
+    db.session.commit()
+    return company
+
+
+def make_scheduler(server, **kwargs):
+    scraper = AnnualReportsScraper(rate_limit_delay=0, max_concurrency=2)
+    scraper.BASE_URL = server.url
+    return RescrapeScheduler(scraper, **kwargs)
+
+
+def test_content_hash_ignores_whitespace_and_report_order():
+    data = {'source_url': 'u', 'name': 'Acme  Inc', 'ticker': None, 'exchange': None,
+            'industry': None, 'sector': None, 'description': None, 'website': None,
+            'annual_reports': [{'year': 2022, 'title': 'a'}, {'year': 2023, 'title': 'b'}]}
+    shuffled = dict(data, name=' Acme Inc\n', annual_reports=data['annual_reports'][::-1])
+
+    assert content_hash(data) == content_hash(shuffled)
+    assert content_hash(data) != content_hash(dict(data, name='Acme Corp'))
+
+
+def test_stalest_companies_first_within_budget(app, fixture_server):
+    store(fixture_server, 'fresh-co', 'Fresh', [2023], scraped_days_ago=1)
+    store(fixture_server, 'old-co', 'Old', [2023], scraped_days_ago=30)
+    store(fixture_server, 'older-co', 'Older', [2023], scraped_days_ago=60)
+    store(fixture_server, 'oldest-co', 'Oldest', [2023], scraped_days_ago=90)
+
+    scheduler = make_scheduler(fixture_server, budget=2, min_age=timedelta(days=7))
+
+    assert [c.name for c in scheduler.select_stale()] == ['Oldest', 'Older']
+
+
+def test_unchanged_pages_skip_writes(app, fixture_server):
+    for slug, name in (('same-co', 'Same'), ('moved-co', 'Moved'), ('gone-co', 'Gone')):
+        store(fixture_server, slug, name, [2022, 2023], scraped_days_ago=30)
+        fixture_server.add(f'/Company/{slug}', company_page(name, [2022, 2023]))
+    fixture_server.add('/Company/moved-co', company_page('Moved', [2022, 2023, 2024]))
+    del fixture_server.routes['/Company/gone-co']
+
+    result = make_scheduler(fixture_server).run()
+
+    assert {k: result[k] for k in ('selected', 'fetched', 'changed', 'unchanged', 'failed')} == \
+        {'selected': 3, 'fetched': 2, 'changed': 1, 'unchanged': 1, 'failed': 1}
+
+    same = Company.query.filter_by(name='Same').one()
+    moved = Company.query.filter_by(name='Moved').one()
+    assert same.updated_at == datetime(2020, 1, 1)
+    assert same.last_scraped_at > datetime.utcnow() - timedelta(minutes=1)
+    assert moved.updated_at > datetime(2020, 1, 1)
+    assert AnnualReport.query.filter_by(company_id=moved.id).count() == 3
+
+    # The failed attempt is recorded without counting as a scrape
+    gone = Company.query.filter_by(name='Gone').one()
+    assert gone.last_scraped_at < datetime.utcnow() - timedelta(days=29)
+    assert gone.last_scrape_attempt_at > datetime.utcnow() - timedelta(minutes=1)
+    assert (gone.scrape_failures, same.scrape_failures) == (1, 0)
+    assert make_scheduler(fixture_server).select_stale() == []
+
+
+def test_failing_companies_rotate_out_of_the_front_of_the_queue(app, fixture_server):
+    store(fixture_server, 'gone-co', 'Gone', [2023], scraped_days_ago=90)
+    store(fixture_server, 'old-co', 'Old', [2023], scraped_days_ago=30)
+    fixture_server.add('/Company/old-co', company_page('Old', [2023]))
+    slugless = store(fixture_server, 'slugless-co', 'Slugless', [2023], scraped_days_ago=60)
+    slugless.source_url = 'https://example.com/elsewhere'
+    db.session.commit()
+    scheduler = make_scheduler(fixture_server, budget=2)
+
+    assert scheduler.run()['failed'] == 2
+    assert [c.name for c in scheduler.select_stale()] == ['Old']
+
+    # Once due again, healthy companies come first and repeated failures last
+    later = datetime.utcnow() + timedelta(days=8)
+    result = scheduler.run(later)
+    assert (result['unchanged'], result['failed']) == (1, 1)
+    scheduler.budget = 3
+    assert [(c.name, c.scrape_failures) for c in scheduler.select_stale(later + timedelta(days=8))] == \
+        [('Old', 0), ('Slugless', 1), ('Gone', 2)]
@@ -0,0 +1,98 @@
+"""
+Declarative scoring spec tests
+
+Author: Osman Yildiz
+"""
+import copy
+import struct
+from datetime import datetime
+
+import pytest
+
+from backend1.app.services import compliance_history
+from backend1.app.services.compliance_analyzer import ComplianceAnalyzer
+from backend1.app.services.scoring_plan import ScoringPlan, default_plan, load_spec
+from backend1.benchmarks.bench_compliance import synthetic_portfolio
+
+THIS_YEAR = datetime.now().year
+
+OLD_BANK = ({'id': 3, 'name': 'Old Bank', 'ticker': 'OB', 'industry': 'Regional Banking', 'description': 'x' * 300},
+            [{'year': THIS_YEAR - 10, 'pdf_url': None}, {'year': THIS_YEAR - 9, 'pdf_url': None}])
+BUSY_RETAILER = ({'id': 5, 'name': 'Busy Retailer', 'ticker': 'BR', 'industry': 'RETAIL', 'description': 'y' * 201},
+                 [{'year': year, 'pdf_url': 'https://x.pdf'} for year in range(THIS_YEAR - 4, THIS_YEAR + 1)])
+
+NIST_CSF = {
+    'name': 'nist_csf',
+    'averaged': True,
+    'controls': [
+        {'name': 'identify', 'baseline': 'nist_csf', 'factors': ['size', 'maturity'], 'weight': 0.97,
+         'offset': 0, 'cap': 95},
+        {'name': 'protect', 'baseline': 'iso27001', 'factors': ['size', 'report_quality', 'industry_boost'],
+         'weight': 1.0, 'offset': 1, 'cap': 96},
+        {'name': 'recover', 'baseline': 'soc2', 'baseline_scale': 0.9, 'factors': ['report_quality'],
+         'weight': 1.03, 'offset': -1, 'cap': 90},
+    ]
+}
+
+
+def test_shipped_spec_reproduces_the_hand_written_formulas():
+    # Scores of the former per-framework _calculate_* methods
+    analyzer = ComplianceAnalyzer()
+    assert analyzer.analyze_company(*OLD_BANK) == {
+        'iso27001': {'access_control': 64, 'information_security': 61, 'operations_security': 88},
+        'iso27017': {'cloud_access_control': 60, 'virtual_network_security': 83, 'cloud_asset_management': 53},
+        'soc2': {'security': 70, 'availability': 93, 'processing_integrity': 62, 'confidentiality': 86,
+                 'privacy': 72},
+        'policies': {'privacy_policy': 74, 'security_policy': 70, 'data_handling_policy': 66},
+    }
+    assert analyzer.analyze_company(*BUSY_RETAILER) == {
+        'iso27001': {'access_control': 77, 'information_security': 73, 'operations_security': 71},
+        'iso27017': {'cloud_access_control': 82, 'virtual_network_security': 76, 'cloud_asset_management': 73},
+        'soc2': {'security': 83, 'availability': 77, 'processing_integrity': 77, 'confidentiality': 72,
+                 'privacy': 85},
+        'policies': {'privacy_policy': 84, 'security_policy': 79, 'data_handling_policy': 75},
+    }
+    assert default_plan().averaged_frameworks == ('iso27001', 'iso27017', 'soc2')
+
+
+def test_new_framework_needs_only_a_spec_entry(monkeypatch):
+    spec = load_spec()
+    spec['frameworks'].append(NIST_CSF)
+    for i, industry in enumerate(spec['industries']):
+        industry['baselines']['nist_csf'] = 70 + i
+    plan = ScoringPlan(spec)
+    assert plan.version != default_plan().version
+    assert plan.controls[-3:] == (('nist_csf', 'identify'), ('nist_csf', 'protect'), ('nist_csf', 'recover'))
+
+    monkeypatch.setattr(ComplianceAnalyzer, 'plan', plan)
+    analyzer = ComplianceAnalyzer()
+    batch = synthetic_portfolio(500, seed=3)
+    scalar = [analyzer.analyze_company(company, reports) for company, reports in batch]
+    assert analyzer.analyze_companies(batch) == scalar
+    assert all(set(scores['nist_csf']) == {'identify', 'protect', 'recover'} for scores in scalar)
+    assert all(50 <= scores['nist_csf']['recover'] <= 90 for scores in scalar)
+    # Existing frameworks are unchanged
+    monkeypatch.undo()
+    assert [{k: v for k, v in s.items() if k != 'nist_csf'} for s in scalar] == \
+        ComplianceAnalyzer().analyze_companies(batch)
+
+
+def test_history_rows_written_before_a_framework_was_added_still_decode(monkeypatch):
+    old = compliance_history.encode(tuple(range(60, 74)))
+    monkeypatch.setattr(compliance_history, 'SCORE_FIELDS', compliance_history.SCORE_FIELDS + (('nist_csf', 'identify'),))
+    monkeypatch.setattr(compliance_history, '_PACK', struct.Struct('15b'))
+    assert compliance_history.decode(old) == tuple(range(60, 74)) + (0,)
+    assert compliance_history.decode(old[:14], previous=(1,) * 15) == tuple(range(61, 75)) + (1,)
+
+
+@pytest.mark.parametrize('edit, message', [
+    (lambda spec: spec['frameworks'][0]['controls'][0].update(factors=['maturity', 'size']), 'in that order'),
+    (lambda spec: spec['frameworks'][0]['controls'][0].update(wieght=1.0), 'unknown fields wieght'),
+    (lambda spec: spec.update(default_industry='Other'), 'unknown default industry'),
+    (lambda spec: spec['frameworks'][0]['controls'][0].update(baseline='nist_csf'), 'nist_csf'),
+])
+def test_invalid_specs_are_rejected_at_compile_time(edit, message):
+    spec = copy.deepcopy(load_spec())
+    edit(spec)
+    with pytest.raises(ValueError, match=message):
+        ScoringPlan(spec)
@@ -0,0 +1,99 @@
+"""
+Batch scrape job API tests
+
+Author: Osman Yildiz
+"""
+import pytest
+from flask_jwt_extended import create_access_token
+
+from backend1.app import db
+from backend1.app.models.company import Company
+from backend1.app.models.scrape_job import ScrapeJob, ScrapeJobItem
+from backend1.app.models.user import User
+from backend1.app.services import scraper as scraper_module
+from backend1.app.services.scrape_jobs import get_runner
+
+
+def company_page(name):
+    return (f'<html><body><h1>{name}</h1><span>Ticker:</span> {name.upper()}<div>'
+            f'<a href="/HostedData/AnnualReportArchive/x/{name}.pdf">2023 Annual Report</a>'
+            f'</div></body></html>')
+
+
+@pytest.fixture
+def scrape_app(app, fixture_server, monkeypatch):
+    """App whose shared scraper points at the fixture server"""
+    app.config.update(SCRAPER_BASE_URL=fixture_server.url, SCRAPER_RATE_LIMIT_DELAY=0)
+    monkeypatch.setattr(scraper_module, '_scrapers', {})
+    for name in ('acme', 'beta', 'gamma'):
+        fixture_server.add(f'/Company/{name}-inc', company_page(name))
+    return app
+
+
+def admin_headers(role='admin'):
+    user = User(username=role, email=f'{role}@example.com', role=role)
+    user.set_password('Secret123!')
+    db.session.add(user)
+    db.session.commit()
+    return {'Authorization': f'Bearer {create_access_token(identity=str(user.id))}'}
+
+
+def test_batch_returns_job_and_reports_results(scrape_app, fixture_server):
+    client = scrape_app.test_client()
+    headers = admin_headers()
+
+    response = client.post('/api/companies/scrape/batch', headers=headers,
+                           json={'slugs': ['acme-inc', 'beta-inc', 'missing-inc', 'acme-inc']})
+    assert response.status_code == 202
+    job_id = response.json['job_id']
+    assert response.json['total'] == 3
+    assert response.json['status_url'] == f'/api/companies/scrape/jobs/{job_id}'
+
+    get_runner().wait(job_id, timeout=30)
+
+    job = client.get(f'/api/companies/scrape/jobs/{job_id}', headers=headers).json
+    assert job['status'] == 'completed'
+    assert job['progress']['done'] == 3
+    statuses = {item['slug']: item['status'] for item in job['items']}
+    assert statuses == {'acme-inc': 'created', 'beta-inc': 'created', 'missing-inc': 'failed'}
+    assert Company.query.count() == 2
+
+    # Stored companies are skipped unless the job forces an update
+    response = client.post('/api/companies/scrape/batch', headers=headers,
+                           json={'slugs': ['acme-inc', 'gamma-inc'], 'force_update': False})
+    get_runner().wait(response.json['job_id'], timeout=30)
+    items = {i.slug: i.status for i in ScrapeJobItem.query.filter_by(job_id=response.json['job_id'])}
+    assert items == {'acme-inc': 'skipped', 'gamma-inc': 'created'}
+    assert fixture_server.hit_count('/Company/acme-inc') == 1
+
+
+def test_batch_validation_and_permissions(scrape_app):
+    client = scrape_app.test_client()
+
+    viewer = admin_headers('viewer')
+    assert client.post('/api/companies/scrape/batch', headers=viewer,
+                       json={'slugs': ['acme-inc']}).status_code == 403
+
+    headers = admin_headers()
+    assert client.post('/api/companies/scrape/batch', headers=headers, json={}).status_code == 400
+    assert client.post('/api/companies/scrape/batch', headers=headers,
+                       json={'slugs': ['../etc/passwd']}).status_code == 400
+    assert client.get('/api/companies/scrape/jobs/999', headers=headers).status_code == 404
+
+
+def test_restart_resumes_unfinished_job(scrape_app, fixture_server):
+    # A job interrupted after its first slug, owned by a worker that died
+    job = ScrapeJob(status='running', worker='old-host:1')
+    job.items = [ScrapeJobItem(slug='acme-inc', status='created'),
+                 ScrapeJobItem(slug='beta-inc'), ScrapeJobItem(slug='gamma-inc')]
+    db.session.add(job)
+    db.session.commit()
+
+    assert get_runner().resume() == [job.id]
+    get_runner().wait(job.id, timeout=30)
+
+    db.session.expire_all()
+    job = db.session.get(ScrapeJob, job.id)
+    assert job.status == 'completed'
+    assert [item.status for item in job.items] == ['created', 'created', 'created']
+    assert fixture_server.hit_count('/Company/acme-inc') == 0
@@ -0,0 +1,189 @@
+"""
+Scraper fetch engine tests (run against a local fixture server)
+
+Author: Osman Yildiz
+"""
+import threading
+import time
+
+from backend1.app.services.scraper import AnnualReportsScraper, TokenBucket
+
+
+COMPANY_PAGE = """
+<html><head><meta name="description" content="{name} annual reports"></head>
+<body>
+  <h1>{name}</h1>
+  <div class="vendor_name"><span>Ticker:</span> {ticker}</div>
+  <div class="annual_report_row">
+    <a href="/HostedData/AnnualReportArchive/x/{ticker}_2023.pdf">2023 Annual Report</a>
+  </div>
+</body></html>
+"""
+
+
+def make_scraper(server, **kwargs):
+    scraper = AnnualReportsScraper(**kwargs)
+    scraper.BASE_URL = server.url
+    return scraper
+
+
+def test_scrape_company_keeps_return_shape(fixture_server):
+    fixture_server.add('/Company/acme-inc', COMPANY_PAGE.format(name='Acme Inc.', ticker='ACME'))
+    scraper = make_scraper(fixture_server, rate_limit_delay=0)
+
+    data = scraper.scrape_company('acme-inc')
+
+    assert data['name'] == 'Acme Inc.'
+    assert data['ticker'] == 'ACME'
+    assert data['source_url'] == f'{fixture_server.url}/Company/acme-inc'
+    assert data['annual_reports'][0]['year'] == 2023
+    assert scraper.scrape_company('missing-co') is None
+
+
+def test_scrape_many_yields_every_slug(fixture_server):
+    slugs = [f'company-{i}' for i in range(12)]
+    for i, slug in enumerate(slugs):
+        fixture_server.add(f'/Company/{slug}', COMPANY_PAGE.format(name=f'Company {i}', ticker=f'C{i}'))
+    scraper = make_scraper(fixture_server, rate_limit_delay=0, max_concurrency=4)
+
+    results = dict(scraper.scrape_many(slugs + ['missing-co']))
+
+    assert set(results) == set(slugs) | {'missing-co'}
+    assert results['missing-co'] is None
+    assert results['company-7']['name'] == 'Company 7'
+
+
+def test_throttled_response_honors_retry_after(fixture_server):
+    calls = []
+
+    def flaky(handler):
+        calls.append(time.monotonic())
+        if len(calls) == 1:
+            return 429, {'Retry-After': '1'}, b''
+        return 200, {'Content-Type': 'text/html'}, COMPANY_PAGE.format(name='Acme Inc.', ticker='ACME')
+
+    fixture_server.routes['/Company/acme-inc'] = flaky
+    scraper = make_scraper(fixture_server, rate_limit_delay=0.01)
+
+    data = scraper.scrape_company('acme-inc')
+
+    assert data['name'] == 'Acme Inc.'
+    assert len(calls) == 2
+    assert calls[1] - calls[0] >= 0.9
+
+
+def test_token_bucket_paces_after_burst():
+    bucket = TokenBucket(rate=10.0, capacity=1.0)
+
+    assert bucket.reserve() == 0.0
+    assert 0.09 <= bucket.reserve() <= 0.1
+    bucket.penalize(2.0)
+    assert bucket.rate == 5.0
+    assert bucket.reserve() >= 2.0
+
+
+def test_pooled_session_reuses_connections(fixture_server):
+    fixture_server.add('/Company/acme-inc', COMPANY_PAGE.format(name='Acme Inc.', ticker='ACME'))
+    scraper = make_scraper(fixture_server, rate_limit_delay=0, pool_size=2)
+
+    for _ in range(3):
+        scraper.scrape_company('acme-inc')
+    stats = scraper.pool_stats()
+
+    assert stats['requests'] == 3
+    assert stats['new_connections'] == 1
+    assert stats['hits'] == 2
+    assert stats['in_flight'] == 0
+
+
+def test_get_scraper_is_shared_per_process():
+    from backend1.app.services.scraper import get_scraper
+
+    assert get_scraper() is get_scraper()
+
+
+def test_conditional_get_reuses_cached_body(fixture_server, tmp_path):
+    from backend1.app.services.http_cache import HTTPCache
+
+    page = COMPANY_PAGE.format(name='Acme Inc.', ticker='ACME')
+    requests_seen = []
+
+    def conditional(handler):
+        requests_seen.append(handler.headers.get('If-None-Match'))
+        if handler.headers.get('If-None-Match') == '"v1"':
+            return 304, {'ETag': '"v1"'}, b''
+        return 200, {'Content-Type': 'text/html', 'ETag': '"v1"'}, page
+
+    fixture_server.routes['/Company/acme-inc'] = conditional
+    cache = HTTPCache(str(tmp_path / 'cache'))
+    scraper = make_scraper(fixture_server, rate_limit_delay=0, cache=cache)
+
+    first = scraper.scrape_company('acme-inc')
+    second = scraper.scrape_company('acme-inc')
+
+    assert first == second
+    assert requests_seen == [None, '"v1"']
+    assert cache.stats()['hits'] == 1
+
+
+def test_http_cache_evicts_least_recently_used(tmp_path):
+    from backend1.app.services.http_cache import HTTPCache
+
+    cache = HTTPCache(str(tmp_path / 'cache'), max_bytes=2500)
+    for name in ('a', 'b', 'c'):
+        cache.store(f'http://x/{name}', {'ETag': name}, b'x' * 1000)
+
+    assert cache.lookup('http://x/a') is None
+    assert cache.lookup('http://x/c').body == b'x' * 1000
+    assert cache.stats()['evictions'] == 1
+    assert HTTPCache(str(tmp_path / 'cache')).stats()['entries'] == 2
+
+
+def test_archive_replay_reparses_without_network(fixture_server, tmp_path):
+    from backend1.app.services.html_archive import HTMLArchive
+    from backend1.app.services.scraper import reparse_archive
+
+    fixture_server.add('/Company/acme-inc', COMPANY_PAGE.format(name='Acme Inc.', ticker='ACME'))
+    fixture_server.add('/Company/beta-co', COMPANY_PAGE.format(name='Beta Co', ticker='BETA'))
+    archive_dir = str(tmp_path / 'archive')
+    live = make_scraper(fixture_server, rate_limit_delay=0, archive=HTMLArchive(archive_dir))
+    expected = dict(live.scrape_many(['acme-inc', 'beta-co']))
+    fixture_server.hits.clear()
+
+    replay = make_scraper(fixture_server, archive=HTMLArchive(archive_dir), replay=True)
+    assert replay.scrape_company('acme-inc') == expected['acme-inc']
+    assert replay.scrape_company('never-fetched') is None
+
+    reparsed = dict(reparse_archive(archive_dir, processes=2, base_url=fixture_server.url))
+    assert reparsed == expected
+    assert fixture_server.hits == []
+
+
+def test_cache_and_archive_io_stays_off_the_event_loop(fixture_server, tmp_path):
+    from backend1.app.services.html_archive import HTMLArchive
+    from backend1.app.services.http_cache import HTTPCache
+
+    threads = []
+
+    class RecordingArchive(HTMLArchive):
+        def put(self, url, content):
+            threads.append(threading.current_thread().name)
+            return super().put(url, content)
+
+        def get(self, url):
+            threads.append(threading.current_thread().name)
+            return super().get(url)
+
+    slugs = [f'company-{i}' for i in range(4)]
+    for i, slug in enumerate(slugs):
+        fixture_server.add(f'/Company/{slug}', COMPANY_PAGE.format(name=f'Company {i}', ticker=f'C{i}'))
+    archive = RecordingArchive(str(tmp_path / 'archive'))
+    live = make_scraper(fixture_server, rate_limit_delay=0, max_concurrency=2,
+                        cache=HTTPCache(str(tmp_path / 'cache')), archive=archive)
+    assert all(data for _, data in live.scrape_many(slugs))
+
+    replay = make_scraper(fixture_server, archive=archive, replay=True, max_concurrency=2)
+    assert all(data for _, data in replay.scrape_many(slugs))
+
+    # fetch_many runs its event loop on the 'scraper-fetch' thread
+    assert len(threads) == 8 and 'scraper-fetch' not in threads
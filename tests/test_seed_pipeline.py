@@ -0,0 +1,68 @@
+"""
+Pipelined seeding tests (run against a local fixture server)
+
+Author: Osman Yildiz
+"""
+import pytest
+
+from backend1.app import db
+from backend1.app.models.company import Company
+from backend1.app.models.annual_report import AnnualReport
+from backend1.app.models.compliance_rollup import ComplianceRollup
+from backend1.app.services.seed_pipeline import SeedPipeline
+from backend1.app.services.scraper import AnnualReportsScraper
+
+
+def company_page(i, ticker=None, years=(2019, 2020, 2021, 2022, 2023)):
+    links = ''.join(f'<div><a href="/HostedData/AnnualReportArchive/x/c{i}_{year}.pdf">{year} Annual Report</a></div>'
+                    for year in years)
+    return (f'<html><body><h1>Company {i}</h1><span>Ticker:</span> {ticker or f"C{i}"}'
+            f'{links}</body></html>')
+
+
+def make_pipeline(server, **kwargs):
+    scraper = AnnualReportsScraper(rate_limit_delay=0, max_concurrency=4, base_url=server.url)
+    return SeedPipeline(scraper, **kwargs)
+
+
+@pytest.mark.parametrize('parse_workers', [0, 2])
+def test_pipeline_bulk_inserts_companies_and_recent_reports(app, fixture_server, parse_workers):
+    slugs = [f'company-{i}' for i in range(30)]
+    for i, slug in enumerate(slugs):
+        fixture_server.add(f'/Company/{slug}', company_page(i))
+    fixture_server.add('/Company/no-reports', '<html><body><h1>Empty Co</h1></body></html>')
+    batches = []
+
+    stats = make_pipeline(fixture_server, parse_workers=parse_workers, batch_size=8).run(
+        slugs + ['no-reports', 'missing-co', 'company-3'], progress=lambda s: batches.append(s['companies_added'])
+    )
+
+    assert stats['companies_added'] == 30
+    assert stats['reports_added'] == 90
+    assert stats['fetch_failed'] == 1
+    assert stats['skipped'] == 1
+    assert batches == [8, 16, 24, 30]
+    assert Company.query.count() == 30
+    assert ComplianceRollup.query.count() == 30
+
+    company = Company.query.filter_by(ticker='C7').one()
+    assert company.content_hash
+    years = sorted(r.year for r in AnnualReport.query.filter_by(company_id=company.id))
+    assert years == [2021, 2022, 2023]
+
+
+def test_pipeline_skips_stored_companies_and_stops_at_limit(app, fixture_server):
+    for i in range(20):
+        fixture_server.add(f'/Company/company-{i}', company_page(i))
+    fixture_server.add('/Company/ticker-clash', company_page(99, ticker='C0'))
+    pipeline = make_pipeline(fixture_server, parse_workers=0, batch_size=5)
+
+    first = pipeline.run(['company-0', 'company-1'])
+    assert first['companies_added'] == 2
+
+    second = pipeline.run(['company-0', 'ticker-clash'] + [f'company-{i}' for i in range(2, 20)], limit=6)
+
+    assert fixture_server.hit_count('/Company/company-0') == 1
+    assert second['companies_added'] == 6
+    assert Company.query.count() == 8
+    assert Company.query.filter_by(name='Company 99').count() == 0